@@ -6,24 +6,35 @@ import random
 import datetime
 import logging
 from pathlib import Path
-from openpyxl import Workbook, load_workbook
 from flask import flash
 from flask import get_flashed_messages
 import heapq
-import json
 import shutil
+import atexit
+from server_logic.xlsx_io import serialize_rows, write_bytes_atomic
+from server_logic.results_store import ResultsReadCache, open_results_store
+from server_logic.grading import AnswerSheet, answer_key, grade_batch
+from server_logic.roster import Roster, Status
+from server_logic.replica_log import ReplicaPatchLog, change
+from server_logic.fanout import PendingWrites, fan_out
+from server_logic.placement import ChunkPlacement
+from server_logic.metadata_cache import MetadataCache
+from server_logic.rebalance import apply_plan, plan_rebalance
+from server_logic.chunk_lock import (BUSY_WRITER_WAITING, BUSY_WRITING, LOCK_LEASE_SECONDS, LOCK_MODE, ChunkLock,
+                                     StripedLocks, acquire_write_all, start_lease_reaper)
 
 app = Flask(__name__)
 app.secret_key = "supersecretkey123"
 
 # ------------------ GLOBAL STATE ------------------
-STUDENTS = {
-    "1": {"name": "Swaroop", "marks": 0, "isa": None, "flag": 0, "status": "normal", "cheat_msg": ""},
-    "2": {"name": "Tanisha", "marks": 0, "isa": None, "flag": 0, "status": "normal", "cheat_msg": ""},
-    "3": {"name": "Siddhesh", "marks": 0, "isa": None, "flag": 0, "status": "normal", "cheat_msg": ""},
-    "4": {"name": "Ayush", "marks": 0, "isa": None, "flag": 0, "status": "normal", "cheat_msg": ""},
-    "5": {"name": "Nidhi", "marks": 0, "isa": None, "flag": 0, "status": "normal", "cheat_msg": ""},
-}
+# roll -> name, marks, isa, flag, status, cheat_msg (struct-of-arrays; see server_logic/roster.py)
+STUDENTS = Roster({
+    "1": "Swaroop",
+    "2": "Tanisha",
+    "3": "Siddhesh",
+    "4": "Ayush",
+    "5": "Nidhi",
+})
 
 MCQ_QUESTIONS = {
     1: {"question": "Which algorithm is used for clock synchronization?",
@@ -47,6 +58,8 @@ MCQ_QUESTIONS = {
     10: {"question": "Which data structure used for RA queue?",
          "options": {1: "stack", 2: "heap", 3: "list"}, "answer": 2},
 }
+MCQ_QIDS, MCQ_KEY = answer_key(MCQ_QUESTIONS)
+MCQ_PENALTIES = {Status.WARNING: 0.5, Status.TERMINATED: 0.0}   # status -> fraction of marks kept
 
 EXAM_ACTIVE = False
 ISA_PHASE = False
@@ -62,8 +75,8 @@ TIME_SYNC_PHASE = False
 COLLECTED_TIMES = {}
 SYNCED_TIMES = {}
 
-# cache live answers for auto-submit
-LIVE_ANSWERS = {}
+# cache live answers for auto-submit: one byte per question per student slot
+LIVE_ANSWERS = AnswerSheet(MCQ_QIDS, capacity=len(STUDENTS))
 
 # --- Ricart–Agrawala global state ---
 RA_REQUESTS = {}   # roll -> {"ts": int, "requesting": bool, "in_cs": bool}
@@ -87,6 +100,11 @@ ACTIVE_CONSISTENCY = set()       # rolls participating in demo (set of strings)
 CONSISTENCY_HELD = {}            # roll -> "read" / "write" / None (what they currently hold)
 replication_metadata = {}        # loaded from replication_metadata.json when available
 CHUNK_LOCKS = {}                 # dict of ChunkLock instances keyed by "replica_x:chunkY" and "chunkY"
+STRIPED_LOCKS = StripedLocks()   # one lock per logical chunk for student reads/writes when LOCK_MODE=chunk
+REPLICA_LOG = ReplicaPatchLog()  # per-replica change records; folded into the .xlsx on compaction
+PENDING_WRITES = PendingWrites()  # replica appends still running after their ack; settled before a chunk is unlocked
+REPLICA_VERSIONS = {}            # chunk -> last change-record version handed out
+replica_version_lock = threading.Lock()
 
 # ------------------ HELPERS ------------------
 
@@ -98,138 +116,207 @@ def exam_timer():
             EXAM_ACTIVE = False
             logging.info("⌛ Exam ended automatically, stopping cheating detection.")
 
+            pending = STUDENTS.rolls_where(STUDENTS.column("marks") == 0)
+            # one vectorized grading pass for the whole cohort
+            scores = grade_cohort(pending)
+
             def submit_thread(roll):
                 """Threaded auto-submit for each student."""
-                answers = LIVE_ANSWERS.get(roll, {})
                 try:
-                    score, server_used = process_submission(roll, answers)
+                    score, server_used = process_submission(roll, score=scores[roll])
                     logging.info(f"⌛ Auto-submitted Student {roll} with score {score} via {server_used.upper()} server (status={STUDENTS[roll]['status']})")
                 except Exception as e:
                     logging.exception(f"Error auto-submitting roll {roll}: {e}")
 
             threads = []
-            for roll in STUDENTS:
-                if STUDENTS[roll]["marks"] == 0:
-                    t = threading.Thread(target=submit_thread, args=(roll,))
-                    t.start()
-                    threads.append(t)
+            for roll in pending:
+                t = threading.Thread(target=submit_thread, args=(roll,))
+                t.start()
+                threads.append(t)
 
             # Wait for all threads to complete before exiting
             for t in threads:
                 t.join()
 
+            # Phase boundary: persist everyone's marks before the ISA phase
+            flush_results("exam end")
             break
         time.sleep(1)
 
 
-def grade_mcq(answers: dict) -> int:
-    score = 0
-    for qid, given in answers.items():
-        qid = int(qid)
-        if qid in MCQ_QUESTIONS and int(given) == MCQ_QUESTIONS[qid]["answer"]:
-            score += 10
-    return score
+def grade_cohort(rolls) -> dict:
+    """
+    Grade many students at once from LIVE_ANSWERS: roll -> final score, with
+    the warning / terminated penalties applied from STUDENTS[roll]["status"].
+    """
+    rolls = list(rolls)
+    if not rolls:
+        return {}
+    matrix, rows = LIVE_ANSWERS.indexed(rolls)
+    scores = grade_batch(matrix, MCQ_KEY, STUDENTS.statuses(rolls), MCQ_PENALTIES, rows=rows)
+    return dict(zip(rolls, scores.tolist()))
+
+# ------------------ RESULTS STORE ------------------
+RESULTS_HEADER = ["Roll", "Name", "Marks/MCQ", "ISA"]
+
+
+def _seed_results_rows():
+    return [[r, info["name"], info["marks"], info["isa"]] for r, info in STUDENTS.items()]
+
+
+# results.xlsx (write-behind) or results.db, chosen by RESULTS_BACKEND; see server_logic/results_store.py
+RESULTS = open_results_store(excel_path, RESULTS_HEADER, seed=_seed_results_rows)
+# consistency pages / get_marks_from_results read through this; rebuilt only when a write lands
+RESULTS_CACHE = ResultsReadCache(RESULTS)
+
+
+def flush_results(reason=""):
+    """Synchronously persist results.xlsx (used at phase boundaries)."""
+    try:
+        RESULTS.flush()
+    except Exception as e:
+        logging.error(f"[Results] Flush failed{' at ' + reason if reason else ''}: {e}")
+
+
+atexit.register(flush_results, "shutdown")
+
 
 def update_excel(roll, marks, isa=None):
-    with exam_lock:
-        if not excel_path.exists():
-            wb = Workbook()
-            ws = wb.active
-            ws.append(["Roll", "Name", "Marks/MCQ", "ISA"])
-            for r, info in STUDENTS.items():
-                ws.append([r, info["name"], info["marks"], info["isa"]])
-            wb.save(excel_path)
-
-        wb = load_workbook(excel_path)
-        ws = wb.active
-        updated = False
-        for row in ws.iter_rows(min_row=2):
-            if str(row[0].value) == str(roll):
-                ws.cell(row=row[0].row, column=3, value=marks)
-                if isa is not None:
-                    ws.cell(row=row[0].row, column=4, value=isa)
-                updated = True
-                break
-        if not updated:
-            ws.append([roll, STUDENTS[roll]["name"], marks, isa])
-        wb.save(excel_path)
-
-
-DEFAULT_CHUNK_MAP = {
-    "chunk1": ["1", "2", "3"],
-    "chunk2": ["4", "5"]
-}
+    values = {3: marks}
+    if isa is not None:
+        values[4] = isa
+    RESULTS.update(roll, values, [roll, STUDENTS[roll]["name"], marks, isa])
+
+
+DEFAULT_CHUNK_COUNT = 2
 DEFAULT_REPLICATION_FACTOR = 3
+# roll -> chunk -> replicas via consistent hashing (same layout as server_logic/server.py);
+# replaced by the layout stored in replication_metadata.json once replicas exist
+PLACEMENT = ChunkPlacement(chunks=DEFAULT_CHUNK_COUNT, replicas=DEFAULT_REPLICATION_FACTOR,
+                           replication_factor=DEFAULT_REPLICATION_FACTOR)
 METADATA_PATH = Path("replication_metadata.json")
-
-def _read_results_rows():
-    if not excel_path.exists():
-        logging.error("results.xlsx not found")
-        return None, []
+METADATA = MetadataCache(METADATA_PATH)   # parsed once; reloaded only when the file changes
+REBALANCE_INTERVAL = 30.0        # seconds between split/merge checks once replicas exist
+REBALANCE_LOCK_WAIT = 2.0        # seconds the layout swap waits for students to leave the chunks
+CHUNK_ACCESS = {}                # chunk -> lock acquisitions since the last rebalance pass
+rebalance_lock = threading.Lock()
+_rebalancer_thread = None
+
+def _read_results_rows(rolls=None):
+    """
+    Return (header, lazy row iterator). Passing rolls pushes the chunk filter
+    down to the results store instead of scanning every row.
+    """
     try:
-        wb = load_workbook(excel_path)
-        ws = wb.active
-        header = [c for c in next(ws.iter_rows(min_row=1, max_row=1, values_only=True))]
-        rows = [tuple(r) for r in ws.iter_rows(min_row=2, values_only=True)]
-        return header, rows
+        RESULTS.row_count()  # loads the store (and its header) if needed
+        return list(RESULTS.header), RESULTS.iter_rows(rolls)
     except Exception as e:
         logging.error(f"Error reading results.xlsx: {e}")
-        return None, []
+        return None, iter(())
 
-def _filter_rows_for_rolls(rows, rolls):
-    rolls_set = set(str(r) for r in rolls)
-    return [r for r in rows if str(r[0]) in rolls_set]
-
-def _write_chunk_excel(filepath, header, rows):
+def _write_chunk_bytes(filepath, data):
+    """Write an already-serialized chunk (see serialize_rows) to one replica file."""
     try:
-        wb = Workbook()
-        ws = wb.active
-        ws.append(header)
-        for r in rows:
-            ws.append(list(r))
-        wb.save(filepath)
+        write_bytes_atomic(filepath, data)
         logging.info(f"✅ Wrote chunk file: {filepath}")
         return True
     except Exception as e:
         logging.error(f"Failed writing chunk file {filepath}: {e}")
         return False
 
-def create_replicas_and_chunks(replication_factor=DEFAULT_REPLICATION_FACTOR, chunk_map=DEFAULT_CHUNK_MAP):
+def _load_replication_metadata():
+    """Mutable copy of the metadata for read-modify-save; readers use METADATA.get()."""
+    return METADATA.get().thaw()
+
+def _save_replication_metadata(meta):
+    METADATA.save(meta)
+
+def _next_replica_version(chunk, meta, paths):
+    """Next change-record version for chunk (monotonic across compactions and restarts)."""
+    with replica_version_lock:
+        if chunk not in REPLICA_VERSIONS:
+            base = meta.get("chunks", {}).get(chunk, {}).get("version", 0)
+            REPLICA_VERSIONS[chunk] = max([base] + [REPLICA_LOG.last_version(p) for p in paths])
+        REPLICA_VERSIONS[chunk] += 1
+        return REPLICA_VERSIONS[chunk]
+
+def compact_replica_logs(chunk=None):
+    """Fold pending change records into the replica workbooks (all chunks, or just chunk)."""
+    try:
+        meta = _load_replication_metadata()
+    except Exception as e:
+        logging.error(f"[Replica] Cannot compact, metadata unreadable: {e}")
+        return
+    compacted = False
+    for replica_id, chunks in meta.get("replicas", {}).items():
+        for chunk_id, info in chunks.items():
+            if chunk is not None and chunk_id != chunk:
+                continue
+            try:
+                rolls = REPLICA_LOG.compact(info["path"])
+            except Exception as e:
+                logging.error(f"[Replica] Compaction of {info['path']} failed: {e}")
+                continue
+            if rolls is not None:
+                compacted = True
+    if compacted:
+        with replica_version_lock:
+            for chunk_id, version in REPLICA_VERSIONS.items():
+                if chunk_id in meta.get("chunks", {}):
+                    meta["chunks"][chunk_id]["version"] = version
+        _save_replication_metadata(meta)
+
+
+atexit.register(compact_replica_logs)
+
+def create_replicas_and_chunks(replication_factor=DEFAULT_REPLICATION_FACTOR, chunk_map=None):
+    global PLACEMENT
+    flush_results("replica creation")
     header, rows = _read_results_rows()
     if header is None:
         flash("❌ results.xlsx not found or unreadable.", "backup")
         return False
 
+    placement = PLACEMENT
+    if placement.replication_factor != replication_factor:
+        placement = placement.with_replication(replication_factor)
+    if chunk_map is None:
+        chunk_map = placement.chunk_map(str(r[0]) for r in rows)
+
     meta = {
         "created_at": datetime.datetime.now().isoformat(),
         "replication_factor": replication_factor,
+        "placement": placement.to_dict(),
         "chunks": {},
         "replicas": {}
     }
 
-    # Prepare chunks
-    chunk_contents = {}
+    for replica_id in placement.replicas:
+        meta["replicas"][replica_id] = {}
+
+    # Serialize each chunk once (streaming) and write the same bytes to every replica
     for chunk_id, rolls in chunk_map.items():
-        selected = _filter_rows_for_rolls(rows, rolls)
-        chunk_contents[chunk_id] = selected
-        meta["chunks"][chunk_id] = {"rolls": rolls, "count": len(selected)}
-
-    # Create replicas
-    for r_idx in range(1, replication_factor + 1):
-        replica_key = f"replica_{r_idx}"
-        meta["replicas"][replica_key] = {}
-        for chunk_id, content_rows in chunk_contents.items():
-            filename = f"replica_{r_idx}_{chunk_id}.xlsx"
-            path = Path(filename).resolve()
-            ok = _write_chunk_excel(path, header, content_rows)
-            meta["replicas"][replica_key][chunk_id] = {
+        _, chunk_rows = _read_results_rows(rolls)
+        data, chunk_rolls = serialize_rows(header, chunk_rows)
+        meta["chunks"][chunk_id] = {"rolls": rolls, "count": len(chunk_rolls), "version": 0}
+        with replica_version_lock:
+            REPLICA_VERSIONS[chunk_id] = 0
+        paths = {replica_id: Path(f"{replica_id}_{chunk_id}.xlsx").resolve()
+                 for replica_id in placement.replicas_for_chunk(chunk_id)}
+        for path in paths.values():
+            REPLICA_LOG.discard(path)
+        # all replicas of the chunk are written concurrently; creation waits for every one
+        fan_out({path: (lambda p=path, d=data: _write_chunk_bytes(p, d)) for path in paths.values()},
+                policy="all")
+        for replica_id, path in paths.items():
+            meta["replicas"][replica_id][chunk_id] = {
                 "path": str(path),
-                "rows": len(content_rows)
+                "rows": len(chunk_rolls)
             }
 
     # Save metadata
-    with open(METADATA_PATH, "w", encoding="utf-8") as fh:
-        json.dump(meta, fh, indent=2)
+    _save_replication_metadata(meta)
+    PLACEMENT = placement
     flash("✅ Replicas and chunks created successfully!", "main")
     logging.info(f"Replication metadata written to {METADATA_PATH}")
 
@@ -238,11 +325,12 @@ def create_replicas_and_chunks(replication_factor=DEFAULT_REPLICATION_FACTOR, ch
         init_chunk_locks()
     except Exception:
         logging.exception("Failed to initialize chunk locks after replica creation")
+    start_rebalancer()
 
     return True
 
 
-def process_submission(roll, answers):
+def process_submission(roll, score=None):
     global MAIN_PROCESSED, BACKUP_PROCESSED, SERVER_LOGS
 
     # --- Try to use Main Server first ---
@@ -258,12 +346,9 @@ def process_submission(roll, answers):
             BACKUP_PROCESSED += 1
         log_msg = f"⚠️ Backup server handled Student {roll}'s submission!"
 
-    # --- Perform grading ---
-    score = grade_mcq(answers)
-    if STUDENTS[roll]["status"] == "warning":
-        score = int(score * 0.5)
-    elif STUDENTS[roll]["status"] == "terminated":
-        score = 0
+    # --- Perform grading (skipped when the caller already graded the cohort) ---
+    if score is None:
+        score = grade_cohort([roll])[roll]
 
     STUDENTS[roll]["marks"] = score
     update_excel(roll, score)
@@ -321,68 +406,29 @@ def run_berkeley_sync():
 
 # ------------------ CONSISTENCY: ChunkLock + helpers ------------------
 
-class ChunkLock:
-    """Readers-writers lock with writer-preference for a single chunk id."""
-    def __init__(self, chunk_id):
-        self.chunk_id = chunk_id
-        self.readers = 0
-        self.writer_active = False
-        self.waiting_writers = 0
-        self.condition = threading.Condition()
-
-    def acquire_read(self, roll=None):
-        with self.condition:
-            while self.writer_active or self.waiting_writers > 0:
-                self.condition.wait()
-            self.readers += 1
-            logging.info(f"[Lock] Roll {roll} acquired READ lock on {self.chunk_id} (readers={self.readers})")
-
-    def release_read(self, roll=None):
-        with self.condition:
-            if self.readers <= 0:
-                logging.warning(f"[Lock] Roll {roll} attempted to release READ lock on {self.chunk_id} but readers==0")
-                return
-            self.readers -= 1
-            logging.info(f"[Lock] Roll {roll} released READ lock on {self.chunk_id} (readers={self.readers})")
-            if self.readers == 0:
-                self.condition.notify_all()
-
-    def acquire_write(self, roll=None):
-        with self.condition:
-            self.waiting_writers += 1
-            try:
-                while self.writer_active or self.readers > 0:
-                    self.condition.wait()
-                self.writer_active = True
-                logging.info(f"[Lock] Roll {roll} acquired WRITE lock on {self.chunk_id}")
-            finally:
-                self.waiting_writers -= 1
-
-    def release_write(self, roll=None):
-        with self.condition:
-            if not self.writer_active:
-                logging.warning(f"[Lock] Roll {roll} attempted to release WRITE lock on {self.chunk_id} but writer_active==False")
-                return
-            self.writer_active = False
-            logging.info(f"[Lock] Roll {roll} released WRITE lock on {self.chunk_id}")
-            self.condition.notify_all()
+# ChunkLock (server_logic/chunk_lock.py) grants leases owned by the student's roll;
+# the read/write pages renew them while open, so a closed tab frees its chunk
+# after LOCK_LEASE_SECONDS.
+LOCK_RENEW_MS = int(LOCK_LEASE_SECONDS * 1000 / 3)
 
 
 def init_chunk_locks():
     """Initialize CHUNK_LOCKS from replication_metadata.json if present."""
-    global replication_metadata, CHUNK_LOCKS
+    global replication_metadata, CHUNK_LOCKS, PLACEMENT
     if not METADATA_PATH.exists():
         logging.info("No replication metadata found to initialize chunk locks.")
         return
 
     try:
-        with open(METADATA_PATH, "r", encoding="utf-8") as fh:
-            replication_metadata = json.load(fh)
+        replication_metadata = _load_replication_metadata()
     except Exception as e:
         logging.error(f"Failed to load replication metadata: {e}")
         replication_metadata = {}
         return
 
+    # keep routing rolls the way the replica files on disk were laid out
+    PLACEMENT = ChunkPlacement.from_dict(replication_metadata.get("placement"), PLACEMENT)
+
     CHUNK_LOCKS = {}
     # create locks for replica:chunk and chunk
     for replica_id, chunks in replication_metadata.get("replicas", {}).items():
@@ -393,101 +439,244 @@ def init_chunk_locks():
                 CHUNK_LOCKS[chunk_id] = ChunkLock(chunk_id)
 
     logging.info(f"[LockManager] Initialized {len(CHUNK_LOCKS)} chunk locks from replication metadata.")
+    start_lease_reaper(lambda: list(CHUNK_LOCKS.values()) + list(STRIPED_LOCKS))
 
 
 def get_chunk_for_roll(roll):
-    """Return chunk id for a given roll using DEFAULT_CHUNK_MAP (mirror of terminal server)."""
-    for chunk_id, rolls in DEFAULT_CHUNK_MAP.items():
-        if str(roll) in rolls:
-            return chunk_id
-    return None
+    """Return chunk id for a given roll from the consistent-hash placement (mirror of terminal server)."""
+    return PLACEMENT.chunk_for_roll(roll)
 
-def _get_replica_ids_for_chunk(chunk_id):
-    """Return list of replica ids (like 'replica_1') that have this chunk from replication_metadata (if available)."""
-    reps = []
+def _metadata_snapshot():
     try:
-        if METADATA_PATH.exists():
-            with open(METADATA_PATH, "r", encoding="utf-8") as fh:
-                meta = json.load(fh)
-            for replica_id, chunks in meta.get("replicas", {}).items():
-                if chunk_id in chunks:
-                    reps.append(replica_id)
+        return METADATA.get()
     except Exception as e:
-        logging.exception(f"Error reading replication metadata for replicas of {chunk_id}: {e}")
-    # fallback if metadata missing: create synthetic replica ids to match default factor
-    if not reps:
-        for i in range(1, DEFAULT_REPLICATION_FACTOR + 1):
-            reps.append(f"replica_{i}")
-    return sorted(reps)
+        logging.exception(f"Error reading replication metadata: {e}")
+        return None
+
+def _get_replica_ids_for_chunk(chunk_id):
+    """Return list of replica ids (like 'replica_1') that have this chunk from replication_metadata (if available)."""
+    snap = _metadata_snapshot()
+    reps = snap.replicas_by_chunk.get(chunk_id) if snap is not None else None
+    # fallback if metadata missing: the replicas the placement would assign
+    return list(reps) if reps else sorted(PLACEMENT.replicas_for_chunk(chunk_id))
 
 def _sorted_lock_keys_for_chunk(chunk_id):
-    """Return stable sorted list of CHUNK_LOCKS keys to acquire for a chunk (replica:chunk entries)."""
-    reps = _get_replica_ids_for_chunk(chunk_id)
-    keys = [f"{rep}:{chunk_id}" for rep in reps]
-    # also include the logical chunk id as a lock key (keeps compatibility)
-    keys.append(chunk_id)
-    # return deterministic order
-    return sorted(keys)
+    """Return the stable sorted CHUNK_LOCKS keys to acquire for a chunk (replica:chunk entries + chunk id)."""
+    snap = _metadata_snapshot()
+    keys = snap.lock_keys.get(chunk_id) if snap is not None else None
+    if keys:
+        return keys  # precomputed with the snapshot
+    return tuple(sorted([f"{rep}:{chunk_id}" for rep in PLACEMENT.replicas_for_chunk(chunk_id)] + [chunk_id]))
 
-def acquire_read_lock(chunk_id, roll):
-    """Acquire read lock on all replica locks for chunk_id (in deterministic order)."""
-    keys = _sorted_lock_keys_for_chunk(chunk_id)
-    for k in keys:
+def _note_access(chunk_id):
+    CHUNK_ACCESS[chunk_id] = CHUNK_ACCESS.get(chunk_id, 0) + 1
+
+def _student_locks(chunk_id):
+    """
+    Locks a student read/write of chunk_id takes, in acquisition order: the
+    chunk's stripe (LOCK_MODE=chunk) or every replica lock plus the chunk lock.
+    """
+    if LOCK_MODE == "chunk":
+        return [STRIPED_LOCKS.for_chunk(chunk_id)]
+    locks = []
+    for k in _sorted_lock_keys_for_chunk(chunk_id):
         if k not in CHUNK_LOCKS:
             CHUNK_LOCKS[k] = ChunkLock(k)
-        CHUNK_LOCKS[k].acquire_read(roll)
+        locks.append(CHUNK_LOCKS[k])
+    return locks
+
+def acquire_read_lock(chunk_id, roll):
+    """Acquire read lock on every lock of chunk_id (see _student_locks)."""
+    _note_access(chunk_id)
+    for lock in _student_locks(chunk_id):
+        lock.acquire_read(roll)
 
 def release_read_lock(chunk_id, roll):
-    keys = _sorted_lock_keys_for_chunk(chunk_id)
-    for k in keys:
-        if k in CHUNK_LOCKS:
-            CHUNK_LOCKS[k].release_read(roll)
+    for lock in _student_locks(chunk_id):
+        lock.release_read(roll)
 
 def acquire_write_lock(chunk_id, roll):
-    """Acquire write lock on all replica locks for chunk_id (in deterministic order)."""
-    keys = _sorted_lock_keys_for_chunk(chunk_id)
-    for k in keys:
-        if k not in CHUNK_LOCKS:
-            CHUNK_LOCKS[k] = ChunkLock(k)
-        CHUNK_LOCKS[k].acquire_write(roll)
+    """Acquire write lock on every lock of chunk_id (see _student_locks)."""
+    _note_access(chunk_id)
+    for lock in _student_locks(chunk_id):
+        lock.acquire_write(roll)
 
 def release_write_lock(chunk_id, roll):
-    keys = _sorted_lock_keys_for_chunk(chunk_id)
-    for k in keys:
-        if k in CHUNK_LOCKS:
-            CHUNK_LOCKS[k].release_write(roll)
+    PENDING_WRITES.settle(chunk_id)
+    for lock in _student_locks(chunk_id):
+        lock.release_write(roll)
 
-def try_acquire_write_lock(chunk_id, roll):
+def try_acquire_write_lock(chunk_id, roll, timeout=0.0):
     """
-    Attempt to acquire a write lock immediately (non-blocking).
-    Returns (True, msg) if successful, else (False, reason).
+    Attempt to acquire every write lock of chunk_id at once: all are granted or
+    none (no partial hold). Non-blocking by default; timeout > 0 waits up to that
+    many seconds. Returns (True, msg) if successful, else (False, reason).
     """
-    keys = _sorted_lock_keys_for_chunk(chunk_id)
-    for k in keys:
-        if k not in CHUNK_LOCKS:
-            CHUNK_LOCKS[k] = ChunkLock(k)
-        lock = CHUNK_LOCKS[k]
-        with lock.condition:
-            if lock.writer_active:
-                return False, "being written by another student"
-            if lock.readers > 0:
-                return False, "being read by other students"
-        # No active readers/writers → acquire
-        lock.writer_active = True
-        logging.info(f"[Lock] Roll {roll} non-blocking acquired WRITE lock on {k}")
-    return True, "acquired"
+    _note_access(chunk_id)
+    ok, _, reason = acquire_write_all(_student_locks(chunk_id), roll, timeout=timeout)
+    if ok:
+        return True, "acquired"
+    if reason == BUSY_WRITING:
+        return False, "being written by another student"
+    if reason == BUSY_WRITER_WAITING:
+        return False, "queued for writing by another student"
+    return False, "being read by other students"
+
+def renew_chunk_locks(chunk_id, roll):
+    """Extend roll's leases on every lock of chunk_id; False if any already expired."""
+    held = [lock.renew(roll) for lock in _student_locks(chunk_id)]
+    return bool(held) and all(held)
+
+
+# ------------------ CHUNK REBALANCING ------------------
+def _chunk_stats(meta):
+    """leaf chunk -> rows / bytes (largest replica file) / accesses since the last pass."""
+    stats = {}
+    for chunk_id, info in meta.get("chunks", {}).items():
+        stats[chunk_id] = {"rows": info.get("count", 0), "bytes": 0, "accesses": CHUNK_ACCESS.pop(chunk_id, 0)}
+    for chunks in meta.get("replicas", {}).values():
+        for chunk_id, info in chunks.items():
+            try:
+                size = Path(info["path"]).stat().st_size
+            except OSError:
+                continue
+            st = stats.setdefault(chunk_id, {"rows": 0, "bytes": 0, "accesses": 0})
+            st["bytes"] = max(st["bytes"], size)
+    return stats
+
+def _build_chunk_files(placement, chunk_ids):
+    """Write replica files for chunk_ids under placement from the master results; returns meta entries."""
+    header, rows = _read_results_rows()
+    if header is None:
+        raise RuntimeError("results unavailable")
+    by_chunk = placement.chunk_map(str(r[0]) for r in rows)
+    chunks, replicas = {}, {}
+    for chunk_id in chunk_ids:
+        rolls = by_chunk.get(chunk_id, [])
+        _, chunk_rows = _read_results_rows(rolls)
+        data, chunk_rolls = serialize_rows(header, chunk_rows)
+        chunks[chunk_id] = {"rolls": rolls, "count": len(chunk_rolls), "version": 0}
+        paths = {rid: Path(f"{rid}_{chunk_id}.xlsx").resolve() for rid in placement.replicas_for_chunk(chunk_id)}
+        acked, _ = fan_out({p: (lambda p=p, d=data: _write_chunk_bytes(p, d)) for p in paths.values()},
+                           policy="all")
+        if not acked:
+            raise RuntimeError(f"could not write every replica of {chunk_id}")
+        for rid, path in paths.items():
+            REPLICA_LOG.discard(path)
+            replicas.setdefault(rid, {})[chunk_id] = {"path": str(path), "rows": len(chunk_rolls)}
+    return chunks, replicas
+
+def _try_hold_chunks(chunk_ids):
+    """Write-lock every lock of chunk_ids for the rebalancer, all at once (bounded wait); None if they stay busy."""
+    # per-replica locks are maintenance-only in LOCK_MODE=chunk, so students are kept out by the stripes
+    locks = STRIPED_LOCKS.for_chunks(chunk_ids) if LOCK_MODE == "chunk" else []
+    for chunk_id in chunk_ids:
+        locks += [CHUNK_LOCKS[k] for k in _sorted_lock_keys_for_chunk(chunk_id) if k in CHUNK_LOCKS]
+    ok, _, _ = acquire_write_all(locks, "rebalancer", timeout=REBALANCE_LOCK_WAIT, expires=False)
+    if not ok:
+        return None
+    for chunk_id in chunk_ids:
+        PENDING_WRITES.settle(chunk_id)
+    return locks
+
+def _release_held(locks):
+    for lock in locks:
+        lock.release_write("rebalancer")
+
+def rebalance_chunks():
+    """
+    Split chunks that outgrew REBALANCE_SPLIT_ROWS / _BYTES and merge cold small
+    split children. New chunk files are written while reads keep using the old
+    layout; metadata, PLACEMENT and CHUNK_LOCKS are then swapped together while
+    no student holds a lock on the affected chunks. Returns True if the layout changed.
+    """
+    global PLACEMENT, CHUNK_LOCKS, replication_metadata
+    with rebalance_lock:
+        try:
+            meta = _load_replication_metadata()
+        except Exception as e:
+            logging.error(f"[Rebalance] Metadata unreadable: {e}")
+            return False
+        if not meta.get("replicas"):
+            return False
+        actions = plan_rebalance(PLACEMENT, _chunk_stats(meta))
+        if not actions:
+            return False
+        placement, retired, created = apply_plan(PLACEMENT, actions)
+        logging.info(f"[Rebalance] {actions}: {retired} -> {created}")
+
+        # 1) migrate: copy the rows of the new chunks (reads still go through the old layout)
+        version = RESULTS.version
+        try:
+            chunks, replicas = _build_chunk_files(placement, created)
+        except Exception as e:
+            logging.error(f"[Rebalance] Migration failed, keeping the old layout: {e}")
+            return False
+
+        # 2) swap while nobody holds the old chunks
+        held = _try_hold_chunks(retired)
+        if held is None:
+            logging.info(f"[Rebalance] {retired} busy; retrying on the next pass")
+            return False
+        try:
+            if RESULTS.version != version:
+                # writes landed during the copy: re-copy the new chunks (cheap, master is in memory)
+                chunks, replicas = _build_chunk_files(placement, created)
+            old_paths = [Path(info["path"]) for reps in meta["replicas"].values()
+                         for cid, info in reps.items() if cid in retired]
+            for cid in retired:
+                meta["chunks"].pop(cid, None)
+            for reps in meta["replicas"].values():
+                for cid in retired:
+                    reps.pop(cid, None)
+            meta["chunks"].update(chunks)
+            for rid, entries in replicas.items():
+                meta["replicas"].setdefault(rid, {}).update(entries)
+            meta["placement"] = placement.to_dict()
+            _save_replication_metadata(meta)
+
+            locks = {k: v for k, v in CHUNK_LOCKS.items() if k.rsplit(":", 1)[-1] not in retired}
+            for rid, entries in replicas.items():
+                for cid in entries:
+                    locks.setdefault(f"{rid}:{cid}", ChunkLock(f"{rid}:{cid}"))
+                    locks.setdefault(cid, ChunkLock(cid))
+            with replica_version_lock:
+                for cid in retired:
+                    REPLICA_VERSIONS.pop(cid, None)
+                for cid in created:
+                    REPLICA_VERSIONS[cid] = 0
+            replication_metadata, PLACEMENT, CHUNK_LOCKS = meta, placement, locks
+        finally:
+            _release_held(held)
+
+        for path in old_paths:
+            REPLICA_LOG.discard(path)
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        logging.info(f"[Rebalance] Layout swapped; chunks now {placement.chunks}")
+        return True
+
+def _rebalancer_loop():
+    while True:
+        time.sleep(REBALANCE_INTERVAL)
+        try:
+            rebalance_chunks()
+        except Exception:
+            logging.exception("[Rebalance] Pass failed")
+
+def start_rebalancer():
+    global _rebalancer_thread
+    if _rebalancer_thread is None or not _rebalancer_thread.is_alive():
+        _rebalancer_thread = threading.Thread(target=_rebalancer_loop, daemon=True, name="chunk-rebalancer")
+        _rebalancer_thread.start()
 
 
 def get_marks_from_results(roll):
     """Return ISA marks (or full row) for roll from results.xlsx"""
-    header, rows = _read_results_rows()
-    if header is None:
-        return None
-    for r in rows:
-        if str(r[0]) == str(roll):
-            # r may be (roll, name, marks, mcq, isa) or similar; we return row as tuple
-            return r
-    return None
+    # r may be (roll, name, marks, mcq, isa) or similar; we return row as tuple
+    return RESULTS_CACHE.get(roll)
 
 def update_chunk_marks_for_chunk_and_replicas(roll, new_marks):
     """
@@ -499,55 +688,32 @@ def update_chunk_marks_for_chunk_and_replicas(roll, new_marks):
         logging.error(f"No chunk found for roll {roll} during update_chunk_marks.")
         return False
 
-    # Update master
+    # Update master (in-memory table; flushed to results.xlsx by the write-behind flusher)
     try:
-        with exam_lock:
-            if not excel_path.exists():
-                wb = Workbook()
-                ws = wb.active
-                ws.append(["Roll", "Name", "Marks/MCQ", "ISA"])
-                wb.save(excel_path)
-
-            wb = load_workbook(excel_path)
-            ws = wb.active
-            updated = False
-            for row in ws.iter_rows(min_row=2):
-                if str(row[0].value) == roll:
-                    # find ISA column index; assume last column is ISA if present
-                    isa_col = 5 if ws.max_column >= 5 else ws.max_column
-                    # ensure we have 5 columns
-                    while ws.max_column < 5:
-                        ws.cell(row=1, column=ws.max_column+1, value=None)
-                    ws.cell(row=row[0].row, column=4, value=int(new_marks))
-                    updated = True
-                    break
-            if not updated:
-                ws.append([roll, STUDENTS.get(roll, {}).get("name", f"Student{roll}"), "NA", "NA", int(new_marks)])
-            wb.save(excel_path)
+        name = STUDENTS.get(roll, {}).get("name", f"Student{roll}")
+        RESULTS.update(roll, {4: int(new_marks)}, [roll, name, "NA", int(new_marks)])
     except Exception as e:
-        logging.exception(f"Error updating master excel for roll {roll}: {e}")
-        return False
-
-    # Read master rows to propagate
-    header, rows = _read_results_rows()
-    if header is None:
-        logging.error("Master file disappeared after update.")
+        logging.exception(f"Error updating master results for roll {roll}: {e}")
         return False
 
-    # Update each replica file for the chunk
+    # Ship the changed cell to each replica as a change record (delta replication);
+    # replica workbooks are only rewritten when their patch log is compacted
     try:
-        if METADATA_PATH.exists():
-            with open(METADATA_PATH, "r", encoding="utf-8") as fh:
-                meta = json.load(fh)
-        else:
-            meta = {}
-        for replica_id, chunks in meta.get("replicas", {}).items():
-            if chunk in chunks:
-                path = Path(chunks[chunk]["path"])
-                # filter rows for this chunk's rolls
-                rolls_list = DEFAULT_CHUNK_MAP.get(chunk, [])
-                selected = _filter_rows_for_rolls(rows, rolls_list)
-                _write_chunk_excel(path, header, selected)
+        PENDING_WRITES.settle(chunk)  # appends of a writer whose lease ran out may still be landing
+        snap = METADATA.get()
+        paths = snap.paths_by_chunk.get(chunk, ())
+        record = change(roll, 4, int(new_marks), _next_replica_version(chunk, snap.meta, paths))
+        # concurrent appends; the REPLICA_ACK policy (all / majority / first) decides success,
+        # the rest finish before release_write_lock lets the next writer in
+        late = []
+        acked, _ = fan_out({path: (lambda p=path: REPLICA_LOG.append(p, [record]) > 0) for path in paths},
+                           stragglers=late)
+        PENDING_WRITES.add(chunk, late)
+        if not acked:
+            logging.error(f"[Replica] Change for roll {roll} not acknowledged by enough replicas of {chunk}")
+        if any(REPLICA_LOG.needs_compaction(p) for p in paths):
+            PENDING_WRITES.settle(chunk)
+            compact_replica_logs(chunk)
     except Exception as e:
         logging.exception(f"Error updating replicas for chunk {chunk}: {e}")
         # even on failure we consider master updated; propagate attempts logged
@@ -639,6 +805,7 @@ def exam_status():
 def start_isa():
     global ISA_PHASE
     ISA_PHASE = True
+    flush_results("ISA start")
     logging.info("🚀 ISA Phase started")
     return redirect(url_for("admin_panel"))
 
@@ -696,6 +863,10 @@ def isa_request(roll):
 def release_results():
     global RESULTS_RELEASED
     RESULTS_RELEASED = True
+    try:
+        RESULTS.export_xlsx(excel_path)
+    except Exception as e:
+        logging.error(f"[Results] Export at results release failed: {e}")
     logging.info("✅ Results released")
     return redirect(url_for("admin_panel"))
 
@@ -808,8 +979,7 @@ def student_exam(roll, qid):
     if request.method == "POST":
         ans = request.form.get("answer")
         if ans is not None:
-            # store as string; key is qid (int)
-            LIVE_ANSWERS.setdefault(roll, {})[qid] = ans
+            LIVE_ANSWERS.record(roll, qid, ans)
 
         # Navigation
         if "next" in request.form and qid < len(MCQ_QUESTIONS):
@@ -818,15 +988,14 @@ def student_exam(roll, qid):
             return redirect(url_for("student_exam", roll=roll, qid=qid-1))
         elif "submit" in request.form:
             # Final submit -> use process_submission so main/backup logic applies
-            answers = LIVE_ANSWERS.get(roll, {})
-            score, server_used = process_submission(roll, answers)
+            score, server_used = process_submission(roll)
             logging.info(f"✅ Student {roll} submitted with score {score} via {server_used.upper()} server (status={STUDENTS[roll]['status']})")
             return redirect(url_for("student_portal", roll=roll))
 
     # For GET: determine navigation, selected option from LIVE_ANSWERS
     prev_qid = qid - 1 if qid > 1 else None
     next_qid = qid + 1 if qid < len(MCQ_QUESTIONS) else None
-    selected = LIVE_ANSWERS.get(roll, {}).get(qid)
+    selected = LIVE_ANSWERS.get(roll, qid)
 
     # Remaining time safety (0 if no EXAM_END_TIME)
     remaining = int((EXAM_END_TIME - now).total_seconds()) if EXAM_END_TIME else 0
@@ -934,7 +1103,7 @@ def isa_submit(roll):
                 logging.info(f"🚪 Student {sid} re-evaluated and now enters CS")
 
     # ✅ Check if ISA phase completed for everyone
-    if all(s.get("isa") is not None for s in STUDENTS.values()):
+    if STUDENTS.column("has_isa").all():
         logging.info("✅ ISA phase completed for all students.")
 
     return redirect(url_for("student_portal", roll=roll))
@@ -951,6 +1120,7 @@ def start_consistency():
     # add all registered students (or all STUDENTS) to active demo
     ACTIVE_CONSISTENCY = set(str(r) for r in STUDENTS.keys())
     CONSISTENCY_HELD = {}
+    flush_results("consistency demo start")
     logging.info("🧩 Consistency demo started by Admin; prompting all students.")
     flash("🧩 Consistency demo started — students will see the prompt.", "main")
     return redirect(url_for("admin_panel"))
@@ -964,14 +1134,11 @@ def consistency_read(roll):
         return redirect(url_for("student_portal", roll=roll))
 
     chunk = get_chunk_for_roll(roll)
-    keys = _sorted_lock_keys_for_chunk(chunk)
 
     # Check for active writer
-    for k in keys:
-        if k not in CHUNK_LOCKS:
-            CHUNK_LOCKS[k] = ChunkLock(k)
-        lock = CHUNK_LOCKS[k]
+    for lock in _student_locks(chunk):
         with lock.condition:
+            lock.reap()  # an expired writer no longer blocks readers
             if lock.writer_active:
                 logging.info(f"[Lock] Roll {roll} waiting — writer active on {chunk}")
                 return render_template(
@@ -989,17 +1156,13 @@ def consistency_read(roll):
     # Fetch marks
     marks = "N/A"
     try:
-        wb = load_workbook("results.xlsx")
-        ws = wb.active
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            if str(row[0]) == str(roll):
-                marks = row[3] if len(row) > 3 else "N/A"
-                break
-        wb.close()
+        row = RESULTS_CACHE.get(roll)
+        if row is not None:
+            marks = row[3] if len(row) > 3 else "N/A"
     except Exception as e:
         logging.error(f"[Error] Could not fetch marks for {roll}: {e}")
 
-    return render_template("consistency_read.html", roll=roll, marks=marks, chunk=chunk)
+    return render_template("consistency_read.html", roll=roll, marks=marks, chunk=chunk, renew_ms=LOCK_RENEW_MS)
 
 
 @app.route("/student/<roll>/consistency/write", methods=["GET", "POST"])
@@ -1027,19 +1190,23 @@ def consistency_write(roll):
 
         marks = "N/A"
         try:
-            wb = load_workbook("results.xlsx")
-            ws = wb.active
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if str(row[0]) == str(roll):
-                    marks = row[3] if len(row) > 3 else "N/A"
-                    break
-            wb.close()
+            row = RESULTS_CACHE.get(roll)
+            if row is not None:
+                marks = row[3] if len(row) > 3 else "N/A"
         except Exception as e:
             logging.error(f"[Error] Fetching marks for write {roll}: {e}")
 
-        return render_template("consistency_write.html", roll=roll, marks=marks, chunk=chunk)
+        return render_template("consistency_write.html", roll=roll, marks=marks, chunk=chunk, renew_ms=LOCK_RENEW_MS)
 
     # ---------- POST: update marks & release lock ----------
+    if not renew_chunk_locks(chunk, roll):
+        # the lease ran out (page left idle / closed) and may already belong to someone else
+        release_write_lock(chunk, roll)
+        CONSISTENCY_HELD.pop(roll, None)
+        logging.info(f"[Lock] Roll {roll} posted marks after its WRITE lease on {chunk} expired")
+        flash("⌛ Your write lock expired; open Write again to change marks.", "error")
+        return render_template("consistency_prompt.html", roll=roll)
+
     new_marks = int(request.form["isa_marks"])
     try:
         update_chunk_marks_for_chunk_and_replicas(roll, new_marks)
@@ -1075,6 +1242,16 @@ def consistency_exit_cs(roll):
     return redirect(url_for("student_portal", roll=roll))
 
 
+@app.route("/student/<roll>/consistency/renew", methods=["POST"])
+def consistency_renew(roll):
+    """Lease heartbeat from an open read/write page."""
+    roll = str(roll)
+    held = roll in CONSISTENCY_HELD and renew_chunk_locks(get_chunk_for_roll(roll), roll)
+    if roll in CONSISTENCY_HELD and not held:
+        CONSISTENCY_HELD.pop(roll, None)
+    return {"held": bool(held)}
+
+
 @app.route("/student/<roll>/consistency/exit_demo")
 def consistency_exit_demo(roll):
     """Remove student from the active consistency demo and return to waiting screen."""
@@ -1102,6 +1279,8 @@ if __name__ == "__main__":
     # Try to initialize chunk locks at startup (if metadata is present)
     try:
         init_chunk_locks()
+        if METADATA_PATH.exists():
+            start_rebalancer()
     except Exception:
         logging.info("No replication metadata at startup or failed to init locks.")
     app.run(debug=True)
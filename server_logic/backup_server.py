@@ -7,6 +7,8 @@ from xmlrpc.server import SimpleXMLRPCServer
 from socketserver import ThreadingMixIn
 import logging
 
+from grading import answer_key, answer_matrix, grade_batch
+
 # ---------------- CONFIG ----------------
 BACKUP_HOST = "127.0.0.1"
 BACKUP_PORT = 9003
@@ -58,6 +60,12 @@ MCQ_QUESTIONS = {
     9: {"answer": 3},  # Server
     10: {"answer": 2}, # heap
 }
+MCQ_QIDS, MCQ_KEY = answer_key(MCQ_QUESTIONS)
+MCQ_PENALTIES = {"warning": 0.8, "terminated": 0.0}   # 1 flag -> 80%, 2+ flags -> 0
+
+
+def _status_for_flags(flags: int) -> str:
+    return "terminated" if flags >= 2 else "warning" if flags == 1 else "normal"
 
 # ---------------- BACKUP LOGIC ----------------
 def submit_mcq_final(roll: str, answers: dict):
@@ -73,21 +81,9 @@ def submit_mcq_final(roll: str, answers: dict):
             logger.info(f"[Backup] roll={roll} already processed here; ignoring.")
             return True
 
-        raw = 0
-        # Convert string keys from XML-RPC back to int for grading
-        for qnum_str, given in answers.items():
-            qnum = int(qnum_str)
-            if qnum in MCQ_QUESTIONS and int(given) == MCQ_QUESTIONS[qnum]["answer"]:
-                raw += 10
-
-        # Apply cheating penalties
-        flags = student_flags.get(roll, 0)
-        if flags >= 2:
-            final = 0
-        elif flags == 1:
-            final = int(raw * 0.8)
-        else:
-            final = raw
+        # Grade (string qnum keys from XML-RPC are handled by answer_matrix) and apply cheating penalties
+        status = _status_for_flags(student_flags.get(roll, 0))
+        final = int(grade_batch(answer_matrix([answers], MCQ_QIDS), MCQ_KEY, [status], MCQ_PENALTIES)[0])
 
         mcq_final_scores[roll] = final
         mcq_submitted_students.add(roll)
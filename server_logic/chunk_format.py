@@ -0,0 +1,222 @@
+# chunk_format.py
+# Fixed-width binary replica chunk files (alternative to xlsx replicas).
+#
+# Layout (little endian):
+#   0   magic b"RCHK"
+#   4   u16 format version
+#   6   u16 reserved
+#   8   u32 schema length (bytes of the JSON schema that follows the header)
+#   12  u32 record size
+#   16  u32 record count
+#   20  u32 CRC32 of bytes 0..19 + schema
+#   24  schema JSON: [["Roll", "s16"], ["Name", "s48"], ["Marks", "i"], ...]
+#   ..  records, each the packed fields followed by a u32 CRC32 of those fields
+#
+# Field types: "s<N>" UTF-8 padded to N bytes, "i" int32, "q" int64. Integer
+# fields reserve two sentinels so empty cells (None) and "NA" round-trip.
+# Every record has the same size, so a row is found by slot, read with one
+# mmap slice and rewritten in place with a single pwrite.
+import os
+import json
+import mmap
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"RCHK"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIII")
+_CRC = struct.Struct("<I")
+
+_NULL = {"i": -2 ** 31, "q": -2 ** 63}
+_NA = {"i": -2 ** 31 + 1, "q": -2 ** 63 + 1}
+
+
+class ChunkFormatError(ValueError):
+    pass
+
+
+def _codes(schema: Sequence[Tuple[str, str]]) -> str:
+    out = "<"
+    for _, kind in schema:
+        if kind.startswith("s"):
+            out += f"{int(kind[1:])}s"
+        elif kind in ("i", "q"):
+            out += kind
+        else:
+            raise ChunkFormatError(f"unknown field type {kind!r}")
+    return out
+
+
+def _encode(kind: str, value) -> Any:
+    if kind.startswith("s"):
+        data = b"" if value is None else str(value).encode("utf-8")
+        width = int(kind[1:])
+        if len(data) > width:
+            data = data[:width].decode("utf-8", "ignore").encode("utf-8")  # never cut a character in half
+        return data
+    if value is None or value == "":
+        return _NULL[kind]
+    if value == "NA":
+        return _NA[kind]
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ChunkFormatError(f"cannot store {value!r} in a {kind} field")
+
+
+def _decode(kind: str, value) -> Any:
+    if kind.startswith("s"):
+        text = value.rstrip(b"\0").decode("utf-8")
+        return text if text else None
+    if value == _NULL[kind]:
+        return None
+    if value == _NA[kind]:
+        return "NA"
+    return value
+
+
+class _Layout:
+    def __init__(self, schema: Sequence[Tuple[str, str]]):
+        self.schema = [(str(n), str(k)) for n, k in schema]
+        self.fields = struct.Struct(_codes(self.schema))
+        self.record_size = self.fields.size + _CRC.size
+
+    def pack(self, row: Sequence) -> bytes:
+        row = list(row)[:len(self.schema)] + [None] * (len(self.schema) - len(row))
+        body = self.fields.pack(*(_encode(k, v) for (_, k), v in zip(self.schema, row)))
+        return body + _CRC.pack(zlib.crc32(body))
+
+    def unpack(self, record: bytes, where: str = "") -> Tuple:
+        body, (crc,) = record[:self.fields.size], _CRC.unpack(record[self.fields.size:])
+        if zlib.crc32(body) != crc:
+            raise ChunkFormatError(f"record checksum mismatch{where}")
+        return tuple(_decode(k, v) for (_, k), v in zip(self.schema, self.fields.unpack(body)))
+
+    def roll_at(self, buf, offset: int) -> str:
+        width = int(self.schema[0][1][1:])
+        return bytes(buf[offset:offset + width]).rstrip(b"\0").decode("utf-8")
+
+
+def serialize_chunk(schema: Sequence[Tuple[str, str]], rows: Iterable) -> Tuple[bytes, List[str]]:
+    """Encode rows (first field = roll, a string field) into a chunk file; returns (bytes, rolls in slot order)."""
+    layout = _Layout(schema)
+    if not layout.schema or not layout.schema[0][1].startswith("s"):
+        raise ChunkFormatError("the first field must be the roll (a string field)")
+    schema_json = json.dumps(layout.schema, separators=(",", ":")).encode("utf-8")
+    records, rolls = [], []
+    for row in rows:
+        records.append(layout.pack(row))
+        rolls.append(str(row[0]))
+    head = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(schema_json), layout.record_size, len(records), 0)[:20]
+    crc = zlib.crc32(head + schema_json)
+    return head + _CRC.pack(crc) + schema_json + b"".join(records), rolls
+
+
+def _read_header(buf) -> Tuple[_Layout, int, int]:
+    """(layout, offset of the first record, record count) after checking magic, version and checksum."""
+    if len(buf) < _HEADER.size:
+        raise ChunkFormatError("truncated chunk header")
+    magic, version, _, schema_len, record_size, count, crc = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ChunkFormatError("not a chunk file")
+    if version != FORMAT_VERSION:
+        raise ChunkFormatError(f"unsupported chunk format version {version}")
+    schema_json = bytes(buf[_HEADER.size:_HEADER.size + schema_len])
+    if zlib.crc32(bytes(buf[:20]) + schema_json) != crc:
+        raise ChunkFormatError("chunk header checksum mismatch")
+    layout = _Layout(json.loads(schema_json))
+    if layout.record_size != record_size:
+        raise ChunkFormatError("record size does not match the schema")
+    data_off = _HEADER.size + schema_len
+    if len(buf) < data_off + count * record_size:
+        raise ChunkFormatError("truncated chunk file")
+    return layout, data_off, count
+
+
+def _find_slot(layout: _Layout, buf, data_off: int, count: int, roll: str, slot_hint: Optional[int]) -> Optional[int]:
+    if slot_hint is not None and 0 <= slot_hint < count \
+            and layout.roll_at(buf, data_off + slot_hint * layout.record_size) == roll:
+        return slot_hint
+    for slot in range(count):
+        if layout.roll_at(buf, data_off + slot * layout.record_size) == roll:
+            return slot
+    return None
+
+
+def read_chunk_header(path) -> List[str]:
+    """Column names of a chunk file."""
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        return [name for name, _ in _read_header(buf)[0].schema]
+
+
+def read_chunk_row(path, roll, slot_hint: Optional[int] = None) -> Optional[Tuple]:
+    """Row for roll via a read-only mmap (one record slice when slot_hint is right), or None."""
+    roll = str(roll)
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        layout, data_off, count = _read_header(buf)
+        slot = _find_slot(layout, buf, data_off, count, roll, slot_hint)
+        if slot is None:
+            return None
+        off = data_off + slot * layout.record_size
+        return layout.unpack(buf[off:off + layout.record_size], f" in {Path(path).name} slot {slot}")
+
+
+def _iter_records(buf, name: str) -> Iterator[Tuple]:
+    layout, data_off, count = _read_header(buf)
+    for slot in range(count):
+        off = data_off + slot * layout.record_size
+        yield layout.unpack(buf[off:off + layout.record_size], f" in {name} slot {slot}")
+
+
+def iter_chunk_rows(path) -> Iterator[Tuple]:
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        yield from _iter_records(buf, Path(path).name)
+
+
+def parse_chunk(data: bytes) -> Iterator[Tuple]:
+    """Rows of a chunk held in memory (e.g. rebuilt from erasure-coded fragments)."""
+    return _iter_records(memoryview(data), "chunk")
+
+
+def chunk_slots(path) -> Dict[str, int]:
+    """roll -> slot for every record (for seeding a row index)."""
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        layout, data_off, count = _read_header(buf)
+        return {layout.roll_at(buf, data_off + s * layout.record_size): s for s in range(count)}
+
+
+def _pwrite(fd: int, data: bytes, offset: int):
+    if hasattr(os, "pwrite"):
+        os.pwrite(fd, data, offset)
+    else:  # Windows: no pwrite; callers hold the chunk's write lock
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+def update_chunk_row(path, roll, values: Dict[int, Any], slot_hint: Optional[int] = None) -> Optional[int]:
+    """
+    Set columns (1-based, as in openpyxl) of roll's record in place: the new
+    record (fields + checksum) is written with one pwrite. Returns the slot, or
+    None if roll is not in the file.
+    """
+    roll = str(roll)
+    fd = os.open(path, os.O_RDWR)
+    try:
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as buf:
+            layout, data_off, count = _read_header(buf)
+            slot = _find_slot(layout, buf, data_off, count, roll, slot_hint)
+            if slot is None:
+                return None
+            off = data_off + slot * layout.record_size
+            row = list(layout.unpack(buf[off:off + layout.record_size], f" in {Path(path).name} slot {slot}"))
+        for column, value in values.items():
+            row[column - 1] = value
+        _pwrite(fd, layout.pack(row), off)
+        os.fsync(fd)
+        return slot
+    finally:
+        os.close(fd)
@@ -0,0 +1,280 @@
+# chunk_lock.py
+# Lease-based readers-writers lock per chunk, shared by app.py and server.py.
+#
+# Every grant is a lease held by an owner id (the student's roll, or a
+# maintenance task name) that runs out LOCK_LEASE_SECONDS after it was granted
+# or last renewed. An owner that disappears without releasing (closed tab,
+# killed terminal) therefore blocks its chunk for at most one lease: expired
+# leases are revoked lazily by the next acquire and by a reaper thread, and
+# revocation wakes every waiter. Maintenance holders may take non-expiring
+# grants (expires=False).
+#
+# LOCK_MODE picks what a student's read or write locks:
+#   "replica" - one ChunkLock per replica of the chunk (plus the chunk id in app.py)
+#   "chunk"   - one lock per logical chunk, taken from a fixed pool of stripes
+#               (StripedLocks); per-replica locks are then only taken by repair,
+#               scrub and rebalance, together with the chunk's stripe.
+#
+# try_acquire_write_all / acquire_write_all take the write lock on several
+# ChunkLocks as one step: every lock is granted or none is, so a busy key never
+# leaves the earlier ones held. A refusal names the busy lock and why it was
+# busy (BUSY_WRITING, BUSY_WRITER_WAITING or BUSY_READING), read while its
+# condition was still held.
+import os
+import time
+import zlib
+import threading
+import logging
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("chunk_lock")
+
+BUSY_WRITING = "writing"                # another owner holds the write lock
+BUSY_WRITER_WAITING = "writer waiting"  # another owner is queued for the write lock
+BUSY_READING = "reading"                # readers hold it
+
+LOCK_LEASE_SECONDS = float(os.environ.get("LOCK_LEASE_SECONDS", "60"))
+LOCK_REAP_INTERVAL = float(os.environ.get("LOCK_REAP_INTERVAL", "2"))
+LOCK_MODE = os.environ.get("LOCK_MODE", "replica").lower()
+LOCK_STRIPES = int(os.environ.get("LOCK_STRIPES", "64"))
+
+_NEVER = float("inf")
+
+
+class ChunkLock:
+    """Readers-writers lock with writer-preference for a single chunk id; grants are leases."""
+    def __init__(self, chunk_id, lease: float = None):
+        self.chunk_id = chunk_id
+        self.lease = LOCK_LEASE_SECONDS if lease is None else float(lease)
+        self.read_leases: Dict[str, List] = {}  # owner -> [grants, expiry]
+        self.writer: Optional[str] = None
+        self.write_expiry = _NEVER
+        self.waiting_writers = 0
+        self.condition = threading.Condition()
+
+    @property
+    def readers(self) -> int:
+        return sum(grants for grants, _ in self.read_leases.values())
+
+    @property
+    def writer_active(self) -> bool:
+        return self.writer is not None
+
+    def _expiry(self, expires: bool) -> float:
+        return time.monotonic() + self.lease if expires and self.lease > 0 else _NEVER
+
+    def _expire(self) -> int:
+        """Revoke leases that ran out (caller holds the condition); wakes waiters. Returns how many."""
+        now = time.monotonic()
+        revoked = 0
+        if self.writer is not None and self.write_expiry <= now:
+            logger.warning(f"[Lock] WRITE lease of {self.writer} on {self.chunk_id} expired; revoked")
+            self.writer, self.write_expiry = None, _NEVER
+            revoked += 1
+        for owner in [o for o, (_, expiry) in self.read_leases.items() if expiry <= now]:
+            grants, _ = self.read_leases.pop(owner)
+            logger.warning(f"[Lock] READ lease of {owner} on {self.chunk_id} expired; revoked {grants} grant(s)")
+            revoked += grants
+        if revoked:
+            self.condition.notify_all()
+        return revoked
+
+    def _wait(self, timeout: float = None):
+        """Wait for a notify, timeout, or until the next lease runs out (then _expire revokes it)."""
+        expiries = [self.write_expiry] + [expiry for _, expiry in self.read_leases.values()]
+        until_expiry = min(expiries) - time.monotonic()
+        if timeout is not None:
+            until_expiry = min(until_expiry, timeout)
+        self.condition.wait(None if until_expiry == _NEVER else max(until_expiry, 0.0))
+        self._expire()
+
+    def _write_blocker(self) -> Optional[str]:
+        """Why a write cannot be granted right now (caller holds the condition), or None."""
+        if self.writer_active:
+            return BUSY_WRITING
+        if self.waiting_writers > 0:
+            return BUSY_WRITER_WAITING
+        if self.readers > 0:
+            return BUSY_READING
+        return None
+
+    def _free_for_write(self) -> bool:
+        return self._write_blocker() is None
+
+    def acquire_read(self, owner=None, expires: bool = True):
+        owner = str(owner)
+        with self.condition:
+            self._expire()
+            while self.writer_active or self.waiting_writers > 0:
+                self._wait()
+            entry = self.read_leases.setdefault(owner, [0, _NEVER])
+            entry[0] += 1
+            entry[1] = self._expiry(expires)
+            logger.info(f"[Lock] Roll {owner} acquired READ lock on {self.chunk_id} (readers={self.readers})")
+
+    def release_read(self, owner=None):
+        owner = str(owner)
+        with self.condition:
+            entry = self.read_leases.get(owner)
+            if entry is None:
+                logger.warning(f"[Lock] Roll {owner} attempted to release READ lock on {self.chunk_id} but holds none")
+                return
+            entry[0] -= 1
+            if entry[0] <= 0:
+                del self.read_leases[owner]
+            logger.info(f"[Lock] Roll {owner} released READ lock on {self.chunk_id} (readers={self.readers})")
+            if not self.read_leases:
+                self.condition.notify_all()
+
+    def acquire_write(self, owner=None, expires: bool = True):
+        owner = str(owner)
+        with self.condition:
+            self._expire()
+            self.waiting_writers += 1
+            try:
+                while self.writer_active or self.readers > 0:
+                    self._wait()
+                self.writer, self.write_expiry = owner, self._expiry(expires)
+                logger.info(f"[Lock] Roll {owner} acquired WRITE lock on {self.chunk_id}")
+            finally:
+                self.waiting_writers -= 1
+
+    def try_acquire_write(self, owner=None, expires: bool = True) -> bool:
+        """Take the write lock only if it is free right now (used by background maintenance)."""
+        owner = str(owner)
+        with self.condition:
+            self._expire()
+            if not self._free_for_write():
+                return False
+            self.writer, self.write_expiry = owner, self._expiry(expires)
+            logger.info(f"[Lock] Roll {owner} acquired WRITE lock on {self.chunk_id}")
+            return True
+
+    def release_write(self, owner=None):
+        owner = str(owner)
+        with self.condition:
+            if self.writer != owner:
+                logger.warning(f"[Lock] Roll {owner} attempted to release WRITE lock on {self.chunk_id} "
+                               f"but the writer is {self.writer}")
+                return
+            self.writer, self.write_expiry = None, _NEVER
+            logger.info(f"[Lock] Roll {owner} released WRITE lock on {self.chunk_id}")
+            self.condition.notify_all()
+
+    def renew(self, owner=None) -> bool:
+        """Extend owner's read and write leases by one lease period; False if owner holds nothing (expired)."""
+        owner = str(owner)
+        with self.condition:
+            self._expire()
+            held = False
+            if self.writer == owner:
+                if self.write_expiry != _NEVER:
+                    self.write_expiry = self._expiry(True)
+                held = True
+            entry = self.read_leases.get(owner)
+            if entry is not None:
+                if entry[1] != _NEVER:
+                    entry[1] = self._expiry(True)
+                held = True
+            return held
+
+    def holds_write(self, owner=None) -> bool:
+        with self.condition:
+            self._expire()
+            return self.writer == str(owner)
+
+    def reap(self) -> int:
+        with self.condition:
+            return self._expire()
+
+
+def try_acquire_write_all(locks: Iterable[ChunkLock], owner=None,
+                          expires: bool = True) -> Tuple[bool, Optional[ChunkLock], Optional[str]]:
+    """
+    Write-lock every lock at once, or none: all their conditions are held while
+    they are checked and granted. Returns (True, None, None), or
+    (False, a busy lock, why it was busy).
+    """
+    owner = str(owner)
+    unique = list({id(lock): lock for lock in locks}.values())
+    with ExitStack() as stack:
+        for lock in sorted(unique, key=id):  # one global order, so concurrent callers cannot deadlock
+            stack.enter_context(lock.condition)
+        for lock in unique:
+            lock._expire()
+        for lock in unique:
+            reason = lock._write_blocker()
+            if reason is not None:
+                return False, lock, reason
+        for lock in unique:
+            lock.writer, lock.write_expiry = owner, lock._expiry(expires)
+    logger.info(f"[Lock] Roll {owner} acquired WRITE lock on {', '.join(lock.chunk_id for lock in unique)}")
+    return True, None, None
+
+
+def acquire_write_all(locks: Iterable[ChunkLock], owner=None, timeout: float = None,
+                      expires: bool = True) -> Tuple[bool, Optional[ChunkLock], Optional[str]]:
+    """
+    Bounded-wait try_acquire_write_all: retry whenever the busy lock is released
+    or a lease on it runs out, for up to timeout seconds (None: no limit).
+    Nothing is held while waiting.
+    """
+    locks = list(locks)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        ok, busy, reason = try_acquire_write_all(locks, owner, expires)
+        if ok:
+            return True, None, None
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return False, busy, reason
+        with busy.condition:
+            if not busy._free_for_write():
+                busy._wait(remaining)
+
+
+class StripedLocks:
+    """
+    Fixed pool of ChunkLocks; a logical chunk id maps to one stripe by a stable
+    hash. Chunks created or retired by a rebalance need no lock objects of their
+    own; two chunks that share a stripe simply serialize with each other.
+    """
+    def __init__(self, stripes: int = LOCK_STRIPES, lease: float = None):
+        self.stripes = [ChunkLock(f"stripe{i}", lease) for i in range(max(1, stripes))]
+
+    def index(self, chunk_id) -> int:
+        return zlib.crc32(str(chunk_id).encode("utf-8")) % len(self.stripes)
+
+    def for_chunk(self, chunk_id) -> ChunkLock:
+        return self.stripes[self.index(chunk_id)]
+
+    def for_chunks(self, chunk_ids: Iterable) -> List[ChunkLock]:
+        """Distinct stripes covering chunk_ids, in stripe order (the order to acquire them in)."""
+        return [self.stripes[i] for i in sorted({self.index(c) for c in chunk_ids})]
+
+    def __iter__(self):
+        return iter(self.stripes)
+
+
+_reaper_thread = None
+
+
+def _reap_loop(get_locks: Callable[[], Iterable[ChunkLock]], interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            for lock in list(get_locks()):
+                lock.reap()
+        except Exception as e:
+            logger.error(f"[Lock] Lease reaper pass failed: {e}")
+
+
+def start_lease_reaper(get_locks: Callable[[], Iterable[ChunkLock]], interval: float = LOCK_REAP_INTERVAL):
+    """Revoke expired leases every interval seconds (and wake their waiters), even when nobody is acquiring."""
+    global _reaper_thread
+    if _reaper_thread is None or not _reaper_thread.is_alive():
+        _reaper_thread = threading.Thread(target=_reap_loop, args=(get_locks, interval), daemon=True,
+                                          name="lease-reaper")
+        _reaper_thread.start()
+    return _reaper_thread
@@ -0,0 +1,154 @@
+# erasure.py
+# Reed-Solomon (k data + m parity) erasure coding over GF(2^8) for chunk files.
+#
+# A chunk's bytes are split into k equal data fragments; m parity fragments
+# are computed with a systematic Cauchy matrix, so any k of the k+m fragments
+# rebuild the chunk. Data fragments are the chunk itself (no decoding on the
+# healthy read path). Each fragment file carries a small header:
+#
+#   magic b"RSFR" | u8 k | u8 m | u8 index | u8 0 | u32 chunk size |
+#   u64 generation | 16-byte blake2b digest of the payload
+#
+# `generation` identifies one encoding of the chunk, so fragments left over
+# from an older write are never mixed into a reconstruction.
+import struct
+import hashlib
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("Please install numpy: pip install numpy")
+
+MAGIC = b"RSFR"
+_HEADER = struct.Struct("<4sBBBBIQ16s")
+
+# GF(2^8) with the 0x11d polynomial; EXP is doubled so log[a] + log[b] needs no modulo
+_EXP = np.zeros(512, dtype=np.uint8)
+_LOG = np.zeros(256, dtype=np.int32)
+_x = 1
+for _i in range(255):
+    _EXP[_i] = _x
+    _LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11d
+_EXP[255:510] = _EXP[:255]
+
+
+class ErasureError(ValueError):
+    pass
+
+
+def _mul(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return int(_EXP[_LOG[a] + _LOG[b]])
+
+
+def _inv(a: int) -> int:
+    if a == 0:
+        raise ZeroDivisionError("0 has no inverse in GF(256)")
+    return int(_EXP[255 - _LOG[a]])
+
+
+def _mul_vec(c: int, vec: "np.ndarray") -> "np.ndarray":
+    """c * vec over GF(256), vectorized."""
+    if c == 0:
+        return np.zeros_like(vec)
+    out = _EXP[_LOG[vec] + _LOG[c]]
+    out[vec == 0] = 0
+    return out
+
+
+def _matrix(k: int, m: int) -> List[List[int]]:
+    """(k+m) x k systematic encoding matrix: identity over a Cauchy block (any k rows invertible)."""
+    if k < 1 or m < 0 or k + m > 255:
+        raise ErasureError(f"unsupported code ({k}+{m})")
+    rows = [[1 if i == j else 0 for j in range(k)] for i in range(k)]
+    rows += [[_inv((k + i) ^ j) for j in range(k)] for i in range(m)]
+    return rows
+
+
+def _invert(matrix: List[List[int]]) -> List[List[int]]:
+    n = len(matrix)
+    a = [row[:] + [1 if i == j else 0 for j in range(n)] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = next((r for r in range(col, n) if a[r][col]), None)
+        if pivot is None:
+            raise ErasureError("fragments do not determine the chunk")
+        a[col], a[pivot] = a[pivot], a[col]
+        scale = _inv(a[col][col])
+        a[col] = [_mul(scale, v) for v in a[col]]
+        for r in range(n):
+            if r != col and a[r][col]:
+                f = a[r][col]
+                a[r] = [v ^ _mul(f, p) for v, p in zip(a[r], a[col])]
+    return [row[n:] for row in a]
+
+
+def encode(data: bytes, k: int, m: int, generation: int) -> List[bytes]:
+    """k+m fragment files (header + payload) for data."""
+    rows = _matrix(k, m)
+    size = len(data)
+    width = max(1, -(-size // k))
+    buf = np.zeros(k * width, dtype=np.uint8)
+    buf[:size] = np.frombuffer(data, dtype=np.uint8)
+    shards = buf.reshape(k, width)
+    out = []
+    for index, coeffs in enumerate(rows):
+        if index < k:
+            payload = shards[index].tobytes()
+        else:
+            acc = np.zeros(width, dtype=np.uint8)
+            for c, shard in zip(coeffs, shards):
+                acc ^= _mul_vec(c, shard)
+            payload = acc.tobytes()
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+        out.append(_HEADER.pack(MAGIC, k, m, index, 0, size, generation, digest) + payload)
+    return out
+
+
+def parse_fragment(blob: bytes) -> Dict:
+    """Header fields + payload of one fragment file; raises ErasureError if it is damaged."""
+    if len(blob) < _HEADER.size:
+        raise ErasureError("truncated fragment")
+    magic, k, m, index, _, size, generation, digest = _HEADER.unpack_from(blob, 0)
+    if magic != MAGIC:
+        raise ErasureError("not a fragment file")
+    payload = blob[_HEADER.size:]
+    if hashlib.blake2b(payload, digest_size=16).digest() != digest:
+        raise ErasureError(f"fragment {index} checksum mismatch")
+    return {"k": k, "m": m, "index": index, "size": size, "generation": generation, "payload": payload}
+
+
+def reconstruct(fragments: List[Dict]) -> Tuple[bytes, int]:
+    """
+    Rebuild the chunk from parsed fragments (any k of one generation; the
+    newest generation with enough fragments wins). Returns (data, generation).
+    """
+    by_gen: Dict[int, Dict[int, Dict]] = {}
+    for f in fragments:
+        by_gen.setdefault(f["generation"], {})[f["index"]] = f
+    for generation in sorted(by_gen, reverse=True):
+        have = by_gen[generation]
+        any_f = next(iter(have.values()))
+        k, m, size = any_f["k"], any_f["m"], any_f["size"]
+        if len(have) < k:
+            continue
+        if all(i in have for i in range(k)):
+            data = b"".join(have[i]["payload"] for i in range(k))  # all data fragments: no decoding
+            return data[:size], generation
+        use = sorted(have)[:k]
+        rows = _matrix(k, m)
+        inv = _invert([rows[i] for i in use])
+        payloads = [np.frombuffer(have[i]["payload"], dtype=np.uint8) for i in use]
+        shards = []
+        for j in range(k):
+            acc = np.zeros_like(payloads[0])
+            for c, p in zip(inv[j], payloads):
+                acc ^= _mul_vec(c, p)
+            shards.append(acc.tobytes())
+        return b"".join(shards)[:size], generation
+    raise ErasureError("not enough intact fragments to rebuild the chunk")
+
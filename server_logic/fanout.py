@@ -0,0 +1,134 @@
+# fanout.py
+# Concurrent replica writes with an acknowledgement policy, shared by app.py and server.py.
+#
+# fan_out(tasks) runs one callable per replica on a bounded thread pool and
+# returns as soon as the policy is satisfied:
+#   "all"      - every replica persisted (latency ~ slowest replica)
+#   "majority" - n // 2 + 1 replicas persisted
+#   "first"    - any one replica persisted (latency ~ fastest replica)
+# The Dynamo-style consistency levels ONE / QUORUM / ALL are accepted as
+# aliases of first / majority / all (case-insensitive).
+# A task acknowledges by returning True; False, None or an exception is a miss.
+# Writes that have not finished when fan_out returns keep running in the pool;
+# their failures are logged. Callers collect them (stragglers=) into a
+# PendingWrites and settle() the chunk before releasing its locks, so the next
+# writer never races a straggling read-modify-write of the same replica.
+# Background maintenance passes its own executor so its (throttled) tasks never
+# occupy the workers student writes wait on.
+import os
+import threading
+import logging
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("fanout")
+
+# Select with REPLICA_ACK=all|majority|first; pool size with REPLICA_IO_WORKERS
+REPLICA_ACK_POLICY = os.environ.get("REPLICA_ACK", "all")
+REPLICA_IO_WORKERS = int(os.environ.get("REPLICA_IO_WORKERS", "8"))
+
+ACK_POLICIES = ("all", "majority", "first")
+CONSISTENCY_LEVELS = {"one": "first", "quorum": "majority", "all": "all"}
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=REPLICA_IO_WORKERS, thread_name_prefix="replica-io")
+        return _pool
+
+
+def acks_needed(policy: str, n: int) -> int:
+    policy = CONSISTENCY_LEVELS.get(policy.lower(), policy.lower())
+    if policy == "first":
+        return min(1, n)
+    if policy == "majority":
+        return n // 2 + 1 if n else 0
+    if policy != "all":
+        logger.warning(f"[Fanout] Unknown ack policy {policy!r}; waiting for all")
+    return n
+
+
+def _ok(future: Future) -> bool:
+    # only an explicit True acknowledges
+    return future.exception() is None and future.result() is True
+
+
+def _log_late(key, future: Future):
+    if future.exception() is not None:
+        logger.error(f"[Fanout] Background replica write {key} failed: {future.exception()}")
+    elif future.result() is not True:
+        logger.error(f"[Fanout] Background replica write {key} failed")
+
+
+def fan_out(tasks: Dict[Hashable, Callable[[], Any]], policy: Optional[str] = None,
+            timeout: Optional[float] = None,
+            executor: Optional[Executor] = None,
+            stragglers: Optional[List[Future]] = None) -> Tuple[bool, Dict[Hashable, bool]]:
+    """
+    Run tasks (key -> zero-argument callable) concurrently, on executor or the
+    shared replica I/O pool. Returns (acknowledged, {key: ok}) once the policy
+    is met, every task has finished, or timeout expires; keys still running
+    are absent from the dict and their futures are appended to stragglers.
+    """
+    policy = (policy or REPLICA_ACK_POLICY).lower()
+    needed = acks_needed(policy, len(tasks))
+    if not tasks:
+        return True, {}
+    pool = executor or _executor()
+    futures = {pool.submit(fn): key for key, fn in tasks.items()}
+    done_ok: Dict[Hashable, bool] = {}
+    pending = set(futures)
+    while pending and sum(done_ok.values()) < needed:
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            break  # timeout
+        for f in done:
+            ok = _ok(f)
+            done_ok[futures[f]] = ok
+            if not ok:
+                err = f.exception()
+                logger.error(f"[Fanout] Replica write {futures[f]} failed{': ' + str(err) if err else ''}")
+        if len(done_ok) - sum(done_ok.values()) > len(tasks) - needed:
+            break  # too many failures to ever reach the quorum
+    for f in pending:
+        f.add_done_callback(lambda fut, key=futures[f]: _log_late(key, fut))
+    if stragglers is not None:
+        stragglers.extend(pending)
+    acked = sum(done_ok.values()) >= needed
+    if not acked:
+        logger.warning(f"[Fanout] Only {sum(done_ok.values())}/{needed} replica acks (policy={policy})")
+    return acked, done_ok
+
+
+class PendingWrites:
+    """
+    Writes fan_out left running, per chunk. Whoever next locks or releases the
+    chunk settles it first: the replica files are quiet once settle() returns.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: Dict[Hashable, List[Future]] = {}
+
+    def add(self, key: Hashable, futures: Iterable[Future]):
+        futures = [f for f in futures if not f.done()]
+        if futures:
+            with self._lock:
+                self._futures.setdefault(key, []).extend(futures)
+
+    def settle(self, key: Hashable, timeout: Optional[float] = None) -> bool:
+        """Wait for key's outstanding writes; False if some are still running after timeout."""
+        with self._lock:
+            futures = self._futures.pop(key, [])
+        if not futures:
+            return True
+        _, running = wait(futures, timeout=timeout)
+        if running:
+            self.add(key, running)
+            logger.warning(f"[Fanout] {len(running)} write(s) to {key} still running after {timeout}s")
+            return False
+        return True
@@ -0,0 +1,179 @@
+# grading.py
+# Batch MCQ grading shared by app.py, server.py and backup_server.py.
+#
+# A cohort's answers are an N x Q matrix (row = student, column = question,
+# value = chosen option, 0 = unanswered); grading is one comparison against the
+# answer-key vector plus per-status penalty masks, instead of a Python loop per
+# student per question. Live answers are kept in that layout from the start
+# (AnswerSheet), so grading a cohort needs no conversion and no copy: grade_batch
+# scores a view of the sheet and picks the wanted rows by index.
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("Please install numpy: pip install numpy")
+
+POINTS_PER_QUESTION = 10
+
+
+def answer_key(questions: Mapping[int, Dict]) -> Tuple[List[int], "np.ndarray"]:
+    """(question ids in column order, answer-key vector) for an MCQ_QUESTIONS-style dict."""
+    qids = sorted(int(q) for q in questions)
+    key = np.array([int(questions[q]["answer"]) for q in qids], dtype=np.uint8)
+    return qids, key
+
+
+def answer_matrix(sheets: Iterable[Mapping], qids: Sequence[int]) -> "np.ndarray":
+    """
+    Build the N x Q answer matrix from per-student {qid: option} dicts. qid keys
+    may be ints or strings (XML-RPC); options that are missing, skipped or not
+    integers become 0 (unanswered).
+    """
+    column = {q: i for i, q in enumerate(qids)}
+    sheets = list(sheets)
+    matrix = np.zeros((len(sheets), len(qids)), dtype=np.uint8)
+    for n, sheet in enumerate(sheets):
+        for qid, given in sheet.items():
+            try:
+                i = column.get(int(qid))
+                if i is not None:
+                    matrix[n, i] = int(given or 0)
+            except (TypeError, ValueError, OverflowError):
+                continue
+    return matrix
+
+
+class AnswerSheet:
+    """
+    Answers of a whole cohort in one preallocated uint8 array: one row (slot)
+    per student, one byte per question, 0 = unanswered. 100k students x 50
+    questions is ~5 MB. Rows are handed to grade_batch as-is.
+    """
+    def __init__(self, qids: Sequence[int], capacity: int = 64):
+        self.qids = [int(q) for q in qids]
+        self._column = {q: i for i, q in enumerate(self.qids)}
+        self._data = np.zeros((max(1, capacity), len(self.qids)), dtype=np.uint8)
+        self._slots: Dict[str, int] = {}   # roll -> row of _data
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, roll):
+        return str(roll) in self._slots
+
+    def _slot_locked(self, roll: str) -> int:
+        slot = self._slots.get(roll)
+        if slot is None:
+            slot = len(self._slots)
+            if slot >= self._data.shape[0]:
+                grown = np.zeros((self._data.shape[0] * 2, self._data.shape[1]), dtype=np.uint8)
+                grown[:slot] = self._data
+                self._data = grown
+            self._slots[roll] = slot
+        return slot
+
+    def record(self, roll, qid, option) -> bool:
+        """Store option (1..255; anything else counts as a skip) for qid. False if qid is unknown."""
+        try:
+            column = self._column.get(int(qid))
+            value = int(option or 0)
+        except (TypeError, ValueError):
+            column, value = self._column.get(qid), 0
+        if column is None:
+            return False
+        if not 0 <= value <= 255:
+            value = 0
+        with self._lock:
+            slot = self._slot_locked(str(roll))   # may grow (replace) _data
+            self._data[slot, column] = value
+        return True
+
+    def get(self, roll, qid) -> Optional[int]:
+        """Chosen option for qid, or None if unanswered."""
+        with self._lock:
+            slot = self._slots.get(str(roll))
+            column = self._column.get(int(qid))
+            if slot is None or column is None:
+                return None
+            value = int(self._data[slot, column])
+        return value or None
+
+    def answers(self, roll) -> Dict[int, int]:
+        """{qid: option} for the answered questions of roll (e.g. to forward over XML-RPC)."""
+        with self._lock:
+            slot = self._slots.get(str(roll))
+            if slot is None:
+                return {}
+            row = self._data[slot].copy()
+        return {self.qids[i]: int(row[i]) for i in np.flatnonzero(row)}
+
+    def matrix(self, rolls: Optional[Iterable] = None) -> "np.ndarray":
+        """
+        Answer matrix for grade_batch. Without rolls: a view of every used slot
+        (no copy). With rolls: one row per roll in that order; unknown rolls
+        get an all-zero row.
+        """
+        with self._lock:
+            if rolls is None:
+                return self._data[:len(self._slots)]
+            slots = [self._slots.get(str(r), -1) for r in rolls]
+            out = np.zeros((len(slots), self._data.shape[1]), dtype=np.uint8)
+            idx = np.array(slots, dtype=np.int64)
+            present = idx >= 0
+            out[present] = self._data[idx[present]]
+        return out
+
+    def indexed(self, rolls: Iterable) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        (matrix() view of every used slot, row of each roll in it or -1 if the
+        roll has no answers), taken together. Pass both to grade_batch (rows=)
+        to grade rolls without copying their answers out.
+        """
+        with self._lock:
+            view = self._data[:len(self._slots)]
+            idx = np.array([self._slots.get(str(r), -1) for r in rolls], dtype=np.int64)
+        return view, idx
+
+    def rolls(self) -> List[str]:
+        """Rolls in slot order (row n of matrix() belongs to rolls()[n])."""
+        with self._lock:
+            return list(self._slots)
+
+
+def _raw_scores(matrix: "np.ndarray", key: "np.ndarray", points: int) -> "np.ndarray":
+    correct = (matrix == key) & (matrix != 0)
+    return correct.sum(axis=1, dtype=np.int64) * points
+
+
+def grade_batch(matrix: "np.ndarray", key: "np.ndarray", statuses: Optional[Sequence[str]] = None,
+                penalties: Optional[Mapping[str, float]] = None,
+                points: int = POINTS_PER_QUESTION, rows: Optional[Sequence[int]] = None) -> "np.ndarray":
+    """
+    Score every row of matrix against key, or with rows (indexes into matrix,
+    -1 = no answers, scores 0) just those rows in that order. statuses (one
+    per scored row) and penalties ({status: multiplier}) scale the raw score
+    of the matching rows, truncated to int as the per-student code did.
+    Returns an int array.
+    """
+    matrix = np.asarray(matrix)
+    if rows is None:
+        scores = _raw_scores(matrix, key, points)
+    else:
+        rows = np.asarray(rows, dtype=np.int64)
+        present = rows >= 0
+        scores = np.zeros(len(rows), dtype=np.int64)
+        if 4 * len(rows) < len(matrix):
+            # a handful of rows: gathering them is cheaper than scoring the whole matrix
+            scores[present] = _raw_scores(matrix[rows[present]], key, points)
+        else:
+            scores[present] = _raw_scores(matrix, key, points)[rows[present]]
+    if statuses is not None and penalties:
+        statuses = np.asarray(statuses)   # status strings or interned status codes
+        for status, factor in penalties.items():
+            mask = statuses == status
+            if mask.any():
+                scores[mask] = np.floor(scores[mask] * factor).astype(np.int64)
+    return scores
@@ -0,0 +1,102 @@
+# merkle.py
+# Row-hash Merkle trees for replica chunk files (anti-entropy scrubbing).
+#
+# Rolls are hashed into a fixed number of buckets, so trees of two replicas
+# of the same chunk line up leaf for leaf whatever rows each one holds.
+# A leaf is the hash of its bucket's (roll, row hash) pairs; inner nodes hash
+# their two children. Equal roots mean equal replicas (one comparison);
+# otherwise diff() only descends into differing subtrees, so locating k
+# differing ranges costs O(k log n) hashes instead of reading both files.
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MERKLE_BUCKETS = 64   # leaves per tree (power of two)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def bucket_of(roll, buckets: int = MERKLE_BUCKETS) -> int:
+    h = hashlib.blake2b(str(roll).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(h, "big") % buckets
+
+
+def row_hash(row: Iterable) -> str:
+    """Hash of a row's values; trailing empty cells and int/float/str spellings don't matter."""
+    cells = ["" if v is None else str(int(v)) if isinstance(v, float) and v.is_integer() else str(v)
+             for v in row]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return _digest(json.dumps(cells, separators=(",", ":")).encode("utf-8"))
+
+
+class MerkleTree:
+    """Fixed-shape tree over MERKLE_BUCKETS roll buckets; levels[0] is [root], levels[-1] the leaves."""
+    def __init__(self, levels: List[List[str]], members: Optional[List[List[str]]] = None):
+        self.levels = levels
+        self.members = members or [[] for _ in levels[-1]]   # rolls per leaf bucket
+
+    @classmethod
+    def build(cls, rows: Iterable, buckets: int = MERKLE_BUCKETS) -> "MerkleTree":
+        """rows: tuples whose first cell is the roll."""
+        pairs: List[List[Tuple[str, str]]] = [[] for _ in range(buckets)]
+        for row in rows:
+            if not row or row[0] is None:
+                continue
+            roll = str(row[0])
+            pairs[bucket_of(roll, buckets)].append((roll, row_hash(row)))
+        leaves = [_digest(json.dumps(sorted(p)).encode("utf-8")) for p in pairs]
+        levels = [leaves]
+        while len(levels[0]) > 1:
+            below = levels[0]
+            levels.insert(0, [_digest((below[i] + below[i + 1]).encode("ascii")) for i in range(0, len(below), 2)])
+        return cls(levels, [sorted(r for r, _ in p) for p in pairs])
+
+    @property
+    def root(self) -> str:
+        return self.levels[0][0]
+
+    def diff(self, other: "MerkleTree") -> List[int]:
+        """Leaf buckets whose hashes differ between self and other."""
+        if len(self.levels) != len(other.levels):
+            return list(range(len(self.levels[-1])))
+        out, frontier = [], [0]
+        for depth, level in enumerate(self.levels):
+            nxt = []
+            for i in frontier:
+                if level[i] == other.levels[depth][i]:
+                    continue
+                if depth == len(self.levels) - 1:
+                    out.append(i)
+                else:
+                    nxt.extend((2 * i, 2 * i + 1))
+            frontier = nxt
+        return out
+
+    def rolls_in(self, buckets: Iterable[int]) -> List[str]:
+        return sorted({r for b in buckets for r in self.members[b]})
+
+    def to_dict(self) -> Dict:
+        return {"levels": self.levels, "members": self.members}
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "MerkleTree":
+        return cls(d["levels"], d.get("members"))
+
+
+def merkle_path(metadata_path) -> Path:
+    """Trees live next to replication_metadata.json."""
+    metadata_path = Path(metadata_path)
+    return metadata_path.with_name(metadata_path.stem + ".merkle.json")
+
+
+def load_trees(metadata_path) -> Dict:
+    """replica_id -> chunk_id -> {"stamp": [mtime_ns, size], "tree": {...}}; {} if absent or unreadable."""
+    try:
+        with open(merkle_path(metadata_path), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
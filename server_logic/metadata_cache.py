@@ -0,0 +1,106 @@
+# metadata_cache.py
+# In-memory replication_metadata.json for app.py's lock and replica paths.
+#
+# The file is parsed once into an immutable MetadataSnapshot holding the
+# per-chunk answers the hot paths need (replica ids, replica paths, sorted
+# lock keys). MetadataCache.get() returns the current snapshot after one
+# stat() of the file; writers save through the cache, which swaps in the new
+# snapshot in a single assignment, so readers see either the old or the new
+# layout and never a half-built one. Edits by other processes change the
+# file stamp and force a reload.
+import os
+import json
+import threading
+import logging
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+try:
+    from .xlsx_io import write_bytes_atomic
+except ImportError:  # imported as a top-level module by the server_logic scripts
+    from xlsx_io import write_bytes_atomic
+
+logger = logging.getLogger("metadata_cache")
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class MetadataSnapshot:
+    """One parsed version of the metadata file; read-only once built."""
+    __slots__ = ("stamp", "meta", "replicas_by_chunk", "paths_by_chunk", "lock_keys", "_raw")
+
+    def __init__(self, raw: str, stamp: Optional[Tuple[int, int]]):
+        meta = json.loads(raw) if raw else {}
+        replicas: Dict[str, list] = {}
+        paths: Dict[str, list] = {}
+        for replica_id, chunks in meta.get("replicas", {}).items():
+            for chunk_id, info in chunks.items():
+                replicas.setdefault(chunk_id, []).append(replica_id)
+                paths.setdefault(chunk_id, []).append(Path(info["path"]))
+        self._raw = raw
+        self.stamp = stamp
+        self.meta: Mapping[str, Any] = _freeze(meta)
+        self.replicas_by_chunk: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {c: tuple(sorted(r)) for c, r in replicas.items()})
+        self.paths_by_chunk: Mapping[str, Tuple[Path, ...]] = MappingProxyType(
+            {c: tuple(p) for c, p in paths.items()})
+        # acquisition order for a chunk: every "replica:chunk" key plus the chunk id, sorted
+        self.lock_keys: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {c: tuple(sorted([f"{rep}:{c}" for rep in r] + [c])) for c, r in replicas.items()})
+
+    def thaw(self) -> Dict[str, Any]:
+        """A private, mutable copy of the metadata (for read-modify-save)."""
+        return json.loads(self._raw) if self._raw else {}
+
+
+class MetadataCache:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._snapshot: Optional[MetadataSnapshot] = None
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self) -> MetadataSnapshot:
+        """Current snapshot; reparsed only when the file changed since it was loaded."""
+        snap = self._snapshot
+        stamp = self._stamp()
+        if snap is not None and snap.stamp == stamp:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and snap.stamp == stamp:
+                return snap
+            raw = ""
+            if stamp is not None:
+                with open(self.path, "r", encoding="utf-8") as fh:
+                    raw = fh.read()
+            snap = MetadataSnapshot(raw, stamp)
+            self._snapshot = snap
+        if stamp is not None:
+            logger.info(f"[Metadata] Loaded {self.path.name}")
+        return snap
+
+    def save(self, meta: Dict[str, Any]) -> MetadataSnapshot:
+        """Write meta atomically and swap it in as the current snapshot."""
+        raw = json.dumps(meta, indent=2)
+        with self._lock:
+            write_bytes_atomic(self.path, raw.encode("utf-8"))
+            snap = MetadataSnapshot(raw, self._stamp())
+            self._snapshot = snap
+        return snap
+
+    def invalidate(self):
+        self._snapshot = None
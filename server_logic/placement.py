@@ -0,0 +1,201 @@
+# placement.py
+# Consistent-hash placement of rolls onto chunks and chunks onto replicas,
+# shared by app.py and server.py (replaces the hand-written DEFAULT_CHUNK_MAP).
+#
+# Two rings with virtual nodes:
+#   roll  -> chunk     (ring of chunk ids)
+#   chunk -> replicas  (ring of replica ids; the first replication_factor
+#                       distinct replicas clockwise from the chunk's hash)
+# Lookups are a bisect over the ring (O(log n)) behind a dict cache (O(1) on
+# repeat). Adding a chunk or replica only moves the keys that fall into its
+# new arcs. Hashes come from blake2b, so every process computes the same layout.
+#
+# A hot chunk can be split in place: its rolls are rehashed over child chunks
+# ("chunk2.1", "chunk2.2") without touching any other chunk; merging the
+# children undoes the split. Placements are never mutated after they are in
+# use - with_split()/with_merge() return a new one to swap in.
+import bisect
+import hashlib
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+VIRTUAL_NODES = 64
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring of node ids, each placed at `vnodes` points."""
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = VIRTUAL_NODES):
+        self.vnodes = vnodes
+        self._points: List[Tuple[int, str]] = []
+        self._keys: List[int] = []
+        self.nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        node = str(node)
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for v in range(self.vnodes):
+            bisect.insort(self._points, (_hash(f"{node}#{v}"), node))
+        self._keys = [h for h, _ in self._points]
+
+    def remove(self, node: str):
+        node = str(node)
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        self._points = [p for p in self._points if p[1] != node]
+        self._keys = [h for h, _ in self._points]
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Node owning key (first point clockwise from hash(key))."""
+        if not self._points:
+            return None
+        i = bisect.bisect(self._keys, _hash(str(key))) % len(self._points)
+        return self._points[i][1]
+
+    def preference_list(self, key: str, n: int) -> List[str]:
+        """First n distinct nodes clockwise from hash(key)."""
+        out: List[str] = []
+        if not self._points:
+            return out
+        n = min(n, len(self.nodes))
+        i = bisect.bisect(self._keys, _hash(str(key)))
+        for step in range(len(self._points)):
+            node = self._points[(i + step) % len(self._points)][1]
+            if node not in out:
+                out.append(node)
+                if len(out) == n:
+                    break
+        return out
+
+
+class ChunkPlacement:
+    """
+    roll -> chunk -> replicas. Chunk ids are "chunk1".."chunkN" and replica ids
+    "replica_1".."replica_M" unless given explicitly. to_dict()/from_dict()
+    round-trip through replication_metadata.json so every process agrees on
+    the layout the replica files were written with.
+    """
+    def __init__(self, chunks=2, replicas=3, replication_factor: int = 3, vnodes: int = VIRTUAL_NODES,
+                 splits: Optional[Dict[str, List[str]]] = None):
+        chunk_ids = [f"chunk{i}" for i in range(1, chunks + 1)] if isinstance(chunks, int) else list(chunks)
+        replica_ids = [f"replica_{i}" for i in range(1, replicas + 1)] if isinstance(replicas, int) else list(replicas)
+        self.replication_factor = int(replication_factor)
+        self.vnodes = vnodes
+        self._chunk_ring = HashRing(chunk_ids, vnodes)
+        self._replica_ring = HashRing(replica_ids, vnodes)
+        self._lock = threading.Lock()
+        self._roll_cache: Dict[str, str] = {}
+        self._replica_cache: Dict[str, List[str]] = {}
+        self.splits: Dict[str, List[str]] = {k: list(v) for k, v in (splits or {}).items()}  # parent -> children
+
+    def _leaves(self, chunk_id: str) -> List[str]:
+        children = self.splits.get(chunk_id)
+        if not children:
+            return [chunk_id]
+        return [leaf for child in children for leaf in self._leaves(child)]
+
+    @property
+    def chunks(self) -> List[str]:
+        """Leaf chunks (the ones that have replica files)."""
+        return sorted((leaf for node in self._chunk_ring.nodes for leaf in self._leaves(node)), key=_natural_key)
+
+    @property
+    def replicas(self) -> List[str]:
+        return sorted(self._replica_ring.nodes, key=_natural_key)
+
+    def chunk_for_roll(self, roll) -> Optional[str]:
+        roll = str(roll)
+        chunk = self._roll_cache.get(roll)
+        if chunk is None:
+            chunk = self._chunk_ring.lookup(roll)
+            while chunk in self.splits:
+                children = self.splits[chunk]
+                chunk = children[_hash(f"{chunk}/{roll}") % len(children)]
+            with self._lock:
+                self._roll_cache[roll] = chunk
+        return chunk
+
+    def replicas_for_chunk(self, chunk_id: str) -> List[str]:
+        reps = self._replica_cache.get(chunk_id)
+        if reps is None:
+            reps = sorted(self._replica_ring.preference_list(chunk_id, self.replication_factor), key=_natural_key)
+            with self._lock:
+                self._replica_cache[chunk_id] = reps
+        return list(reps)
+
+    def fragment_replicas(self, chunk_id: str) -> List[str]:
+        """Replicas for chunk_id in ring order (erasure-coded fragment i goes to the i-th one)."""
+        return self._replica_ring.preference_list(chunk_id, self.replication_factor)
+
+    def chunk_map(self, rolls: Iterable) -> Dict[str, List[str]]:
+        """Group rolls by chunk (every chunk present, possibly empty), keeping roll order."""
+        out: Dict[str, List[str]] = {c: [] for c in self.chunks}
+        for roll in rolls:
+            out[self.chunk_for_roll(roll)].append(str(roll))
+        return out
+
+    def add_chunk(self, chunk_id: str):
+        with self._lock:
+            self._chunk_ring.add(chunk_id)
+            self._roll_cache.clear()
+
+    def add_replica(self, replica_id: str):
+        with self._lock:
+            self._replica_ring.add(replica_id)
+            self._replica_cache.clear()
+
+    def parent_of(self, chunk_id: str) -> Optional[str]:
+        for parent, children in self.splits.items():
+            if chunk_id in children:
+                return parent
+        return None
+
+    def with_split(self, chunk_id: str, ways: int = 2) -> "ChunkPlacement":
+        """New placement where leaf chunk_id is split into `ways` children."""
+        if chunk_id not in self.chunks:
+            raise KeyError(chunk_id)
+        splits = dict(self.splits)
+        splits[chunk_id] = [f"{chunk_id}.{i}" for i in range(1, ways + 1)]
+        return ChunkPlacement(sorted(self._chunk_ring.nodes), self.replicas, self.replication_factor,
+                              self.vnodes, splits)
+
+    def with_merge(self, parent_id: str) -> "ChunkPlacement":
+        """New placement where the (leaf) children of parent_id are merged back into it."""
+        children = self.splits.get(parent_id)
+        if not children or any(c in self.splits for c in children):
+            raise KeyError(parent_id)
+        splits = {k: v for k, v in self.splits.items() if k != parent_id}
+        return ChunkPlacement(sorted(self._chunk_ring.nodes), self.replicas, self.replication_factor,
+                              self.vnodes, splits)
+
+    def with_replication(self, replication_factor: int) -> "ChunkPlacement":
+        """New placement with the same chunks and splits over replica_1..replica_<replication_factor>."""
+        replication_factor = int(replication_factor)
+        return ChunkPlacement(sorted(self._chunk_ring.nodes), replication_factor, replication_factor,
+                              self.vnodes, self.splits)
+
+    def to_dict(self) -> Dict:
+        return {"chunks": sorted(self._chunk_ring.nodes, key=_natural_key), "replicas": self.replicas,
+                "replication_factor": self.replication_factor, "vnodes": self.vnodes,
+                "splits": self.splits}
+
+    @classmethod
+    def from_dict(cls, d: Dict, default: Optional["ChunkPlacement"] = None) -> "ChunkPlacement":
+        if not d:
+            return default if default is not None else cls()
+        return cls(d["chunks"], d["replicas"], d.get("replication_factor", 3), d.get("vnodes", VIRTUAL_NODES),
+                   d.get("splits"))
+
+
+def _natural_key(node_id: str) -> Tuple:
+    # "chunk10" sorts after "chunk9", and split children "chunk2.1" between "chunk2" and "chunk3"
+    return tuple(int(part) if part.isdigit() else part for part in re.split(r"(\d+)", node_id))
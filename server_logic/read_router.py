@@ -0,0 +1,95 @@
+# read_router.py
+# Spreads replica reads across the replicas of a chunk (used by server.request_read).
+#
+# Each replica file is ranked by its outstanding reads (least-outstanding
+# first, ties broken round-robin). Replicas whose last write failed are
+# unhealthy and become healthy again once a write to them succeeds (re-sync,
+# scrub repair). For FAILED_BACKOFF seconds after a failure they are left out
+# of reads entirely; past that they are tried last, as probes. A replica in
+# backoff is only read when too few others are left to serve the read.
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+logger = logging.getLogger("read_router")
+
+FAILED_BACKOFF = 30.0   # seconds a replica whose write failed is kept out of reads
+
+
+class ReadRouter:
+    def __init__(self, backoff: float = FAILED_BACKOFF):
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._outstanding: Dict[str, int] = {}
+        self._reads: Dict[str, int] = {}
+        self._failed: Dict[str, float] = {}   # key -> monotonic time of the last failed write
+        self._turn = 0
+
+    @staticmethod
+    def _key(path) -> str:
+        return str(Path(path).resolve())
+
+    def note_write(self, path, ok: bool):
+        key = self._key(path)
+        with self._lock:
+            if ok:
+                if self._failed.pop(key, None) is not None:
+                    logger.info(f"[Router] {Path(path).name} is healthy again")
+            else:
+                if key not in self._failed:
+                    logger.warning(f"[Router] {Path(path).name} excluded from reads until its next successful write")
+                self._failed[key] = time.monotonic()
+
+    def healthy(self, path) -> bool:
+        with self._lock:
+            return self._key(path) not in self._failed
+
+    def order(self, paths: Iterable, need: int = 1) -> List[Path]:
+        """
+        paths reads should try, in order: healthy by least outstanding, then unhealthy
+        replicas past their backoff. Replicas still in backoff are left out unless
+        fewer than need replicas would remain; then they pad the end of the list.
+        """
+        paths = [Path(p) for p in paths]
+        if not paths:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            self._turn += 1
+            turn = self._turn
+            rank, cooling = {}, []
+            for i, p in enumerate(paths):
+                key = self._key(p)
+                failed_at = self._failed.get(key)
+                if failed_at is not None and now - failed_at < self.backoff:
+                    cooling.append(p)
+                rank[p] = (failed_at is not None, self._outstanding.get(key, 0), (i - turn) % len(paths))
+        ordered = sorted((p for p in paths if p not in cooling), key=rank.__getitem__)
+        if len(ordered) < need:
+            ordered += sorted(cooling, key=rank.__getitem__)[:need - len(ordered)]
+        return ordered
+
+    @contextmanager
+    def reading(self, path):
+        """Count one in-flight read against path; counted as served if the body doesn't raise."""
+        key = self._key(path)
+        with self._lock:
+            self._outstanding[key] = self._outstanding.get(key, 0) + 1
+        try:
+            yield
+            with self._lock:
+                self._reads[key] = self._reads.get(key, 0) + 1
+        finally:
+            with self._lock:
+                self._outstanding[key] -= 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """file name -> {"reads", "outstanding", "healthy"}."""
+        with self._lock:
+            keys = set(self._reads) | set(self._outstanding) | set(self._failed)
+            return {Path(k).name: {"reads": self._reads.get(k, 0), "outstanding": self._outstanding.get(k, 0),
+                                   "healthy": int(k not in self._failed)}
+                    for k in sorted(keys)}
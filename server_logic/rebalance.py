@@ -0,0 +1,55 @@
+# rebalance.py
+# Split / merge planning for chunk placements (see placement.ChunkPlacement).
+#
+# The planner is pure: given the current placement and per-chunk stats it
+# returns the actions to take and the placement that results. Copying data,
+# swapping metadata and lock tables is left to the caller (app.rebalance_chunks),
+# which keeps serving reads through the old layout until the swap.
+import os
+from typing import Dict, List, Tuple
+
+try:
+    from .placement import ChunkPlacement
+except ImportError:  # imported as a top-level module by the server_logic scripts
+    from placement import ChunkPlacement
+
+# Split a chunk above either threshold; merge split children back when they
+# are all small and were not accessed since the previous pass.
+REBALANCE_SPLIT_ROWS = int(os.environ.get("REBALANCE_SPLIT_ROWS", "5000"))
+REBALANCE_SPLIT_BYTES = int(os.environ.get("REBALANCE_SPLIT_BYTES", str(4 * 1024 * 1024)))
+REBALANCE_MERGE_ROWS = int(os.environ.get("REBALANCE_MERGE_ROWS", "1000"))
+
+Action = Tuple[str, str]   # ("split", chunk_id) or ("merge", parent_chunk_id)
+
+
+def plan_rebalance(placement: ChunkPlacement, stats: Dict[str, Dict[str, int]],
+                   split_rows: int = REBALANCE_SPLIT_ROWS, split_bytes: int = REBALANCE_SPLIT_BYTES,
+                   merge_rows: int = REBALANCE_MERGE_ROWS) -> List[Action]:
+    """
+    stats: leaf chunk -> {"rows", "bytes", "accesses"} (missing keys count as 0).
+    """
+    actions: List[Action] = []
+    splitting = set()
+    for chunk in placement.chunks:
+        st = stats.get(chunk, {})
+        if st.get("rows", 0) > split_rows or st.get("bytes", 0) > split_bytes:
+            actions.append(("split", chunk))
+            splitting.add(chunk)
+    leaves = set(placement.chunks)
+    for parent, children in placement.splits.items():
+        if not all(c in leaves and c not in splitting for c in children):
+            continue
+        rows = sum(stats.get(c, {}).get("rows", 0) for c in children)
+        cold = all(stats.get(c, {}).get("accesses", 0) == 0 for c in children)
+        if rows < merge_rows and cold:
+            actions.append(("merge", parent))
+    return actions
+
+
+def apply_plan(placement: ChunkPlacement, actions: List[Action]) -> Tuple[ChunkPlacement, List[str], List[str]]:
+    """Return (new placement, retired leaf chunks, new leaf chunks)."""
+    new = placement
+    for kind, chunk in actions:
+        new = new.with_split(chunk) if kind == "split" else new.with_merge(chunk)
+    before, after = set(placement.chunks), set(new.chunks)
+    return new, sorted(before - after), sorted(after - before)
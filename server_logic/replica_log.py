@@ -0,0 +1,136 @@
+# replica_log.py
+# Row-level (delta) replication for replica chunk files.
+#
+# Instead of regenerating every replica workbook on each mark change, writers
+# append change records {"roll", "column", "value", "version"} to a small
+# per-replica patch log next to the file (replica_1_chunk1.xlsx.patch).
+# compact() folds the log into a freshly written workbook and truncates it, so
+# full rewrites only happen during compaction. The .xlsx on disk lags its log
+# until then: app.py serves every read from the master results, and replica
+# files are only read back after compaction (or rebuilt from the master).
+import os
+import json
+import threading
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from .xlsx_io import iter_xlsx_rows, read_xlsx_header, serialize_rows, write_bytes_atomic
+except ImportError:  # imported as a top-level module by the server_logic scripts
+    from xlsx_io import iter_xlsx_rows, read_xlsx_header, serialize_rows, write_bytes_atomic
+
+logger = logging.getLogger("replica_log")
+
+PATCH_SUFFIX = ".patch"
+COMPACT_RECORDS = 64   # compact a replica once its log holds this many records
+
+
+def patch_path(path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + PATCH_SUFFIX)
+
+
+def change(roll, column: int, value: Any, version: int) -> Dict[str, Any]:
+    """One change record; column is 1-based as in openpyxl."""
+    return {"roll": str(roll), "column": int(column), "value": value, "version": int(version)}
+
+
+def _overlay(row: List, records: Iterable[Dict[str, Any]]) -> List:
+    for rec in sorted(records, key=lambda r: r["version"]):
+        column = rec["column"]
+        while len(row) < column:
+            row.append(None)
+        row[column - 1] = rec["value"]
+    return row
+
+
+class ReplicaPatchLog:
+    """
+    Append-only change logs for replica files, keyed by replica path.
+    Appends are O(changed rows); record counts are cached so the compaction
+    check never rereads the log. Each log has its own lock, so an fsync or a
+    compaction on one replica never stalls writers of another.
+    """
+    def __init__(self, compact_records: int = COMPACT_RECORDS):
+        self.compact_records = compact_records
+        self._locks_guard = threading.Lock()   # only guards the _locks dict
+        self._locks: Dict[str, threading.Lock] = {}
+        self._counts: Dict[str, int] = {}
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def records(self, path) -> List[Dict[str, Any]]:
+        """Change records for path in log order; a torn last line (crash mid-append) is skipped."""
+        out = []
+        try:
+            with open(patch_path(path), "r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        out.append(json.loads(line))
+                    except ValueError:
+                        logger.warning(f"[Replica] Skipping torn record in {patch_path(path).name}")
+        except FileNotFoundError:
+            pass
+        return out
+
+    def last_version(self, path) -> int:
+        return max((r["version"] for r in self.records(path)), default=0)
+
+    def append(self, path, records: List[Dict[str, Any]]) -> int:
+        """Append records to the log of path (fsync'd); returns how many records the log now holds."""
+        key = str(Path(path).resolve())
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        with self._lock_for(key):
+            with open(patch_path(path), "a", encoding="utf-8") as fh:
+                fh.write(data)
+                fh.flush()
+                os.fsync(fh.fileno())
+            if key not in self._counts:
+                self._counts[key] = len(self.records(path))
+            else:
+                self._counts[key] += len(records)
+            return self._counts[key]
+
+    def needs_compaction(self, path) -> bool:
+        return self._counts.get(str(Path(path).resolve()), 0) >= self.compact_records
+
+    def compact(self, path) -> Optional[List[str]]:
+        """
+        Fold the log into the replica workbook (one full rewrite) and truncate it.
+        Returns the rolls in row order of the new file, or None if there was nothing to do.
+        """
+        key = str(Path(path).resolve())
+        with self._lock_for(key):
+            records = self.records(path)
+            if not records:
+                self._counts[key] = 0
+                return None
+            header = read_xlsx_header(path) or []
+            rows: Dict[str, List] = {str(r[0]): list(r) for r in iter_xlsx_rows(path)}
+            by_roll: Dict[str, List[Dict[str, Any]]] = {}
+            for rec in records:
+                by_roll.setdefault(rec["roll"], []).append(rec)
+            for roll, recs in by_roll.items():
+                rows[roll] = _overlay(rows.get(roll, [roll]), recs)
+            data, rolls = serialize_rows(header, rows.values())
+            write_bytes_atomic(path, data)
+            os.remove(patch_path(path))
+            self._counts[key] = 0
+        logger.info(f"[Replica] Compacted {len(records)} change record(s) into {Path(path).name}")
+        return rolls
+
+    def discard(self, path):
+        """Drop the log of path (the replica was just rewritten from the master)."""
+        key = str(Path(path).resolve())
+        with self._lock_for(key):
+            try:
+                os.remove(patch_path(path))
+            except FileNotFoundError:
+                pass
+            self._counts[key] = 0
@@ -0,0 +1,649 @@
+# results_store.py
+# Results store shared by app.py, server.py and teacher.py.
+#
+# Every writer goes through ResultsStore.update(roll, {column: value}, default_row)
+# (columns are 1-based, as in openpyxl). Two backends:
+#   - XlsxResultsStore:   results.xlsx held in memory, written behind by a flusher
+#                         thread, optionally with an fsync'd write-ahead journal
+#   - SqliteResultsStore: results.db (WAL mode, indexed on roll); results.xlsx is
+#                         only produced on demand by export_xlsx()
+import os
+import json
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    raise SystemExit("Please install openpyxl: pip install openpyxl")
+
+try:
+    from .xlsx_io import iter_xlsx_rows, read_xlsx_header
+except ImportError:  # imported as a top-level module by the server_logic scripts
+    from xlsx_io import iter_xlsx_rows, read_xlsx_header
+
+logger = logging.getLogger("results_store")
+
+# Select the backend for all processes with RESULTS_BACKEND=xlsx|sqlite
+RESULTS_BACKEND = os.environ.get("RESULTS_BACKEND", "xlsx")
+RESULTS_DB_PATH = Path(os.environ.get("RESULTS_DB_PATH", "results.db"))
+
+# seconds between background flushes of results.xlsx, and how many pending updates force an early one
+FLUSH_INTERVAL = float(os.environ.get("RESULTS_FLUSH_INTERVAL", "2.0"))
+FLUSH_DIRTY_THRESHOLD = int(os.environ.get("RESULTS_FLUSH_DIRTY_THRESHOLD", "25"))
+
+
+def _write_workbook(path: Path, header: List, rows) -> None:
+    """Write header + rows to path atomically (temp file + os.replace)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(header))
+    for r in rows:
+        ws.append(list(r))
+    tmp = path.with_name(path.name + ".tmp")
+    wb.save(tmp)
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive lock on path (created if missing) shared by every process on this machine."""
+    with open(path, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)  # gives up after ~10s; keep waiting
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _apply(row: List, values: Dict[int, Any]) -> None:
+    for column, value in values.items():
+        while len(row) < column:
+            row.append(None)
+        row[column - 1] = value
+
+
+class ResultsStore:
+    """Interface implemented by every results backend."""
+    header: List
+    version: int = 0  # bumped on every write that lands (and on reloads after external writes)
+    in_memory: bool = False  # get() is already a dict lookup; ResultsReadCache passes straight through
+
+    def get(self, roll) -> Optional[Tuple]:
+        """Return the row for roll as a tuple, or None."""
+        raise NotImplementedError
+
+    def snapshot(self) -> Tuple[List, List[Tuple]]:
+        """Return (header, rows) in sheet order."""
+        raise NotImplementedError
+
+    def iter_rows(self, rolls: Optional[Iterable] = None) -> Iterator[Tuple]:
+        """
+        Lazily yield rows. Without rolls: every row in sheet order. With rolls:
+        only those rows, in the order given (the filter is pushed down to the
+        backend instead of scanning every row).
+        """
+        raise NotImplementedError
+
+    def row_count(self) -> int:
+        raise NotImplementedError
+
+    def current_version(self):
+        """
+        Token that changes whenever the results may have changed: our own
+        writes bump version, writes by other processes show up through the
+        backing file's (mtime, size). ResultsReadCache stamps its entries with it.
+        """
+        raise NotImplementedError
+
+    def update(self, roll, values: Dict[int, Any], default_row=None) -> bool:
+        """
+        Set cells (1-based column -> value) for roll. If roll has no row yet,
+        default_row is inserted instead; without one the call only updates.
+        """
+        raise NotImplementedError
+
+    def flush(self) -> bool:
+        """Persist anything still pending. Called at phase boundaries."""
+        return False
+
+    def export_xlsx(self, path: Path) -> Path:
+        """Write the current results to an .xlsx file and return its path."""
+        header, rows = self.snapshot()
+        _write_workbook(Path(path), header, rows)
+        logger.info(f"[Results] Exported {len(rows)} rows to {path}")
+        return Path(path)
+
+    def start(self) -> None:
+        """Start background work, if the backend has any."""
+
+    def replay(self) -> int:
+        """Recover writes left over from a previous run; returns how many were applied."""
+        return 0
+
+
+# ---------------- Write-ahead journal ----------------
+class ResultsJournal:
+    """
+    Append-only, fsync'd journal of result updates. Each update is one JSON
+    line; concurrent appends share a single fsync (group commit). The store
+    rotates the journal before writing the workbook and drops the rotated
+    file once the workbook is safely on disk.
+
+    enqueue() fixes a record's place in the journal (callers do it in the same
+    critical section as the change it records, so replay follows apply order);
+    wait() returns once that record is fsync'd. A batch whose write or fsync
+    fails is lost as a whole: every waiter in it raises, even after later
+    batches succeed.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.rotated_path = self.path.with_name(self.path.name + ".compacting")
+        self._cond = threading.Condition(threading.Lock())
+        self._fh = None
+        self._buffer: List[str] = []
+        self._seq = 0
+        self._flushed_seq = 0   # every record up to here went through a write + fsync attempt
+        self._lost: List[Tuple[int, int]] = []  # (first, last) seq of batches that failed
+        self._torn = False      # a failed write may have left a partial line at the tail
+        self._syncing = False
+
+    def enqueue(self, roll: str, values: Dict[int, Any], default_row=None) -> int:
+        """Buffer one record and return its seq (not durable until wait(seq) returns)."""
+        with self._cond:
+            self._seq += 1
+            record = {"seq": self._seq, "roll": roll, "set": {str(c): v for c, v in values.items()},
+                      "default": default_row}
+            self._buffer.append(json.dumps(record) + "\n")
+            return self._seq
+
+    def wait(self, seq: int) -> None:
+        """Return once record seq (and any batched with it) has been fsync'd; OSError if its batch was lost."""
+        with self._cond:
+            while self._flushed_seq < seq:
+                if self._syncing:
+                    self._cond.wait()
+                    continue
+                # become the group-commit leader for everything buffered so far
+                self._syncing = True
+                batch, self._buffer = self._buffer, []
+                first, upto = self._flushed_seq + 1, self._seq
+                if self._torn:
+                    batch.insert(0, "\n")  # end the partial line so this batch starts on its own
+                self._cond.release()
+                ok = False
+                try:
+                    if self._fh is None:
+                        self._fh = open(self.path, "a", encoding="utf-8")
+                    self._fh.write("".join(batch))
+                    self._fh.flush()
+                    os.fsync(self._fh.fileno())
+                    ok = True
+                except OSError as e:
+                    logger.error(f"[Results] Journal write of records {first}..{upto} failed: {e}")
+                    self._close_quietly()
+                finally:
+                    self._cond.acquire()
+                    if ok:
+                        self._torn = False
+                    else:
+                        self._lost.append((first, upto))
+                        self._torn = True
+                    self._flushed_seq = upto
+                    self._syncing = False
+                    self._cond.notify_all()
+            if any(first <= seq <= last for first, last in self._lost):
+                raise OSError(f"journal record {seq} could not be written to {self.path}")
+
+    def append(self, roll: str, values: Dict[int, Any], default_row=None) -> None:
+        """Returns once the record (and any batched with it) has been fsync'd."""
+        self.wait(self.enqueue(roll, values, default_row))
+
+    def _close_quietly(self):
+        try:
+            if self._fh is not None:
+                self._fh.close()
+        except OSError:
+            pass
+        self._fh = None
+
+    def rotate(self) -> None:
+        """Move the live journal aside; later appends start a fresh file."""
+        with self._cond:
+            while self._syncing:
+                self._cond.wait()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            self._torn = False  # the successor starts on a fresh line either way
+            if self.rotated_path.exists():
+                # a previous flush failed; keep appending its successor to the rotated file
+                if self.path.exists():
+                    with open(self.rotated_path, "a", encoding="utf-8") as out, open(self.path, "r", encoding="utf-8") as src:
+                        out.write("\n" + src.read())  # blank lines replay as no-ops; a torn tail stays on its own line
+                    os.remove(self.path)
+            elif self.path.exists():
+                os.replace(self.path, self.rotated_path)
+
+    def drop_rotated(self) -> None:
+        if self.rotated_path.exists():
+            os.remove(self.rotated_path)
+
+    def records(self):
+        """Yield (roll, values, default_row) from the rotated then the live journal."""
+        for path in (self.rotated_path, self.path):
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        # torn line from a crash or a failed write mid-append; each record is one line
+                        if line.strip():
+                            logger.warning(f"[Results] Ignoring truncated journal record in {path}")
+                        continue
+                    with self._cond:
+                        self._seq = max(self._seq, int(rec.get("seq", 0)))
+                        self._flushed_seq = self._seq
+                    yield str(rec["roll"]), {int(c): v for c, v in rec["set"].items()}, rec.get("default")
+
+
+# ---------------- xlsx backend ----------------
+class XlsxResultsStore(ResultsStore):
+    """
+    Authoritative in-memory copy of results.xlsx.
+    Writers only touch memory (plus the journal, if one is configured); a
+    background thread writes the workbook every flush_interval seconds or as
+    soon as dirty_threshold updates are pending. Every process flushes under
+    the same OS lock on results.xlsx.lock, held from the freshness check to the
+    rename: if another process rewrote the file in the meantime it is reloaded
+    and our pending updates are re-applied on top before we write.
+    """
+    in_memory = True
+
+    def __init__(self, path: Path, header: List, journal_path: Optional[Path] = None,
+                 seed: Optional[Callable[[], List[List]]] = None,
+                 flush_interval: float = FLUSH_INTERVAL, dirty_threshold: int = FLUSH_DIRTY_THRESHOLD):
+        self.path = Path(path)
+        self.header = list(header)
+        self.seed = seed
+        self.flush_interval = flush_interval
+        self.dirty_threshold = dirty_threshold
+        self.journal = ResultsJournal(journal_path) if journal_path else None
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._rows: Dict[str, List] = {}     # roll -> cells (dict order == sheet order)
+        self._pending: Dict[str, Dict[str, Any]] = {}  # roll -> {"values", "default"} not yet on disk
+        self._dirty = 0
+        self._loaded = False
+        self._stamp = None
+        self.version = 0
+        self._lock = threading.Lock()        # guards the fields above; never held across file I/O of a flush
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = None
+
+    def _disk_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        # every flush renames a new file into place, so the inode changes even when mtime and size do not
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        # caller holds self._lock
+        self._rows = {}
+        if self.path.exists():
+            self.header = read_xlsx_header(self.path) or self.header
+            for row in iter_xlsx_rows(self.path):
+                self._rows[str(row[0])] = list(row)
+        elif self.seed is not None:
+            for row in self.seed():
+                self._rows[str(row[0])] = list(row)
+            self._dirty += 1
+        self._stamp = self._disk_stamp()
+        for roll, entry in self._pending.items():
+            self._apply_locked(roll, entry["values"], entry["default"])
+        self._loaded = True
+        self.version += 1
+        logger.info(f"[Results] Loaded {len(self._rows)} rows into memory from {self.path}")
+
+    def _ensure_fresh(self):
+        # caller holds self._lock
+        if not self._loaded:
+            self._load()
+        elif self._disk_stamp() not in (None, self._stamp):  # also when another process created it since
+            logger.info(f"[Results] {self.path} changed on disk; reloading")
+            self._load()
+
+    def _apply_locked(self, roll: str, values: Dict[int, Any], default_row) -> bool:
+        row = self._rows.get(roll)
+        if row is None:
+            if default_row is None:
+                return False
+            self._rows[roll] = list(default_row)
+            return True
+        _apply(row, values)
+        return True
+
+    def get(self, roll):
+        with self._lock:
+            self._ensure_fresh()
+            row = self._rows.get(str(roll))
+            return tuple(row) if row is not None else None
+
+    def snapshot(self):
+        with self._lock:
+            self._ensure_fresh()
+            return list(self.header), [tuple(r) for r in self._rows.values()]
+
+    def iter_rows(self, rolls=None):
+        with self._lock:
+            self._ensure_fresh()
+            if rolls is None:
+                picked = list(self._rows.values())
+            else:
+                picked = [row for row in (self._rows.get(str(r)) for r in rolls) if row is not None]
+        for row in picked:
+            yield tuple(row)
+
+    def row_count(self):
+        with self._lock:
+            self._ensure_fresh()
+            return len(self._rows)
+
+    def current_version(self):
+        # _ensure_fresh reloads (and bumps version) if another process rewrote the file
+        with self._lock:
+            self._ensure_fresh()
+            return self.version
+
+    def update(self, roll, values, default_row=None):
+        roll = str(roll)
+        with self._lock:
+            self._ensure_fresh()
+            if not self._apply_locked(roll, values, default_row):
+                return False
+            self.version += 1
+            entry = self._pending.setdefault(roll, {"values": {}, "default": None})
+            entry["values"].update(values)
+            if default_row is not None and entry["default"] is None:
+                entry["default"] = list(default_row)
+            self._dirty += 1
+            pending = self._dirty
+            # seq taken under the same lock as the apply, so replay follows apply order
+            seq = self.journal.enqueue(roll, values, default_row) if self.journal is not None else None
+        if seq is not None:
+            self.journal.wait(seq)
+        self.start()
+        if pending >= self.dirty_threshold:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        # the file lock makes check-reload-merge-write one step across processes
+        with self._flush_lock, _file_lock(self.lock_path):
+            with self._lock:
+                self._ensure_fresh()
+                if self._dirty == 0:
+                    return False
+                header = list(self.header)
+                rows = [list(r) for r in self._rows.values()]
+                flushed, pending = self._dirty, self._pending
+                self._dirty, self._pending = 0, {}
+                if self.journal is not None:
+                    self.journal.rotate()
+            try:
+                _write_workbook(self.path, header, rows)
+            except Exception:
+                with self._lock:
+                    for roll, entry in pending.items():
+                        mine = self._pending.setdefault(roll, {"values": {}, "default": entry["default"]})
+                        mine["values"] = {**entry["values"], **mine["values"]}
+                    self._dirty += flushed
+                raise
+            with self._lock:
+                self._stamp = self._disk_stamp()
+            if self.journal is not None:
+                self.journal.drop_rotated()
+        logger.info(f"[Results] Flushed {flushed} pending update(s) to {self.path}")
+        return True
+
+    def export_xlsx(self, path=None):
+        if path is None or Path(path).resolve() == self.path.resolve():
+            self.flush()
+            return self.path
+        return super().export_xlsx(path)
+
+    def replay(self):
+        if self.journal is None:
+            return 0
+        n = 0
+        for roll, values, default_row in self.journal.records():
+            with self._lock:
+                self._ensure_fresh()
+                self._apply_locked(roll, values, default_row)
+                entry = self._pending.setdefault(roll, {"values": {}, "default": default_row})
+                entry["values"].update(values)
+                self._dirty += 1
+            n += 1
+        if n:
+            logger.info(f"[Results] Replaying {n} journal record(s) into {self.path}")
+            self.flush()
+        return n
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("[Results] Background flush failed")
+
+
+# ---------------- SQLite backend ----------------
+class SqliteResultsStore(ResultsStore):
+    """
+    results stored in a local SQLite database (WAL mode) with the roll as
+    primary key, so every mark write is one indexed UPDATE. Column n of the
+    sheet is column c<n> of the results table. On first use the table is
+    imported from results.xlsx (or seeded) if that exists.
+    """
+    def __init__(self, db_path: Path, header: List, xlsx_path: Optional[Path] = None,
+                 seed: Optional[Callable[[], List[List]]] = None):
+        self.db_path = Path(db_path)
+        self.header = list(header)
+        self.xlsx_path = Path(xlsx_path) if xlsx_path else None
+        self.seed = seed
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._ready = False
+        self._ncols = 0
+        self.version = 0
+        self._version_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._ready:
+            self._init_schema(conn)
+        return conn
+
+    def _init_schema(self, conn):
+        with self._init_lock:
+            if self._ready:
+                return
+            conn.execute("CREATE TABLE IF NOT EXISTS results_header (pos INTEGER PRIMARY KEY, name TEXT)")
+            saved = [r[0] for r in conn.execute("SELECT name FROM results_header ORDER BY pos")]
+            if saved:
+                self.header = saved
+            cols = [r[1] for r in conn.execute("PRAGMA table_info(results)")]
+            if not cols:
+                imported_header, rows = self._initial_rows()
+                if imported_header:
+                    self.header = list(imported_header)
+                n = max([len(self.header)] + [len(r) for r in rows])
+                defs = ", ".join(["c1 TEXT PRIMARY KEY"] + [f"c{i}" for i in range(2, n + 1)])
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(f"CREATE TABLE IF NOT EXISTS results ({defs})")
+                conn.execute("DELETE FROM results_header")
+                conn.executemany("INSERT INTO results_header VALUES (?, ?)", list(enumerate(self.header, start=1)))
+                marks = ", ".join("?" * n)
+                conn.executemany(f"INSERT OR IGNORE INTO results VALUES ({marks})",
+                                 [[str(r[0])] + list(r[1:]) + [None] * (n - len(r)) for r in rows])
+                conn.execute("COMMIT")
+                logger.info(f"[Results] Created {self.db_path} with {len(rows)} rows")
+                cols = [r[1] for r in conn.execute("PRAGMA table_info(results)")]
+            self._ncols = len(cols)
+            self._ready = True
+
+    def _initial_rows(self):
+        if self.xlsx_path is not None and self.xlsx_path.exists():
+            return read_xlsx_header(self.xlsx_path), [list(r) for r in iter_xlsx_rows(self.xlsx_path)]
+        return None, [list(r) for r in self.seed()] if self.seed else []
+
+    def _widen(self, conn, n: int):
+        with self._init_lock:
+            while self._ncols < n:
+                self._ncols += 1
+                conn.execute(f"ALTER TABLE results ADD COLUMN c{self._ncols}")
+
+    def get(self, roll):
+        row = self._conn().execute("SELECT * FROM results WHERE c1 = ?", (str(roll),)).fetchone()
+        return tuple(row) if row is not None else None
+
+    def snapshot(self):
+        rows = [tuple(r) for r in self._conn().execute("SELECT * FROM results ORDER BY rowid")]
+        return list(self.header), rows
+
+    def iter_rows(self, rolls=None):
+        conn = self._conn()
+        if rolls is None:
+            for row in conn.execute("SELECT * FROM results ORDER BY rowid"):
+                yield tuple(row)
+            return
+        rolls = [str(r) for r in rolls]
+        # batched IN (...) lookups on the primary key; stays under SQLite's bound-parameter limit
+        for i in range(0, len(rolls), 500):
+            batch = rolls[i:i + 500]
+            found = {row[0]: tuple(row) for row in
+                     conn.execute(f"SELECT * FROM results WHERE c1 IN ({', '.join('?' * len(batch))})", batch)}
+            for roll in batch:
+                if roll in found:
+                    yield found[roll]
+
+    def row_count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def _bump(self):
+        with self._version_lock:
+            self.version += 1
+
+    def current_version(self):
+        # commits by other processes change results.db or its -wal file
+        self._conn()
+        stamps = []
+        for path in (self.db_path, self.db_path.with_name(self.db_path.name + "-wal")):
+            try:
+                st = os.stat(path)
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append(None)
+        return (self.version, *stamps)
+
+    def update(self, roll, values, default_row=None):
+        roll = str(roll)
+        conn = self._conn()
+        need = max(list(values.keys()) + [len(default_row) if default_row else 0])
+        if need > self._ncols:
+            self._widen(conn, need)
+        if values:
+            assignments = ", ".join(f"c{c} = ?" for c in values)
+            cur = conn.execute(f"UPDATE results SET {assignments} WHERE c1 = ?", list(values.values()) + [roll])
+            if cur.rowcount:
+                self._bump()
+                return True
+        if default_row is None:
+            return False
+        row = [roll] + list(default_row[1:])
+        names = ", ".join(f"c{i}" for i in range(1, len(row) + 1))
+        conn.execute(f"INSERT OR IGNORE INTO results ({names}) VALUES ({', '.join('?' * len(row))})", row)
+        self._bump()
+        return True
+
+
+# ---------------- Read cache ----------------
+class ResultsReadCache:
+    """
+    Process-wide roll -> row cache in front of a results store. Each entry
+    remembers the store.current_version() it was read at; a read after a write
+    has landed (ours or another process's) refetches only that roll. Stores
+    that already serve reads from memory are passed straight through.
+    """
+    def __init__(self, store: ResultsStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Tuple[Any, Optional[Tuple]]] = {}  # roll -> (version, row)
+
+    def get(self, roll) -> Optional[Tuple]:
+        if self.store.in_memory:
+            return self.store.get(roll)
+        roll = str(roll)
+        version = self.store.current_version()
+        with self._lock:
+            entry = self._rows.get(roll)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+        # read after taking version: a write racing with it only makes the
+        # next read refetch again, never serve a stale row
+        row = self.store.get(roll)
+        with self._lock:
+            self._rows[roll] = (version, row)
+        return row
+
+
+def open_results_store(xlsx_path: Path, header: List, journal_path: Optional[Path] = None,
+                       seed: Optional[Callable[[], List[List]]] = None,
+                       backend: str = None, **kwargs) -> ResultsStore:
+    """Build the configured results backend ("xlsx" or "sqlite")."""
+    backend = (backend or RESULTS_BACKEND).lower()
+    if backend == "sqlite":
+        logger.info(f"[Results] Using SQLite results store at {RESULTS_DB_PATH}")
+        return SqliteResultsStore(RESULTS_DB_PATH, header, xlsx_path=xlsx_path, seed=seed)
+    if backend != "xlsx":
+        logger.warning(f"[Results] Unknown RESULTS_BACKEND={backend!r}; falling back to xlsx")
+    return XlsxResultsStore(xlsx_path, header, journal_path=journal_path, seed=seed, **kwargs)
@@ -0,0 +1,193 @@
+# roster.py
+# Struct-of-arrays student roster used by app.py (STUDENTS).
+#
+# Each field is one typed array indexed by student slot (roll -> slot via a
+# dict), so whole-cohort questions ("who still has marks == 0", "has everyone
+# entered ISA") are NumPy expressions instead of loops over per-student dicts.
+# roster[roll] returns a small dict-like view, so templates and existing code
+# keep using student["marks"] / student.status.
+from enum import IntEnum
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("Please install numpy: pip install numpy")
+
+
+class Status(IntEnum):
+    """Interned student status; stored as one byte per student."""
+    NORMAL = 0
+    WARNING = 1
+    TERMINATED = 2
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+    @classmethod
+    def parse(cls, value) -> "Status":
+        if isinstance(value, str):
+            return cls[value.upper()]
+        return cls(int(value))
+
+
+FIELDS = ("name", "marks", "isa", "flag", "status", "cheat_msg")
+
+
+class StudentView:
+    """Dict-like (and attribute) access to one roster slot; reads and writes go to the arrays."""
+    __slots__ = ("_roster", "_slot")
+
+    def __init__(self, roster: "Roster", slot: int):
+        self._roster = roster
+        self._slot = slot
+
+    def __getitem__(self, field):
+        return self._roster._get(self._slot, field)
+
+    def __setitem__(self, field, value):
+        self._roster._set(self._slot, field, value)
+
+    def __getattr__(self, field):
+        if field in FIELDS:
+            return self._roster._get(self._slot, field)
+        raise AttributeError(field)
+
+    def __contains__(self, field):
+        return field in FIELDS
+
+    def get(self, field, default=None):
+        return self._roster._get(self._slot, field) if field in FIELDS else default
+
+    def keys(self):
+        return list(FIELDS)
+
+    def items(self):
+        return [(f, self[f]) for f in FIELDS]
+
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"StudentView({self.to_dict()!r})"
+
+
+class Roster:
+    """
+    roll -> student record, stored as parallel arrays:
+    marks (int32), isa (int32 + has_isa mask), flag (uint8), status (uint8 Status),
+    plus Python lists for name and cheat_msg. Behaves like the old
+    Dict[str, Dict] for lookups and iteration.
+    """
+    def __init__(self, names: Mapping[str, str] = None, capacity: int = 8):
+        self._rolls: List[str] = []
+        self._slots: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.cheat_msgs: List[str] = []
+        capacity = max(capacity, len(names or ()))
+        self.marks = np.zeros(capacity, dtype=np.int32)
+        self.isa = np.zeros(capacity, dtype=np.int32)
+        self.has_isa = np.zeros(capacity, dtype=bool)
+        self.flag = np.zeros(capacity, dtype=np.uint8)
+        self.status = np.zeros(capacity, dtype=np.uint8)
+        for roll, name in (names or {}).items():
+            self.add(roll, name)
+
+    # ---- construction ----
+    def _grow(self):
+        for attr in ("marks", "isa", "has_isa", "flag", "status"):
+            old = getattr(self, attr)
+            new = np.zeros(max(8, old.shape[0] * 2), dtype=old.dtype)
+            new[:old.shape[0]] = old
+            setattr(self, attr, new)
+
+    def add(self, roll, name: str) -> StudentView:
+        roll = str(roll)
+        if roll in self._slots:
+            return self[roll]
+        slot = len(self._rolls)
+        if slot >= self.marks.shape[0]:
+            self._grow()
+        self._rolls.append(roll)
+        self._slots[roll] = slot
+        self.names.append(name)
+        self.cheat_msgs.append("")
+        return StudentView(self, slot)
+
+    # ---- per-slot access (used by StudentView) ----
+    def _get(self, slot: int, field: str):
+        if field == "name":
+            return self.names[slot]
+        if field == "cheat_msg":
+            return self.cheat_msgs[slot]
+        if field == "marks":
+            return int(self.marks[slot])
+        if field == "isa":
+            return int(self.isa[slot]) if self.has_isa[slot] else None
+        if field == "flag":
+            return int(self.flag[slot])
+        if field == "status":
+            return Status(int(self.status[slot])).label
+        raise KeyError(field)
+
+    def _set(self, slot: int, field: str, value):
+        if field == "name":
+            self.names[slot] = value
+        elif field == "cheat_msg":
+            self.cheat_msgs[slot] = value
+        elif field == "marks":
+            self.marks[slot] = int(value)
+        elif field == "isa":
+            self.has_isa[slot] = value is not None
+            self.isa[slot] = int(value) if value is not None else 0
+        elif field == "flag":
+            self.flag[slot] = min(int(value), 255)
+        elif field == "status":
+            self.status[slot] = Status.parse(value)
+        else:
+            raise KeyError(field)
+
+    # ---- dict-like interface ----
+    def __getitem__(self, roll) -> StudentView:
+        return StudentView(self, self._slots[str(roll)])
+
+    def __contains__(self, roll):
+        return str(roll) in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._rolls))
+
+    def __len__(self):
+        return len(self._rolls)
+
+    def get(self, roll, default=None):
+        slot = self._slots.get(str(roll))
+        return StudentView(self, slot) if slot is not None else default
+
+    def keys(self) -> List[str]:
+        return list(self._rolls)
+
+    def values(self) -> List[StudentView]:
+        return [StudentView(self, n) for n in range(len(self._rolls))]
+
+    def items(self) -> List[Tuple[str, StudentView]]:
+        return [(roll, StudentView(self, n)) for n, roll in enumerate(self._rolls)]
+
+    # ---- vectorized scans ----
+    def slot(self, roll) -> Optional[int]:
+        return self._slots.get(str(roll))
+
+    def rolls_where(self, mask: "np.ndarray") -> List[str]:
+        """Rolls whose slot is set in mask (a boolean array over the used slots)."""
+        return [self._rolls[n] for n in np.flatnonzero(mask[:len(self._rolls)])]
+
+    def column(self, field: str) -> "np.ndarray":
+        """View of a numeric field over the used slots, e.g. roster.column("marks") == 0."""
+        if field not in ("marks", "isa", "has_isa", "flag", "status"):
+            raise KeyError(field)
+        return getattr(self, field)[:len(self._rolls)]
+
+    def statuses(self, rolls: Iterable) -> "np.ndarray":
+        """Status codes for rolls, in that order (for grade_batch penalty masks)."""
+        return self.status[[self._slots[str(r)] for r in rolls]]
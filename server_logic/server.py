@@ -1,3 +1,5 @@
+import io
+import os
 import time
 import datetime
 import threading
@@ -12,12 +14,25 @@ from socketserver import ThreadingMixIn
 import xmlrpc.client
 import http.client
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 try:
-    from openpyxl import Workbook, load_workbook
+    from openpyxl import load_workbook
 except ImportError:
     raise SystemExit("Please install openpyxl: pip install openpyxl")
 
+from xlsx_io import RowIndex, iter_xlsx_rows, read_xlsx_row, serialize_rows, write_bytes_atomic
+from results_store import open_results_store
+from grading import AnswerSheet, answer_key, grade_batch
+from fanout import PendingWrites, acks_needed, fan_out
+from placement import ChunkPlacement
+from merkle import MerkleTree, load_trees, merkle_path
+from read_router import ReadRouter
+from chunk_format import chunk_slots, iter_chunk_rows, parse_chunk, read_chunk_row, serialize_chunk, update_chunk_row
+from erasure import ErasureError, encode, parse_fragment, reconstruct
+from throttle import IoBudget
+from chunk_lock import LOCK_MODE, ChunkLock, StripedLocks, start_lease_reaper, try_acquire_write_all
+
 # ---------------- CONFIG ----------------
 SERVER_HOST = "0.0.0.0"
 SERVER_PORT = 9000
@@ -32,13 +47,48 @@ RPC_TIMEOUT = 5.0
 
 # Replication / chunking defaults
 DEFAULT_REPLICATION_FACTOR = 3
-# chunk map: chunk_id -> list of roll strings
-DEFAULT_CHUNK_MAP = {
-    "chunk1": ["1", "2", "3"],
-    "chunk2": ["4", "5"]
-}
+DEFAULT_CHUNK_COUNT = 2
+# roll -> chunk -> replicas via a consistent-hash ring (same layout as app.py)
+PLACEMENT = ChunkPlacement(chunks=DEFAULT_CHUNK_COUNT, replicas=DEFAULT_REPLICATION_FACTOR,
+                           replication_factor=DEFAULT_REPLICATION_FACTOR)
 METADATA_PATH = Path("replication_metadata.json")
 
+# Results journal: with the xlsx backend, mark changes are appended here first
+# and compacted into results.xlsx by the store's background flusher
+RESULTS_HEADER = ["Roll", "Name", "Marks", "MCQ", "ISA"]
+# Replica rows carry a version column; quorum reads return the freshest of the
+# replies. Levels: ONE | QUORUM | ALL (writes default to REPLICA_ACK, see fanout.py)
+REPLICA_HEADER = RESULTS_HEADER + ["Version"]
+VERSION_COLUMN = len(REPLICA_HEADER)
+READ_CONSISTENCY = os.environ.get("READ_CONSISTENCY", "QUORUM")
+# Replica file format: "xlsx" (default) or "bin" (fixed-width records, see
+# chunk_format.py). results.xlsx stays the export format either way; existing
+# replicas keep the format their file suffix says.
+REPLICA_FORMAT = os.environ.get("REPLICA_FORMAT", "xlsx").lower()
+REPLICA_SCHEMA = [("Roll", "s16"), ("Name", "s64"), ("Marks", "i"), ("MCQ", "i"), ("ISA", "i"), ("Version", "q")]
+CHUNK_SUFFIX = ".chunk"
+REPLICA_SUFFIX = CHUNK_SUFFIX if REPLICA_FORMAT == "bin" else ".xlsx"
+# Replication mode: "replicate" (full copies, default) or "ec": each chunk is
+# Reed-Solomon coded into EC_DATA_FRAGMENTS + EC_PARITY_FRAGMENTS fragments,
+# one per replica (2+1 stores 1.5x and survives losing any one replica).
+# The mode of existing replicas comes from replication_metadata.json.
+REPLICATION_MODE = os.environ.get("REPLICATION_MODE", "replicate").lower()
+EC_DATA_FRAGMENTS = int(os.environ.get("EC_DATA_FRAGMENTS", "2"))
+EC_PARITY_FRAGMENTS = int(os.environ.get("EC_PARITY_FRAGMENTS", "1"))
+FRAGMENT_SUFFIX = ".frag"
+# Startup / on-demand repair pass: bytes per second it may read and write (0 = unthrottled)
+REPAIR_IO_BUDGET = float(os.environ.get("REPAIR_IO_BUDGET", str(64 * 1024 * 1024)))
+# ... and how many replica files it works on at once (kept below REPLICA_IO_WORKERS)
+REPAIR_IO_WORKERS = int(os.environ.get("REPAIR_IO_WORKERS", "2"))
+JOURNAL_PATH = Path("results.journal")
+JOURNAL_COMPACT_INTERVAL = 10.0   # seconds between background compactions
+JOURNAL_COMPACT_RECORDS = 200     # compact early once this many records are pending
+
+# roll -> row number for results.xlsx and every replica chunk file
+row_index = RowIndex()
+# spreads request_read over healthy replicas; tracks per-replica read counts
+read_router = ReadRouter()
+
 # ---------------- LOGGING ----------------
 logging.basicConfig(
     level=logging.INFO,
@@ -120,14 +170,15 @@ MCQ_QUESTIONS = {
     10: {"q": "Which data structure logs RA intents in server.py?",
          "options": ["list", "heap", "set", "dict"], "answer": 2}
 }
+MCQ_QIDS, MCQ_KEY = answer_key(MCQ_QUESTIONS)
 
 # MCQ state
 mcq_lock = threading.Lock()
 mcq_active = False
 mcq_start_time = None
 mcq_deadline = None
-# student-specific answers: student_roll -> {qnum:int}
-mcq_student_answers: Dict[str, Dict[int,int]] = {}
+# student-specific answers: one byte per question per student slot (0 = skipped)
+mcq_student_answers = AnswerSheet(MCQ_QIDS, capacity=len(roll_to_name))
 mcq_submitted_students: Set[str] = set()
 mcq_final_scores: Dict[str,int] = {}
 
@@ -146,6 +197,11 @@ isa_ok_counts: Dict[str, Set[str]] = {}
 replication_metadata: Dict[str, Any] = {}
 replication_lock = threading.Lock()
 
+# Results store: journaled, write-behind results.xlsx (or results.db with RESULTS_BACKEND=sqlite)
+results_store = open_results_store(excel_path, RESULTS_HEADER, journal_path=JOURNAL_PATH,
+                                   flush_interval=JOURNAL_COMPACT_INTERVAL,
+                                   dirty_threshold=JOURNAL_COMPACT_RECORDS)
+
 # ---------------- MCQ API  ----------------
 def start_mcq():
     """
@@ -156,7 +212,7 @@ def start_mcq():
         mcq_active = True
         mcq_start_time = time.time()
         mcq_deadline = mcq_start_time + EXAM_DURATION
-        mcq_student_answers = {}
+        mcq_student_answers = AnswerSheet(MCQ_QIDS, capacity=len(roll_to_name))
         mcq_submitted_students = set()
         mcq_final_scores = {}
     logger.info(f"[{datetime.datetime.now()}] [Server] MCQ started for duration {EXAM_DURATION} seconds.")
@@ -190,7 +246,7 @@ def submit_mcq_answer(roll: str, qnum: int, answer):
     except Exception:
         ans_i = 0
     with mcq_lock:
-        mcq_student_answers.setdefault(roll, {})[qnum] = ans_i
+        mcq_student_answers.record(roll, qnum, ans_i)
     logger.info(f"[{datetime.datetime.now()}] [Server] Recorded answer roll={roll} q={qnum} ans={ans_i}")
     return True
 
@@ -200,20 +256,26 @@ CAP = 3                       # main server handles first CAP submissions in eac
 submission_history = deque()  # elements are (ts_ms:int, roll:str)
 submission_lock = threading.Lock()
 
-def _finalize_and_record(roll: str):
-    """Existing local logic separated for reuse."""
+def _grade_rolls(rolls: List[str]) -> Dict[str, int]:
+    """
+    Grade the given students in one vectorized pass: roll -> raw MCQ score.
+    Cheating deductions are applied by the teacher (deduct_marks), not here.
+    Caller holds mcq_lock.
+    """
+    rolls = [str(r) for r in rolls]
+    if not rolls:
+        return {}
+    matrix, rows = mcq_student_answers.indexed(rolls)
+    return dict(zip(rolls, grade_batch(matrix, MCQ_KEY, rows=rows).tolist()))
+
+def _finalize_and_record(roll: str, final: int = None):
+    """Existing local logic separated for reuse. final may be pre-computed by a cohort grading pass."""
     roll = str(roll)
     with mcq_lock:
         if roll in mcq_submitted_students:
             return True
-        answers = mcq_student_answers.get(roll, {})
-        raw = 0
-        for qnum, qdef in MCQ_QUESTIONS.items():
-            given = int(answers.get(qnum, 0) or 0)
-            if given != 0 and given == qdef["answer"]:
-                raw += 10
-
-        final = raw
+        if final is None:
+            final = _grade_rolls([roll])[roll]
         mcq_final_scores[roll] = final
         mcq_submitted_students.add(roll)
 
@@ -225,27 +287,10 @@ def _finalize_and_record(roll: str):
     except Exception as e:
         logger.warning("[Server] WARN teacher.update_mcq_marks: %s", e)
 
-    # update excel 
+    # record in results store (journaled; written to results.xlsx in the background)
     try:
-        with _intent_lock:
-            if not excel_path.exists():
-                wb = Workbook()
-                ws = wb.active
-                ws.append(["Roll","Name","Marks","MCQ","ISA"])
-                wb.save(excel_path)
-            wb = load_workbook(excel_path)
-            ws = wb.active
-            updated = False
-            for row in ws.iter_rows(min_row=2):
-                if row and str(row[0].value) == str(roll):
-                    while ws.max_column < 5:
-                        ws.cell(row=1, column=ws.max_column+1, value=None)
-                    ws.cell(row=row[0].row, column=4, value=int(final))
-                    updated = True
-                    break
-            if not updated:
-                ws.append([roll, roll_to_name.get(roll, f"Student{roll}"), "NA", int(final), "NA"])
-            wb.save(excel_path)
+        results_store.update(roll, {4: int(final)},
+                             [roll, roll_to_name.get(roll, f"Student{roll}"), "NA", int(final), "NA"])
     except Exception as e:
         logger.warning("[Server] WARN writing MCQ result to excel: %s", e)
 
@@ -257,6 +302,10 @@ def submit_mcq_final(roll: str):
     If more than CAP submissions occur within SUBMISSION_WINDOW_MS,
     overflow is redirected to backup to ensure 3/2 split.
     """
+    return _submit_mcq_final(roll)
+
+def _submit_mcq_final(roll: str, final: int = None):
+    """submit_mcq_final, optionally with a score already computed by _grade_rolls."""
     roll = str(roll)
     now_ms = int(time.time() * 1000)
 
@@ -277,7 +326,7 @@ def submit_mcq_final(roll: str):
         if idx >= local_limit:
             # redirect this submission to backup
             try:
-                answers = mcq_student_answers.get(roll, {})
+                answers = mcq_student_answers.answers(roll)
                 # Convert keys to strings for XML-RPC
                 answers_str_keys = {str(k): v for k, v in answers.items()}
                 logger.info(f"[{datetime.datetime.now()}] [Server] Redirecting roll={roll} to backup {BACKUP_HOST}:{BACKUP_PORT}")
@@ -287,7 +336,7 @@ def submit_mcq_final(roll: str):
                 logger.error(f"[{datetime.datetime.now()}] [Server] ERROR redirecting to backup: {e}. Falling back to local processing.")
 
     # process locally
-    return _finalize_and_record(roll)
+    return _finalize_and_record(roll, final)
 
 
 # API for backup to push computed results back to main server
@@ -319,27 +368,10 @@ def accept_backup_result(roll: str, final_mark: int):
     except Exception as e:
         logger.warning("[Server] WARN teacher.update_mcq_marks (from backup): %s", e)
 
-    # Update Excel (unchanged)
+    # Record in results store
     try:
-        with _intent_lock:
-            if not excel_path.exists():
-                wb = Workbook()
-                ws = wb.active
-                ws.append(["Roll","Name","Marks","MCQ","ISA"])
-                wb.save(excel_path)
-            wb = load_workbook(excel_path)
-            ws = wb.active
-            updated = False
-            for row in ws.iter_rows(min_row=2):
-                if row and str(row[0].value) == str(roll):
-                    while ws.max_column < 4:
-                        ws.cell(row=1, column=ws.max_column+1, value=None)
-                    ws.cell(row=row[0].row, column=4, value=int(final))
-                    updated = True
-                    break
-            if not updated:
-                ws.append([roll, roll_to_name.get(roll, f"Student{roll}"), "NA", int(final), "NA"])
-            wb.save(excel_path)
+        results_store.update(roll, {4: int(final)},
+                             [roll, roll_to_name.get(roll, f"Student{roll}"), "NA", int(final), "NA"])
     except Exception as e:
         logger.warning("[Server] WARN writing MCQ result to excel (from backup): %s", e)
 
@@ -353,6 +385,8 @@ def _auto_submit_pending_mcq():
     with mcq_lock:
         pending = [r for r in students_registry.keys()
                    if r not in mcq_submitted_students and r not in terminated_students]
+        # one grading pass for the whole cohort (used for every roll processed locally)
+        scores = _grade_rolls(pending)
 
     logger.info(f"[{datetime.datetime.now()}] [Server] Auto-submitting pending MCQ for: {pending}")
 
@@ -360,17 +394,17 @@ def _auto_submit_pending_mcq():
         try:
             if idx < 3:
                 # process locally
-                submit_mcq_final(r)
+                _submit_mcq_final(r, scores.get(r))
             else:
                 # redirect to backup
-                answers = mcq_student_answers.get(r, {})
+                answers = mcq_student_answers.answers(r)
                 answers_str_keys = {str(k): v for k, v in answers.items()}
                 try:
                     backup_proxy.submit_mcq_final(r, answers_str_keys)
                 except Exception as e:
                     logger.error(f"[{datetime.datetime.now()}] [Server] ERROR redirecting auto-submission roll={r} to backup: {e}")
                     # fallback to local
-                    submit_mcq_final(r)
+                    _submit_mcq_final(r, scores.get(r))
 
             # notify student of auto-submission
             if r in students_registry:
@@ -584,39 +618,14 @@ def ok_signal(from_roll: str, to_roll: str):
 
 def update_isa(roll: str, isa_value: int):
     with isa_lock:
-        tries = 5
-        saved = False
-        for i in range(tries):
-            try:
-                if not excel_path.exists():
-                    wb = Workbook()
-                    ws = wb.active
-                    ws.append(["Roll","Name","Marks","MCQ","ISA"])
-                    wb.save(excel_path)
-                wb = load_workbook(excel_path)
-                ws = wb.active
-                updated = False
-                for row in ws.iter_rows(min_row=2):
-                    if row and str(row[0].value) == str(roll):
-                        while ws.max_column < 4:
-                            ws.cell(row=1, column=ws.max_column+1, value=None)
-                        ws.cell(row=row[0].row, column=5, value=int(isa_value))
-                        updated = True
-                        break
-                if not updated:
-                    ws.append([roll, roll_to_name.get(roll, f"Student{roll}"), "NA", "NA", int(isa_value)])
-                wb.save(excel_path)
-                saved = True
-                _sync_replicas_from_master()
-                break
-            except PermissionError:
-                logger.warning("[Server] Excel file locked. Retrying...")
-                time.sleep(0.5)
-            except Exception as e:
-                logger.error("[Server] Unexpected error saving excel: %s", e)
-                break
-        if not saved:
-            logger.error("[Server] Failed to save ISA after retries.")
+        try:
+            results_store.update(str(roll), {5: int(isa_value)},
+                                 [str(roll), roll_to_name.get(str(roll), f"Student{roll}"), "NA", "NA", int(isa_value)])
+            # replicas of the touched chunk are refreshed by the replication worker, off the CS
+            _next_row_version(str(roll))
+            _mark_chunks_dirty([_get_chunk_for_roll(roll)])
+        except Exception as e:
+            logger.error("[Server] Failed to record ISA: %s", e)
 
         isa_completed.add(str(roll))
         logger.info(f"[{datetime.datetime.now()}] [Server] Roll {roll} updated ISA={isa_value} and exited CS.")
@@ -675,6 +684,12 @@ def _check_done_ra():
     pending = [r for r in students_registry.keys() if r not in isa_completed]
     if not pending:
         logger.info(f"[{datetime.datetime.now()}] [Server] (RA_MODE) ISA phase completed for all students.")
+        if not wait_for_replication():
+            logger.warning("[Replication] Replicas still re-syncing at ISA end")
+        try:
+            results_store.export_xlsx(excel_path)
+        except Exception as e:
+            logger.error(f"[Server] Writing results.xlsx at ISA end failed: {e}")
         for roll, url in students_registry.items():
             try:
                 new_proxy(url).isa_phase_done(str(excel_path.resolve()))
@@ -697,21 +712,15 @@ def exam_completed():
     # Fetch results from Teacher & write initial results to Excel
     try:
         results = teacher_proxy.get_results()
-        if not excel_path.exists():
-            wb = Workbook()
-            ws = wb.active
-            ws.append(["Roll","Name","Marks","MCQ","ISA"])
-            for row in results:
-                if len(row) == 3:
-                    r, name, marks = row
-                    mcq_val = "NA"
-                elif len(row) >= 4:
-                    r, name, marks, mcq_val = row[0], row[1], row[2], row[3]
-                else:
-                    r, name, marks = row[0], row[1], row[2]
-                    mcq_val = "NA"
-                ws.append([r, name, marks, mcq_val, "NA"])
-            wb.save(excel_path)
+        for row in results:
+            if len(row) >= 4:
+                r, name, marks, mcq_val = row[0], row[1], row[2], row[3]
+            else:
+                r, name, marks = row[0], row[1], row[2]
+                mcq_val = "NA"
+            # insert-only: rows already recorded by MCQ submissions are left as they are
+            results_store.update(str(r), {}, [str(r), name, marks, mcq_val, "NA"])
+        results_store.export_xlsx(excel_path)
         logger.info(f"[Server] Wrote initial results to {excel_path.resolve()}")
     except Exception as e:
         logger.error(f"[Server] ERROR fetching results from Teacher: {e}")
@@ -740,91 +749,154 @@ def announce_results(data):
 
 
 # ---------------- Replication & Chunking (HDFS-like) ----------------
-def _read_results_rows():
+def _read_results_rows(rolls: List[str] = None):
     """
-    Read results.xlsx and return header + rows (each row is tuple of values)
+    Return header + a lazy iterator of rows (tuples) from the results store.
+    rolls pushes the chunk filter down to the store (dict / primary-key lookups)
+    instead of scanning every row.
     """
-    if not excel_path.exists():
-        logger.error("[Server] Results file not found: results.xlsx")
-        return None, []
     try:
-        wb = load_workbook(excel_path)
-        ws = wb.active
-        header = [c for c in next(ws.iter_rows(min_row=1, max_row=1, values_only=True))]
-        rows = []
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            rows.append(tuple(row))
-        return header, rows
+        if results_store.row_count() == 0:
+            logger.error("[Server] Results file not found or empty: results.xlsx")
+            return None, iter(())
+        return list(results_store.header), results_store.iter_rows(rolls)
     except Exception as e:
-        logger.error(f"[Server] Error reading results.xlsx: {e}")
-        return None, []
+        logger.error(f"[Server] Error reading results: {e}")
+        return None, iter(())
 
-def _filter_rows_for_rolls(rows, rolls: List[str]):
-    """
-    rows: list of tuples where first column is roll
-    returns subset of rows matching rolls (string/int tolerant)
-    """
-    rolls_set = set(str(r) for r in rolls)
-    selected = [r for r in rows if str(r[0]) in rolls_set]
-    return selected
+def _is_chunk_file(path) -> bool:
+    return Path(path).suffix == CHUNK_SUFFIX
 
-def _write_chunk_excel(filepath: Path, header: List[str], rows: List[Tuple]):
+def _serialize_replica(rows, binary: bool = None) -> Tuple[bytes, List[str]]:
+    """Encode replica rows as a binary chunk or an xlsx workbook (default: REPLICA_FORMAT)."""
+    if binary is None:
+        binary = REPLICA_FORMAT == "bin"
+    return serialize_chunk(REPLICA_SCHEMA, rows) if binary else serialize_rows(REPLICA_HEADER, rows)
+
+def _read_replica_row(path: Path, roll: str):
+    hint = row_index.peek(path, roll)
+    if _is_chunk_file(path):
+        return read_chunk_row(path, roll, slot_hint=hint)
+    return read_xlsx_row(path, roll, row_hint=hint)
+
+def _iter_replica_rows(path: Path):
+    return iter_chunk_rows(path) if _is_chunk_file(path) else iter_xlsx_rows(path)
+
+def _write_chunk_bytes(filepath: Path, data: bytes, rolls: List[str]):
     """
-    Write header + rows to an Excel file at filepath
+    Write an already-serialized chunk (see _serialize_replica) to one replica file
     """
     try:
-        wb = Workbook()
-        ws = wb.active
-        ws.append(header)
-        for r in rows:
-            ws.append(list(r))
-        wb.save(filepath)
+        write_bytes_atomic(filepath, data)
+        # row_index holds worksheet rows for xlsx replicas and record slots for binary ones
+        first = 0 if _is_chunk_file(filepath) else 2
+        row_index.record(filepath, {r: n for n, r in enumerate(rolls, start=first)})
+        read_router.note_write(filepath, True)
         logger.info(f"[Server] Wrote chunk file: {filepath}")
         return True
     except Exception as e:
+        read_router.note_write(filepath, False)
         logger.error(f"[Server] Failed writing chunk file {filepath}: {e}")
         return False
 
-def create_replicas_and_chunks(replication_factor: int = DEFAULT_REPLICATION_FACTOR, chunk_map: Dict[str, List[str]] = DEFAULT_CHUNK_MAP):
+def _save_workbook_atomic(wb, path: Path):
+    """Save an edited replica workbook via temp file + rename, so concurrent readers never see a torn file."""
+    buf = io.BytesIO()
+    wb.save(buf)
+    write_bytes_atomic(path, buf.getvalue())
+
+# roll -> version of its latest write (microsecond clock, so a new write outranks any before a restart).
+# Only writes made by this process are known here; _seed_row_versions reloads the
+# versions the replicas carry at startup so untouched rows keep theirs.
+_row_versions: Dict[str, int] = {}
+_row_version_lock = threading.Lock()
+
+def _next_row_version(roll: str) -> int:
+    with _row_version_lock:
+        v = max(_row_versions.get(roll, 0) + 1, time.time_ns() // 1000)
+        _row_versions[roll] = v
+        return v
+
+def _versioned_rows(rows):
+    """Master rows as replica rows: padded to RESULTS_HEADER, plus the roll's current version."""
+    width = len(RESULTS_HEADER)
+    for r in rows:
+        r = list(r[:width]) + [None] * (width - len(r))
+        yield tuple(r) + (_row_versions.get(str(r[0]), 0),)
+
+def _row_version(row) -> int:
+    return int(row[VERSION_COLUMN - 1] or 0) if len(row) >= VERSION_COLUMN else 0
+
+def create_replicas_and_chunks(replication_factor: int = DEFAULT_REPLICATION_FACTOR, chunk_map: Dict[str, List[str]] = None):
     """
     Create replicas and chunks from the authoritative results.xlsx.
-    - replication_factor: number of replicas to create
-    - chunk_map: mapping chunk_id -> list of roll strings
+    - replication_factor: number of replicas each chunk is written to
+    - chunk_map: mapping chunk_id -> list of roll strings (default: from PLACEMENT)
     Persist metadata to replication_metadata.json and keep in memory.
     """
+    global PLACEMENT
     header, rows = _read_results_rows()
     if header is None:
         logger.error("[Server] Cannot create replicas: results.xlsx unavailable or unreadable.")
         return False
 
+    erasure = REPLICATION_MODE == "ec"
+    if erasure:
+        # one fragment per replica: k + m replicas, each chunk spread over all of them
+        replication_factor = EC_DATA_FRAGMENTS + EC_PARITY_FRAGMENTS
+    placement = PLACEMENT
+    if placement.replication_factor != int(replication_factor):
+        placement = placement.with_replication(replication_factor)
+    if chunk_map is None:
+        chunk_map = placement.chunk_map(str(r[0]) for r in rows)
+
     meta = {
         "created_at": datetime.datetime.now().isoformat(),
         "replication_factor": int(replication_factor),
+        "placement": placement.to_dict(),  # ring parameters, so lookups match the files
         "chunks": {},  # chunk_id -> rolls
         "replicas": {}  # replica_id -> {chunk_id: filepath, ...}
     }
-
-    # Prepare chunks content
-    chunk_contents: Dict[str, List[Tuple]] = {}
-    for chunk_id, rolls in chunk_map.items():
-        selected = _filter_rows_for_rolls(rows, rolls)
-        chunk_contents[chunk_id] = selected
-        meta["chunks"][chunk_id] = {"rolls": list(rolls), "count": len(selected)}
-
-    # Create replicas
-    for r_idx in range(1, int(replication_factor)+1):
-        replica_key = f"replica_{r_idx}"
-        meta["replicas"][replica_key] = {}
-        for chunk_id, content_rows in chunk_contents.items():
-            filename = f"replica_{r_idx}_{chunk_id}.xlsx"
-            path = Path(filename).resolve()
-            ok = _write_chunk_excel(path, header, content_rows)
-            if not ok:
-                logger.error(f"[Server] Failed to create replica file {filename}")
+    if erasure:
+        meta["erasure"] = {"k": EC_DATA_FRAGMENTS, "m": EC_PARITY_FRAGMENTS}
+
+    for replica_id in placement.replicas:
+        meta["replicas"][replica_id] = {}
+
+    for chunk_id, rolls in (chunk_map.items() if erasure else ()):
+        _, chunk_rows = _read_results_rows(rolls)
+        chunk_rows = list(_versioned_rows(chunk_rows))
+        targets = {i: Path(f"{replica_id}_{chunk_id}{FRAGMENT_SUFFIX}").resolve()
+                   for i, replica_id in enumerate(placement.fragment_replicas(chunk_id))}
+        _, results = _write_fragments(meta["erasure"], chunk_rows, targets, policy="all")
+        meta["chunks"][chunk_id] = {"rolls": list(rolls), "count": len(chunk_rows), "fragments": {}}
+        for i, replica_id in enumerate(placement.fragment_replicas(chunk_id)):
+            if not results.get(targets[i]):
+                logger.error(f"[Server] Failed to create fragment file {targets[i].name}")
+            meta["chunks"][chunk_id]["fragments"][replica_id] = i
+            meta["replicas"][replica_id][chunk_id] = {"path": str(targets[i]), "fragment": i, "rows": len(chunk_rows)}
+
+    # Serialize each chunk once (streaming, write-only) and reuse the bytes for every replica
+    for chunk_id, rolls in (() if erasure else chunk_map.items()):
+        _, chunk_rows = _read_results_rows(rolls)
+        chunk_rows = list(_versioned_rows(chunk_rows))
+        data, chunk_rolls = _serialize_replica(chunk_rows)
+        meta["chunks"][chunk_id] = {"rolls": list(rolls), "count": len(chunk_rolls)}
+        paths = {replica_id: Path(f"{replica_id}_{chunk_id}{REPLICA_SUFFIX}").resolve()
+                 for replica_id in placement.replicas_for_chunk(chunk_id)}
+        # write every replica of the chunk concurrently; creation waits for all of them
+        _, results = fan_out({path: (lambda p=path, d=data, r=chunk_rolls: _write_chunk_bytes(p, d, r))
+                              for path in paths.values()}, policy="all")
+        tree = MerkleTree.build(chunk_rows)
+        for replica_id, path in paths.items():
+            if not results.get(path):
+                logger.error(f"[Server] Failed to create replica file {path.name}")
+            else:
+                _note_replica_tree(replica_id, chunk_id, path, tree)
             # store path and basic metadata
-            meta["replicas"][replica_key][chunk_id] = {
+            meta["replicas"][replica_id][chunk_id] = {
                 "path": str(path),
-                "rows": len(content_rows)
+                "rows": len(chunk_rolls)
             }
 
     # persist metadata
@@ -832,12 +904,14 @@ def create_replicas_and_chunks(replication_factor: int = DEFAULT_REPLICATION_FAC
         with replication_lock:
             global replication_metadata
             replication_metadata = meta
+            PLACEMENT = placement
             with open(METADATA_PATH, "w", encoding="utf-8") as fh:
                 json.dump(meta, fh, indent=2)
         logger.info(f"[Server] Replication metadata written to {METADATA_PATH}")
     except Exception as e:
         logger.error(f"[Server] Failed writing replication metadata: {e}")
         return False
+    _save_merkle_trees()
 
 
     global chunk_locks
@@ -873,70 +947,634 @@ def _prompt_and_create_replication():
         
  
  
-def _sync_replicas_from_master():
-    """Refresh replica chunk files from results.xlsx after any update."""
+def _sync_replicas_from_master(only_chunks: Set[str] = None) -> bool:
+    """
+    Refresh replica chunk files from results.xlsx (every chunk, or just only_chunks).
+    True once every chunk's replicas acknowledged the rewrite; returns only after
+    every write finished, acknowledged in time or not.
+    """
     header, rows = _read_results_rows()
     if header is None:
-        return
+        return False
+    synced = True
+    rolls_by_chunk = PLACEMENT.chunk_map(str(r[0]) for r in rows)
     with replication_lock:
+        # chunk -> {replica_id: path}, so each chunk is serialized once for all its replicas
+        paths_by_chunk: Dict[str, Dict[str, Path]] = {}
         for replica_id, chunks in replication_metadata.get("replicas", {}).items():
             for chunk_id, info in chunks.items():
-                path = Path(info["path"])
-                rolls = DEFAULT_CHUNK_MAP.get(chunk_id, [])
-                selected = _filter_rows_for_rolls(rows, rolls)
-                _write_chunk_excel(path, header, selected)
-                
-    
-# ---------------- Consistency & Lock Manager ----------------  
-    
-class ChunkLock:
-    """Readers-writers lock with writer-preference for a single chunk id."""
-    def __init__(self, chunk_id):
-        self.chunk_id = chunk_id
-        self.readers = 0
-        self.writer_active = False
-        self.waiting_writers = 0
-        self.condition = threading.Condition()
-
-    def acquire_read(self, roll):
-        with self.condition:
-            while self.writer_active or self.waiting_writers > 0:
-                self.condition.wait()
-            self.readers += 1
-            logger.info(f"[Lock] Roll {roll} acquired READ lock on {self.chunk_id} (readers={self.readers})")
-
-    def release_read(self, roll):
-        with self.condition:
-            if self.readers <= 0:
-                logger.warning(f"[Lock] Roll {roll} attempted to release READ lock on {self.chunk_id} but readers==0")
-                return
-            self.readers -= 1
-            logger.info(f"[Lock] Roll {roll} released READ lock on {self.chunk_id} (readers={self.readers})")
-            if self.readers == 0:
-                self.condition.notify_all()
-
-    def acquire_write(self, roll):
-        with self.condition:
-            self.waiting_writers += 1
+                if only_chunks is None or chunk_id in only_chunks:
+                    paths_by_chunk.setdefault(chunk_id, {})[replica_id] = Path(info["path"])
+        for chunk_id, paths in paths_by_chunk.items():
+            _, chunk_rows = _read_results_rows(rolls_by_chunk.get(chunk_id, []))
+            chunk_rows = list(_versioned_rows(chunk_rows))
+            late = []
+            if _erasure_params():
+                acked, _ = _write_fragments(_erasure_params(), chunk_rows, _fragment_paths(chunk_id), stragglers=late)
+                pending_writes.add(chunk_id, late)
+                pending_writes.settle(chunk_id)
+                if not acked:
+                    logger.error(f"[Replication] {chunk_id}: not enough fragments acknowledged the re-encode")
+                    synced = False
+                continue
+            encoded = {binary: _serialize_replica(chunk_rows, binary)
+                       for binary in {_is_chunk_file(p) for p in paths.values()}}
+            acked, results = fan_out({path: (lambda p=path, e=encoded[_is_chunk_file(path)]: _write_chunk_bytes(p, *e))
+                                      for path in paths.values()}, stragglers=late)
+            pending_writes.add(chunk_id, late)
+            pending_writes.settle(chunk_id)
+            if not acked:
+                logger.error(f"[Replication] {chunk_id}: not enough replicas acknowledged the re-sync")
+                synced = False
+            tree = MerkleTree.build(chunk_rows)
+            for replica_id, path in paths.items():
+                if results.get(path):
+                    _note_replica_tree(replica_id, chunk_id, path, tree)
+    _save_merkle_trees()
+    return synced
+
+# ---------------- Background replication ----------------
+# Writers only mark the chunks they touched; one worker thread re-syncs them,
+# coalescing bursts of updates to the same chunk into a single rewrite. Each
+# chunk is re-synced under its write locks (like scrub and repair); a chunk
+# leaves the dirty set only once its sync succeeded and nobody marked it again
+# meanwhile. Busy or failed chunks are retried every REPLICATION_RETRY_INTERVAL.
+_dirty_chunks: Dict[str, int] = {}   # chunk -> sequence number of its latest mark
+_dirty_seq = 0
+_replication_cond = threading.Condition()
+_replication_busy = False
+_replication_thread = None
+REPLICATION_DRAIN_TIMEOUT = 30.0   # seconds to wait for pending re-syncs at phase boundaries
+REPLICATION_RETRY_INTERVAL = 0.5   # seconds before retrying chunks that were locked or failed
+
+def _mark_chunks_dirty(chunks):
+    global _dirty_seq
+    with _replication_cond:
+        for chunk_id in chunks:
+            if chunk_id:
+                _dirty_seq += 1
+                _dirty_chunks[chunk_id] = _dirty_seq
+        _replication_cond.notify_all()
+    _start_replication_worker()
+
+def _sync_chunk_locked(chunk_id: str) -> bool:
+    """Re-sync one chunk while holding its write locks; False if it was busy or the sync failed."""
+    held = _try_lock_replicas(chunk_id, "replicator")
+    if not held:
+        return False
+    try:
+        return _sync_replicas_from_master({chunk_id})
+    except Exception as e:
+        logger.error(f"[Replication] Re-sync of {chunk_id} failed: {e}")
+        return False
+    finally:
+        _release_locks(held, "replicator")
+
+def _replication_worker():
+    global _replication_busy
+    retry = False
+    while True:
+        with _replication_cond:
+            if retry:
+                _replication_cond.wait(REPLICATION_RETRY_INTERVAL)
+            while not _dirty_chunks:
+                _replication_cond.wait()
+            chunks = dict(_dirty_chunks)
+            _replication_busy = True
+        synced = []
+        try:
+            synced = [chunk_id for chunk_id in sorted(chunks) if _sync_chunk_locked(chunk_id)]
+            if synced:
+                logger.info(f"[Replication] Re-synced replicas of {synced}")
+        finally:
+            with _replication_cond:
+                for chunk_id in synced:
+                    if _dirty_chunks.get(chunk_id) == chunks[chunk_id]:
+                        del _dirty_chunks[chunk_id]
+                retry = len(synced) < len(chunks)
+                _replication_busy = False
+                _replication_cond.notify_all()
+
+def _start_replication_worker():
+    global _replication_thread
+    with _replication_cond:
+        if _replication_thread is not None and _replication_thread.is_alive():
+            return
+        _replication_thread = threading.Thread(target=_replication_worker, daemon=True, name="replication-worker")
+        _replication_thread.start()
+
+def wait_for_replication(timeout: float = REPLICATION_DRAIN_TIMEOUT) -> bool:
+    """Block until every dirty chunk has been re-synced; False on timeout."""
+    with _replication_cond:
+        return _replication_cond.wait_for(lambda: not _dirty_chunks and not _replication_busy, timeout)
+
+# ---------------- Anti-entropy scrubber ----------------
+# Every replica file has a row-hash Merkle tree (replication_metadata.merkle.json),
+# stamped with the file's (mtime, size). Trees of files we wrote ourselves are
+# recorded at write time; any other change to a file forces a rebuild from it.
+# The scrubber compares each replica's root with the master's tree for the chunk
+# and rewrites only the rows of buckets whose hashes differ.
+SCRUB_INTERVAL = 60.0   # seconds between scrub passes
+_merkle_trees: Dict[str, Dict[str, Dict]] = load_trees(METADATA_PATH)
+_merkle_lock = threading.Lock()
+_scrub_thread = None
+
+def _file_stamp(path: Path):
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+def _note_replica_tree(replica_id: str, chunk_id: str, path: Path, tree: MerkleTree):
+    try:
+        entry = {"stamp": _file_stamp(path), "tree": tree.to_dict()}
+    except OSError:
+        return
+    with _merkle_lock:
+        _merkle_trees.setdefault(replica_id, {})[chunk_id] = entry
+
+def _save_merkle_trees():
+    with _merkle_lock:
+        data = json.dumps(_merkle_trees).encode("utf-8")
+    try:
+        write_bytes_atomic(merkle_path(METADATA_PATH), data)
+    except Exception as e:
+        logger.error(f"[Scrub] Failed writing Merkle trees: {e}")
+
+def _replica_tree(replica_id: str, chunk_id: str, path: Path, verify: bool = False) -> MerkleTree:
+    """Stored tree if the file is unchanged since it was recorded, else (or with verify) rebuilt from the file."""
+    with _merkle_lock:
+        entry = _merkle_trees.get(replica_id, {}).get(chunk_id)
+    if not verify and entry is not None and entry.get("stamp") == _file_stamp(path):
+        return MerkleTree.from_dict(entry["tree"])
+    tree = MerkleTree.build(_iter_replica_rows(path))
+    _note_replica_tree(replica_id, chunk_id, path, tree)
+    return tree
+
+def _repair_chunk_records(path: Path, master_rows: Dict[str, Tuple], rolls: List[str],
+                          chunk_rolls: List[str]) -> int:
+    """Binary replica: pwrite each divergent record in place; rows to add or drop mean a full rewrite."""
+    slots = chunk_slots(path)
+    if all(r in slots and r in master_rows for r in rolls):
+        for roll in rolls:
+            update_chunk_row(path, roll, dict(enumerate(master_rows[roll], start=1)), slot_hint=slots[roll])
+        row_index.touch(path)
+        return len(rolls)
+    data, written = _serialize_replica((master_rows[r] for r in chunk_rolls), True)
+    if not _write_chunk_bytes(path, data, written):
+        raise IOError(f"rewrite of {path.name} failed")
+    return len(rolls)
+
+def _repair_rows(path: Path, master_rows: Dict[str, Tuple], rolls: List[str]) -> int:
+    """Make rolls in the replica at path match master_rows (rewrite, append or drop); returns rows touched."""
+    wb = load_workbook(path)
+    ws = wb.active
+    touched, drop = 0, []
+    for roll in rolls:
+        n = row_index.locate(path, ws, roll)
+        row = master_rows.get(roll)
+        if row is None:
+            if n is not None:
+                drop.append(n)
+            continue
+        if n is None:
+            ws.append(list(row))
+            row_index.note_append(path, roll, ws.max_row)
+        else:
+            for col in range(1, max(len(row), ws.max_column) + 1):
+                ws.cell(row=n, column=col, value=row[col - 1] if col <= len(row) else None)
+        touched += 1
+    for n in sorted(drop, reverse=True):
+        ws.delete_rows(n)
+    _save_workbook_atomic(wb, path)
+    if drop:
+        row_index.forget(path)
+    else:
+        row_index.touch(path)
+    return touched + len(drop)
+
+def _try_lock_replicas(chunk_id: str, owner: str = "scrubber", already: List[ChunkLock] = ()) -> List[ChunkLock]:
+    """
+    Write-lock every replica lock of chunk_id (and its stripe in LOCK_MODE=chunk)
+    at once without waiting, as non-expiring grants; locks in already are skipped.
+    Returns the locks taken, or [] if any was busy (then none are held).
+    """
+    locks = [striped_locks.for_chunk(chunk_id)] if LOCK_MODE == "chunk" else []
+    locks += [chunk_locks.setdefault(key, ChunkLock(key)) for key in _get_replica_chunks(chunk_id)]
+    locks = [lock for lock in locks if not any(lock is h for h in already)]
+    ok, _, _ = try_acquire_write_all(locks, owner, expires=False)
+    if not ok:
+        return []
+    pending_writes.settle(chunk_id)
+    return locks
+
+def _release_locks(locks: List[ChunkLock], owner: str):
+    for lock in reversed(locks):
+        lock.release_write(owner)
+
+def scrub_replicas() -> Dict[str, int]:
+    """
+    One anti-entropy pass over every chunk: compare each replica's Merkle root
+    with the master's and repair only the differing buckets. Chunks that are
+    locked by a student or waiting for re-sync are skipped until the next pass.
+    Returns chunk -> rows repaired.
+    """
+    header, rows = _read_results_rows()
+    if header is None:
+        return {}
+    master = {str(r[0]): r for r in _versioned_rows(rows)}
+    rolls_by_chunk = PLACEMENT.chunk_map(master)
+    repaired: Dict[str, int] = {}
+    with _replication_cond:
+        pending = set(_dirty_chunks)
+    for chunk_id, rolls in rolls_by_chunk.items():
+        if chunk_id in pending:
+            continue
+        master_tree = MerkleTree.build(master[r] for r in rolls)
+        with replication_lock:
+            paths = {rid: Path(chunks[chunk_id]["path"])
+                     for rid, chunks in replication_metadata.get("replicas", {}).items() if chunk_id in chunks}
+        if not paths:
+            continue
+        held = _try_lock_replicas(chunk_id)
+        if not held:
+            continue
+        try:
+            if _erasure_params():
+                n = _repair_fragments(chunk_id)
+                if n:
+                    repaired[chunk_id] = n
+                continue
+            for replica_id, path in sorted(paths.items()):
+                tree = None
+                if path.exists():
+                    try:
+                        tree = _replica_tree(replica_id, chunk_id, path)
+                    except Exception as e:
+                        logger.error(f"[Scrub] {path.name} is unreadable ({e}); rewriting it")
+                if tree is None:
+                    # lost or unreadable file: full rewrite of this replica only
+                    data, chunk_rolls = _serialize_replica((master[r] for r in rolls), _is_chunk_file(path))
+                    if _write_chunk_bytes(path, data, chunk_rolls):
+                        _note_replica_tree(replica_id, chunk_id, path, master_tree)
+                        repaired[chunk_id] = repaired.get(chunk_id, 0) + len(rolls)
+                    continue
+                if tree.root == master_tree.root:
+                    continue
+                buckets = master_tree.diff(tree)
+                bad = sorted(set(master_tree.rolls_in(buckets)) | set(tree.rolls_in(buckets)))
+                if _is_chunk_file(path):
+                    n = _repair_chunk_records(path, master, bad, rolls)
+                else:
+                    n = _repair_rows(path, master, bad)
+                read_router.note_write(path, True)
+                _note_replica_tree(replica_id, chunk_id, path, master_tree)
+                repaired[chunk_id] = repaired.get(chunk_id, 0) + n
+                logger.warning(f"[Scrub] {path.name}: {len(buckets)} divergent range(s), repaired {n} row(s)")
+        except Exception as e:
+            logger.error(f"[Scrub] Scrubbing {chunk_id} failed: {e}")
+        finally:
+            _release_locks(held, "scrubber")
+    _save_merkle_trees()
+    return repaired
+
+def _scrub_loop():
+    while True:
+        time.sleep(SCRUB_INTERVAL)
+        if not replication_metadata.get("replicas"):
+            continue
+        try:
+            scrub_replicas()
+        except Exception as e:
+            logger.error(f"[Scrub] Pass failed: {e}")
+
+def _start_scrubber():
+    global _scrub_thread
+    if _scrub_thread is None or not _scrub_thread.is_alive():
+        _scrub_thread = threading.Thread(target=_scrub_loop, daemon=True, name="replica-scrubber")
+        _scrub_thread.start()
+
+
+# ---------------- Erasure-coded replicas ----------------
+# In "ec" mode a chunk is stored as the binary chunk format (chunk_format.py)
+# Reed-Solomon coded into k + m fragment files, one per replica. Reads fetch
+# the k data fragments; if any is missing or damaged the parity fragments are
+# read too and the chunk is reconstructed (degraded read), and the chunk is
+# queued for re-encoding. Writes re-encode the chunk from the master.
+
+def _erasure_params():
+    """{"k", "m"} if the current replicas are erasure coded, else None."""
+    return replication_metadata.get("erasure")
+
+def _fragment_paths(chunk_id: str) -> Dict[int, Path]:
+    """fragment index -> file for chunk_id, from the metadata."""
+    out = {}
+    for chunks in replication_metadata.get("replicas", {}).values():
+        info = chunks.get(chunk_id)
+        if info is not None and "fragment" in info:
+            out[int(info["fragment"])] = Path(info["path"])
+    return out
+
+def _write_fragment(path: Path, blob: bytes) -> bool:
+    try:
+        write_bytes_atomic(path, blob)
+        read_router.note_write(path, True)
+        logger.info(f"[Server] Wrote fragment file: {path}")
+        return True
+    except Exception as e:
+        read_router.note_write(path, False)
+        logger.error(f"[Server] Failed writing fragment file {path}: {e}")
+        return False
+
+def _write_fragments(params: Dict[str, int], chunk_rows, targets: Dict[int, Path], policy: str = None,
+                     generation: int = None, only: Set[int] = None, executor: ThreadPoolExecutor = None,
+                     stragglers: List = None):
+    """Encode chunk_rows and write fragment i to targets[i] (just the indexes in only, if given)."""
+    data, _ = serialize_chunk(REPLICA_SCHEMA, chunk_rows)
+    blobs = encode(data, params["k"], params["m"], generation or time.time_ns())
+    return fan_out({path: (lambda p=path, b=blobs[i]: _write_fragment(p, b))
+                    for i, path in targets.items() if only is None or i in only},
+                   policy=policy, executor=executor, stragglers=stragglers)
+
+def _load_fragments(chunk_id: str, indexes, budget: IoBudget = None) -> Tuple[List[Dict], Set[int]]:
+    """Parsed fragments for indexes, plus the indexes that are missing or damaged."""
+    paths = _fragment_paths(chunk_id)
+    good, bad = [], set()
+    for i in indexes:
+        try:
+            if budget is not None:
+                budget.consume(paths[i].stat().st_size)
+            good.append(parse_fragment(paths[i].read_bytes()))
+        except (KeyError, OSError, ErasureError) as e:
+            logger.warning(f"[EC] {chunk_id} fragment {i} unavailable: {e}")
+            bad.add(i)
+    return good, bad
+
+def _read_erasure_chunk(chunk_id: str) -> Tuple[bytes, int, Set[int]]:
+    """(chunk bytes, generation, unusable fragment indexes); data fragments first, parity only when needed."""
+    params = _erasure_params()
+    k, m = params["k"], params["m"]
+    frags, bad = _load_fragments(chunk_id, range(k))
+    if not bad and len({f["generation"] for f in frags}) == 1:
+        data, generation = reconstruct(frags)
+        return data, generation, bad
+    more, more_bad = _load_fragments(chunk_id, range(k, k + m))
+    frags += more
+    bad |= more_bad
+    data, generation = reconstruct(frags)
+    bad |= {f["index"] for f in frags if f["generation"] != generation}
+    logger.warning(f"[EC] Degraded read of {chunk_id}: rebuilt without fragment(s) {sorted(bad)}")
+    return data, generation, bad
+
+def _read_erasure_row(chunk_id: str, roll: str):
+    try:
+        data, _, bad = _read_erasure_chunk(chunk_id)
+    except ErasureError as e:
+        return f"Chunk {chunk_id} cannot be rebuilt: {e}"
+    if bad:
+        _mark_chunks_dirty([chunk_id])  # re-encode from the master restores the lost fragments
+    for row in parse_chunk(data):
+        if row[0] == roll:
+            return tuple(row[:len(RESULTS_HEADER)])
+    return None
+
+def _repair_fragments(chunk_id: str, budget: IoBudget = None) -> int:
+    """Rewrite missing, damaged or stale fragments of chunk_id from the intact ones; returns how many."""
+    params = _erasure_params()
+    frags, bad = _load_fragments(chunk_id, range(params["k"] + params["m"]), budget)
+    try:
+        data, generation = reconstruct(frags)
+    except ErasureError as e:
+        logger.error(f"[EC] {chunk_id} cannot be rebuilt from fragments ({e}); re-encoding from the master")
+        _mark_chunks_dirty([chunk_id])
+        return 0
+    bad |= {f["index"] for f in frags if f["generation"] != generation}
+    if not bad:
+        return 0
+    _write_fragments(params, parse_chunk(data), _fragment_paths(chunk_id), policy="all",
+                     generation=generation, only=bad, executor=_repair_executor())
+    logger.warning(f"[EC] Rebuilt fragment(s) {sorted(bad)} of {chunk_id}")
+    return len(bad)
+
+
+# ---------------- Replica repair ----------------
+# A repair pass checks every replica file listed in the metadata: it must exist,
+# parse (xlsx zip CRCs / chunk record CRCs / fragment digests) and hash to the
+# master's Merkle root for its chunk. Bad files are rebuilt whole, by copying a
+# verified sibling of the same format or, failing that, from the master. Checks
+# and rebuilds run concurrently, throttled by IoBudget, on a pool of their own
+# (REPAIR_IO_WORKERS): a task sleeping in IoBudget.consume never holds a worker
+# that student writes fan out on. It runs in the background at startup and on
+# demand (admin / RPC).
+_repair_thread = None
+_repair_pool = None
+_repair_pool_lock = threading.Lock()
+
+def _repair_executor() -> ThreadPoolExecutor:
+    global _repair_pool
+    with _repair_pool_lock:
+        if _repair_pool is None:
+            _repair_pool = ThreadPoolExecutor(max_workers=max(1, REPAIR_IO_WORKERS), thread_name_prefix="replica-repair")
+        return _repair_pool
+
+def _stamp_if_exists(path: Path):
+    try:
+        return _file_stamp(path)
+    except OSError:
+        return None
+
+def _verify_replica(replica_id: str, chunk_id: str, path: Path, master_root: str, budget: IoBudget) -> bool:
+    try:
+        budget.consume(path.stat().st_size)
+        tree = _replica_tree(replica_id, chunk_id, path, verify=True)
+    except Exception as e:
+        logger.warning(f"[Repair] {path.name} is missing or unreadable: {e}")
+        return False
+    if tree.root != master_root:
+        logger.warning(f"[Repair] {path.name} does not match the master")
+        return False
+    return True
+
+def _rebuild_replica(replica_id: str, chunk_id: str, path: Path, source: Path, master_rows: List[Tuple],
+                     master_tree: MerkleTree, budget: IoBudget) -> bool:
+    """Rewrite path from source (a verified replica in the same format) or, if None, from master_rows."""
+    try:
+        if source is not None:
+            data = source.read_bytes()
+            budget.consume(2 * len(data))
+            write_bytes_atomic(path, data)
+            row_index.forget(path)  # copied file: positions are the sibling's, rescan on next use
+            read_router.note_write(path, True)
+        else:
+            data, rolls = _serialize_replica(master_rows, _is_chunk_file(path))
+            budget.consume(len(data))
+            if not _write_chunk_bytes(path, data, rolls):
+                return False
+    except Exception as e:
+        read_router.note_write(path, False)
+        logger.error(f"[Repair] Rebuilding {path.name} failed: {e}")
+        return False
+    _note_replica_tree(replica_id, chunk_id, path, master_tree)
+    logger.warning(f"[Repair] Rebuilt {path.name} from {source.name if source is not None else 'the master'}")
+    return True
+
+def repair_replicas(io_budget: float = REPAIR_IO_BUDGET) -> Dict[str, str]:
+    """
+    Verify every replica listed in the metadata and rebuild the missing or
+    corrupt ones. Returns file name -> "ok" | "rebuilt" | "failed" | "busy"
+    (busy: the chunk was locked, left for the scrubber).
+    """
+    started = time.monotonic()
+    budget = IoBudget(io_budget)
+    with replication_lock:
+        targets = [(rid, cid, Path(info["path"]))
+                   for rid, chunks in replication_metadata.get("replicas", {}).items()
+                   for cid, info in chunks.items()]
+    if not targets:
+        return {}
+    status: Dict[str, str] = {}
+
+    if _erasure_params():
+        # fragment writes already fan out per chunk, so chunks go one at a time
+        for chunk_id in sorted({cid for _, cid, _ in targets}):
+            held = _try_lock_replicas(chunk_id, "repair")
+            if not held:
+                status.update({p.name: "busy" for _, cid, p in targets if cid == chunk_id})
+                continue
             try:
-                while self.writer_active or self.readers > 0:
-                    self.condition.wait()
-                self.writer_active = True
-                logger.info(f"[Lock] Roll {roll} acquired WRITE lock on {self.chunk_id}")
+                before = {p: _stamp_if_exists(p) for p in _fragment_paths(chunk_id).values()}
+                _repair_fragments(chunk_id, budget)
+                for p, stamp in before.items():
+                    after = _stamp_if_exists(p)
+                    if after is None or not read_router.healthy(p):
+                        status[p.name] = "failed"
+                    else:
+                        status[p.name] = "ok" if after == stamp else "rebuilt"
             finally:
-                self.waiting_writers -= 1
+                _release_locks(held, "repair")
+        _log_repair_summary(status, started, budget)
+        return status
+
+    header, rows = _read_results_rows()
+    if header is None:
+        return {}
+    master = {str(r[0]): r for r in _versioned_rows(rows)}
+    chunk_rows = {cid: [master[r] for r in rolls] for cid, rolls in PLACEMENT.chunk_map(master).items()}
+    trees = {cid: MerkleTree.build(rows) for cid, rows in chunk_rows.items()}
+
+    # phase 1: verify every file concurrently
+    verified: Dict[Path, bool] = {}
+
+    def _check(rid, cid, path):
+        verified[path] = _verify_replica(rid, cid, path, trees[cid].root if cid in trees else None, budget)
+        return True  # a bad file is a finding, not a failed task
+
+    fan_out({path: (lambda r=rid, c=cid, p=path: _check(r, c, p)) for rid, cid, path in targets},
+            policy="all", executor=_repair_executor())
+
+    # phase 2: rebuild the bad ones concurrently, under their chunk's write locks
+    bad_chunks = sorted({cid for _, cid, path in targets if not verified.get(path)})
+    held: Dict[str, List[ChunkLock]] = {}
+    for chunk_id in bad_chunks:
+        # chunks may share a stripe: one grant covers them all
+        held[chunk_id] = _try_lock_replicas(chunk_id, "repair", [lock for locks in held.values() for lock in locks])
+    tasks = {}
+    for rid, cid, path in targets:
+        if verified.get(path):
+            status[path.name] = "ok"
+        elif not held.get(cid):
+            status[path.name] = "busy"
+        else:
+            source = next((p for _, c, p in targets
+                           if c == cid and verified.get(p) and _is_chunk_file(p) == _is_chunk_file(path)), None)
+            tasks[path] = (lambda r=rid, c=cid, p=path, s=source: _rebuild_replica(
+                r, c, p, s, chunk_rows.get(c, []), trees.get(c, MerkleTree.build(())), budget))
+    try:
+        _, results = fan_out(tasks, policy="all", executor=_repair_executor())
+    finally:
+        for locks in reversed(list(held.values())):
+            _release_locks(locks, "repair")
+    for path in tasks:
+        status[path.name] = "rebuilt" if results.get(path) else "failed"
+    _save_merkle_trees()
+    _log_repair_summary(status, started, budget)
+    return status
+
+def _log_repair_summary(status: Dict[str, str], started: float, budget: IoBudget):
+    counts = {s: sum(1 for v in status.values() if v == s) for s in ("ok", "rebuilt", "failed", "busy")}
+    logger.info(f"[Repair] Checked {len(status)} replica file(s) in {time.monotonic() - started:.2f}s "
+                f"({budget.consumed / 1e6:.1f} MB): " + ", ".join(f"{n} {s}" for s, n in counts.items() if n))
+
+def start_repair() -> bool:
+    """Run repair_replicas in the background unless a pass is already running."""
+    global _repair_thread
+    if _repair_thread is not None and _repair_thread.is_alive():
+        return False
+    _repair_thread = threading.Thread(target=repair_replicas, daemon=True, name="replica-repair")
+    _repair_thread.start()
+    return True
+
+def _seed_row_versions() -> int:
+    """Set each roll's version to the highest one found across its chunk's replicas; returns how many rolls."""
+    with replication_lock:
+        targets = [(cid, Path(info["path"]))
+                   for chunks in replication_metadata.get("replicas", {}).values()
+                   for cid, info in chunks.items()]
+    found: Dict[str, int] = {}
+
+    def note(rows):
+        for row in rows:
+            roll, version = str(row[0]), _row_version(row)
+            if version > found.get(roll, 0):
+                found[roll] = version
+
+    if _erasure_params():
+        for chunk_id in sorted({cid for cid, _ in targets}):
+            try:
+                note(parse_chunk(_read_erasure_chunk(chunk_id)[0]))
+            except ErasureError as e:
+                logger.warning(f"[Server] No row versions for {chunk_id}: {e}")
+    else:
+        for _, path in targets:
+            try:
+                note(_iter_replica_rows(path))
+            except Exception as e:
+                logger.warning(f"[Server] No row versions from {path.name}: {e}")
+    with _row_version_lock:
+        for roll, version in found.items():
+            if version > _row_versions.get(roll, 0):
+                _row_versions[roll] = version
+    return len(found)
+
+def _load_replication_state():
+    """On restart: reload the replica layout written by the last create_replication, then repair it."""
+    global replication_metadata, PLACEMENT
+    if not METADATA_PATH.exists():
+        return
+    try:
+        with open(METADATA_PATH, "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+    except Exception as e:
+        logger.error(f"[Server] Failed reading {METADATA_PATH}: {e}")
+        return
+    with replication_lock:
+        replication_metadata = meta
+        PLACEMENT = ChunkPlacement.from_dict(meta.get("placement"), PLACEMENT)
+    init_chunk_locks_from_replication(meta)
+    seeded = _seed_row_versions()
+    logger.info(f"[Server] Loaded replication metadata from {METADATA_PATH} ({seeded} row versions); verifying replicas")
+    start_repair()
 
-    def release_write(self, roll):
-        with self.condition:
-            if not self.writer_active:
-                logger.warning(f"[Lock] Roll {roll} attempted to release WRITE lock on {self.chunk_id} but writer_active==False")
-                return
-            self.writer_active = False
-            logger.info(f"[Lock] Roll {roll} released WRITE lock on {self.chunk_id}")
-            self.condition.notify_all()
 
+# ---------------- Consistency & Lock Manager ----------------  
+# ChunkLock (chunk_lock.py) grants leases owned by the student's roll: a student
+# that disappears while holding a lock stops blocking the chunk once its lease
+# (LOCK_LEASE_SECONDS) runs out; live clients keep theirs with renew_lock.
 
 chunk_locks: Dict[str, ChunkLock] = {}
+# one lock per logical chunk for student reads/writes when LOCK_MODE=chunk
+striped_locks = StripedLocks()
+# replica writes still running after their ack (REPLICA_ACK first / majority): a
+# chunk is settled before its write lock is released or handed to maintenance
+pending_writes = PendingWrites()
 
 def init_chunk_locks_from_replication(replication_metadata):
     global chunk_locks
@@ -953,62 +1591,91 @@ def init_chunk_locks_from_replication(replication_metadata):
 
 
 def _get_chunk_for_roll(roll: str) -> str:
-    for chunk_id, rolls in DEFAULT_CHUNK_MAP.items():
-        if str(roll) in rolls:
-            return chunk_id
-    return None
+    return PLACEMENT.chunk_for_roll(roll)
+
 
+def _replica_paths(chunk_id: str) -> List[Path]:
+    return [Path(chunks[chunk_id]["path"]) for chunks in replication_metadata.get("replicas", {}).values()
+            if chunk_id in chunks]
 
-def request_read(roll: str):
+
+def request_read(roll: str, consistency: str = None):
+    """
+    Read roll's row from R replicas of its chunk (consistency ONE / QUORUM / ALL,
+    default READ_CONSISTENCY) and return the freshest one by row version.
+    Only R replicas are asked, picked by read_router (healthy, least outstanding);
+    the next ones are tried if some fail. Replicas that answered with an older
+    version are queued for re-sync.
+    """
     roll = str(roll)
     chunk = _get_chunk_for_roll(roll)
     if not chunk:
         return f"No chunk found for roll {roll}"
 
-    cids = _get_replica_chunks(chunk)
     acquired = []
     try:
-        for cid in cids:
-            if cid not in chunk_locks:
-                chunk_locks[cid] = ChunkLock(cid)
-            chunk_locks[cid].acquire_read(roll)
-            acquired.append(cid)
-
-        replica_files = replication_metadata.get("replicas", {}).get("replica_1", {})
-        path = replica_files.get(chunk, {}).get("path")
-        marks = None
-        if path:
-            try:
-                wb = load_workbook(path)
-                ws = wb.active
-                for row in ws.iter_rows(min_row=2, values_only=True):
-                    if str(row[0]) == roll:
-                        marks = row
-                        break
-            except Exception as e:
-                logger.error(f"[Server] Error reading chunk {chunk}: {e}")
-        return marks
+        for lock in _student_locks(chunk):
+            lock.acquire_read(roll)
+            acquired.append(lock)
+
+        if _erasure_params():
+            return _read_erasure_row(chunk, roll)
+
+        level = consistency or READ_CONSISTENCY
+        raw: Dict[Path, Tuple] = {}
+
+        def _read_replica(path: Path):
+            with read_router.reading(path):
+                row = _read_replica_row(path, roll)
+            if row is None:
+                return False
+            raw[path] = row
+            return True
+
+        paths = _replica_paths(chunk)
+        needed = acks_needed(level, len(paths))
+        order = read_router.order(paths, need=needed)
+        replies: Dict[Path, Tuple] = {}
+        tried = 0
+        while len(replies) < needed and tried < len(order):
+            wave = order[tried:tried + needed - len(replies)]
+            tried += len(wave)
+            _, results = fan_out({p: (lambda p=p: _read_replica(p)) for p in wave}, policy="all")
+            replies.update((p, raw[p]) for p in results if results[p])
+        if len(replies) < needed:
+            if not replies:
+                return None  # no replica has the roll
+            return f"Read {level} not met for roll {roll} ({len(replies)} replica(s) answered)"
+        if not replies:
+            return None
+        freshest = max(replies.values(), key=_row_version)
+        if any(_row_version(r) < _row_version(freshest) for r in replies.values()):
+            logger.info(f"[Server] Stale replica of {chunk} seen reading roll {roll}; queued re-sync")
+            _mark_chunks_dirty([chunk])
+        return tuple(freshest[:len(RESULTS_HEADER)])
 
     except Exception as e:
         logger.exception(f"[Lock] Exception while acquiring read locks for roll {roll}: {e}")
-        for cid in reversed(acquired):
+        for lock in reversed(acquired):
             try:
-                chunk_locks[cid].release_read(roll)
+                lock.release_read(roll)
             except Exception:
-                logger.exception(f"[Lock] Error releasing read lock {cid} during cleanup")
+                logger.exception(f"[Lock] Error releasing read lock {lock.chunk_id} during cleanup")
         raise
 
 
+def replica_read_stats():
+    """Per-replica-file read counts, in-flight reads and health (RPC)."""
+    return read_router.stats()
+
+
 def release_read(roll: str):
     roll = str(roll)
     chunk = _get_chunk_for_roll(roll)
     if not chunk:
         return False
-    for cid in _get_replica_chunks(chunk):
-        if cid not in chunk_locks:
-            logger.warning(f"[Lock] release_read: no lock object for {cid}")
-            continue
-        chunk_locks[cid].release_read(roll)
+    for lock in _student_locks(chunk, create=False):
+        lock.release_read(roll)
     return True
 
 
@@ -1022,65 +1689,99 @@ def request_write(roll: str):
     if not chunk:
         return f"No chunk found for roll {roll}"
 
-    cids = _get_replica_chunks(chunk)
-    for cid in cids:
-        if cid not in chunk_locks:
-            chunk_locks[cid] = ChunkLock(cid)
-        chunk_locks[cid].acquire_write(roll)
+    for lock in _student_locks(chunk):
+        lock.acquire_write(roll)
 
     logger.info(f"[Server] Write lock acquired for roll={roll}, chunk={chunk}")
     return f"Write lock granted for roll {roll}"
 
 
-def update_chunk_marks(roll: str, new_marks: int):
+def update_chunk_marks(roll: str, new_marks: int, consistency: str = None):
     """
     Update ISA marks for a student. Assumes the caller already holds the lock.
+    The change is versioned and returns once W replicas acknowledged it
+    (consistency ONE / QUORUM / ALL, default REPLICA_ACK).
     """
     roll = str(roll)
     chunk = _get_chunk_for_roll(roll)
     if not chunk:
         return f"No chunk found for roll {roll}"
+    locks = _student_locks(chunk, create=False)
+    if not locks or not all(lock.holds_write(roll) for lock in locks):
+        # never taken, or this roll's lease expired (whether or not someone else has the chunk now)
+        return f"Write lock for roll {roll} expired; request the write lock again"
+    pending_writes.settle(chunk)  # writes of a holder whose lease ran out may still be landing
+    version = _next_row_version(roll)
+    late = []
 
-    updated = False
     try:
-        # Update master Excel
-        if not excel_path.exists():
-            wb = Workbook()
-            ws = wb.active
-            ws.append(["Roll", "Name", "Marks", "MCQ", "ISA"])
-            wb.save(excel_path)
-
-        wb = load_workbook(excel_path)
-        ws = wb.active
-        for row in ws.iter_rows(min_row=2):
-            if str(row[0].value) == roll:
-                ws.cell(row=row[0].row, column=5, value=new_marks)
-                updated = True
-                break
-        wb.save(excel_path)
+        # Update master via the results store (no default row: rolls outside the sheet are skipped)
+        results_store.update(roll, {5: new_marks})
         logger.info(f"[Server] Updated MASTER roll={roll} ISA={new_marks}")
     except Exception as e:
         logger.error(f"[Server] Error updating master results.xlsx: {e}")
 
-    # Update replicas
-    replicas = replication_metadata.get("replicas", {})
-    for replica_id, chunks in replicas.items():
-        if chunk in chunks:
-            path = Path(chunks[chunk]["path"])
-            try:
-                wb = load_workbook(path)
-                ws = wb.active
-                for row in ws.iter_rows(min_row=2):
-                    if str(row[0].value) == roll:
-                        ws.cell(row=row[0].row, column=5, value=new_marks)
-                        updated = True
-                        break
-                wb.save(path)
+    if _erasure_params():
+        # erasure-coded chunks are re-encoded from the master (every fragment changes)
+        _, rows = _read_results_rows()
+        rolls = PLACEMENT.chunk_map(str(r[0]) for r in rows).get(chunk, [])
+        _, chunk_rows = _read_results_rows(rolls)
+        with replication_lock:
+            acked, results = _write_fragments(_erasure_params(), list(_versioned_rows(chunk_rows)),
+                                              _fragment_paths(chunk), policy=consistency, stragglers=late)
+        pending_writes.add(chunk, late)
+        if acked:
+            return f"Roll {roll} marks updated to {new_marks}"
+        _mark_chunks_dirty([chunk])
+        return f"Roll {roll} marks updated on too few fragments; re-encode queued"
+
+    def _update_replica(path: Path) -> bool:
+        try:
+            if _is_chunk_file(path):
+                # fixed-width record: one pwrite of the new record
+                current = _read_replica_row(path, roll)
+                if current is None:
+                    return False
+                if _row_version(current) > version:
+                    return True  # a newer write already landed here
+                update_chunk_row(path, roll, {5: new_marks, VERSION_COLUMN: version},
+                                 slot_hint=row_index.peek(path, roll))
+                row_index.touch(path)
                 logger.info(f"[Server] Updated roll={roll} marks={new_marks} in {path.name}")
-            except Exception as e:
-                logger.error(f"[Server] Error updating {path}: {e}")
-
-    return f"Roll {roll} marks updated to {new_marks}" if updated else f"Roll {roll} not found"
+                read_router.note_write(path, True)
+                return True
+            wb = load_workbook(path)
+            ws = wb.active
+            n = row_index.locate(path, ws, roll)
+            if n is None:
+                return False
+            if int(ws.cell(row=n, column=VERSION_COLUMN).value or 0) > version:
+                return True  # a newer write already landed here
+            ws.cell(row=n, column=5, value=new_marks)
+            ws.cell(row=n, column=VERSION_COLUMN, value=version)
+            _save_workbook_atomic(wb, path)
+            row_index.touch(path)
+            logger.info(f"[Server] Updated roll={roll} marks={new_marks} in {path.name}")
+            read_router.note_write(path, True)
+            return True
+        except Exception as e:
+            read_router.note_write(path, False)
+            logger.error(f"[Server] Error updating {path}: {e}")
+            return False
+
+    # Update replicas concurrently; returns once W replicas acknowledged, the rest
+    # finish before release_write lets the next writer in
+    paths = _replica_paths(chunk)
+    acked, results = fan_out({path: (lambda p=path: _update_replica(p)) for path in paths}, policy=consistency,
+                             stragglers=late)
+    pending_writes.add(chunk, late)
+    if acked and any(results.values()):
+        return f"Roll {roll} marks updated to {new_marks}"
+    if len(results) == len(paths) and not any(results.values()):
+        return f"Roll {roll} not found"
+    # too few acks: the master has the change, so bring the lagging replicas back from it
+    _mark_chunks_dirty([chunk])
+    return f"Roll {roll} marks updated on too few replicas ({consistency or 'REPLICA_ACK'}); re-sync queued"
 
 
 def release_write(roll: str):
@@ -1091,19 +1792,40 @@ def release_write(roll: str):
     chunk = _get_chunk_for_roll(roll)
     if not chunk:
         return False
-    for cid in _get_replica_chunks(chunk):
-        if cid not in chunk_locks:
-            logger.warning(f"[Lock] release_write: no lock object for {cid}")
-            continue
+    pending_writes.settle(chunk)
+    for lock in _student_locks(chunk, create=False):
         try:
-            chunk_locks[cid].release_write(roll)
+            lock.release_write(roll)
         except Exception as e:
-            logger.error(f"[Lock] Error releasing lock for {cid}: {e}")
+            logger.error(f"[Lock] Error releasing lock for {lock.chunk_id}: {e}")
     logger.info(f"[Server] Write lock released for roll={roll}, chunk={chunk}")
     return True
 
 
 
+def renew_lock(roll: str) -> bool:
+    """Extend roll's read/write leases on its chunk (RPC heartbeat); False if they already expired."""
+    roll = str(roll)
+    chunk = _get_chunk_for_roll(roll)
+    if not chunk:
+        return False
+    held = [lock.renew(roll) for lock in _student_locks(chunk, create=False)]
+    return bool(held) and all(held)
+
+
+def _student_locks(chunk_id: str, create: bool = True) -> List[ChunkLock]:
+    """
+    Locks a student read/write of chunk_id takes, in acquisition order: the
+    chunk's stripe (LOCK_MODE=chunk) or one lock per replica. With create=False
+    replica locks that do not exist yet are skipped (release, renew).
+    """
+    if LOCK_MODE == "chunk":
+        return [striped_locks.for_chunk(chunk_id)]
+    if not create:
+        return [chunk_locks[cid] for cid in _get_replica_chunks(chunk_id) if cid in chunk_locks]
+    return [chunk_locks.setdefault(cid, ChunkLock(cid)) for cid in _get_replica_chunks(chunk_id)]
+
+
 def _get_replica_chunks(chunk_id: str) -> list[str]:
     replica_chunks = []
     all_replicas = replication_metadata.get("replicas", {})
@@ -1114,6 +1836,17 @@ def _get_replica_chunks(chunk_id: str) -> list[str]:
                     
 # ---------------- Run Server ----------------
 def run_server():
+    # Recover mark changes journaled before a crash, then keep compacting in the background
+    try:
+        results_store.replay()
+    except Exception as e:
+        logger.error(f"[Server] Journal replay failed: {e}")
+    results_store.start()
+    _start_replication_worker()
+    _start_scrubber()
+    _load_replication_state()
+    start_lease_reaper(lambda: list(chunk_locks.values()) + list(striped_locks))
+
     srv = ThreadingXMLRPCServer((SERVER_HOST, SERVER_PORT), allow_none=True, logRequests=False)
     #srv.register_function(cheating_detection, "cheating_detection")
     srv.register_function(input_time, "input_time")
@@ -1137,8 +1870,11 @@ def run_server():
     srv.register_function(announce_results, "announce_results")
     srv.register_function(request_read, "request_read")
     srv.register_function(release_read, "release_read")
+    srv.register_function(replica_read_stats, "replica_read_stats")
+    srv.register_function(repair_replicas, "repair_replicas")
     srv.register_function(request_write, "request_write")
     srv.register_function(release_write, "release_write")
+    srv.register_function(renew_lock, "renew_lock")
     srv.register_function(update_chunk_marks)
 
 
@@ -1153,7 +1889,7 @@ def run_server():
         cmd = input(
             "\n[Server Admin] Enter command "
             "(register_students, start_time_sync, start_exam, finish_exam, "
-            "start_isa, create_replication, consistency_demo, exit): "
+            "start_isa, create_replication, repair_replicas, consistency_demo, exit): "
         ).strip()
 
         if cmd == "register_students":
@@ -1216,6 +1952,12 @@ def run_server():
             for r, url in students_registry.items():
                 new_proxy(url).phase_complete("Replication & Chunking")
 
+        elif cmd == "repair_replicas":
+            logger.info("[Server Admin] Verifying and repairing replica files...")
+            status = repair_replicas()
+            bad = sorted(name for name, st in status.items() if st != "ok")
+            logger.info(f"[Server Admin] Repair done; {len(bad)} file(s) needed attention: {bad}")
+
         elif cmd == "consistency_demo":
             logger.info("[Server Admin] Consistency demo phase.")
             logger.info("[Server Admin] Only notifying students for Consistency Demo")
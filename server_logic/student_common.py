@@ -17,6 +17,7 @@ SERVER_URL = "http://127.0.0.1:9000/"
 RPC_TIMEOUT = 5.0
 LOCAL_HOST = "127.0.0.1"
 PROBE_PORTS = range(9101, 9111)
+LOCK_RENEW_INTERVAL = 15.0   # seconds between lock lease renewals (server lease: LOCK_LEASE_SECONDS)
 
 class TimeoutTransport(xmlrpc.client.Transport):
     def __init__(self, timeout=RPC_TIMEOUT):
@@ -484,6 +485,17 @@ def _refresh_peers():
         peers.update(probed)
     _log(f"[Student {my_roll}] Probed peers: {list(peers.keys())}")
     
+def _keep_lock_lease(stop: threading.Event):
+    """Renew this student's chunk lock lease until stop is set (the write prompt can wait on the user)."""
+    srv = new_server_proxy()
+    while not stop.wait(LOCK_RENEW_INTERVAL):
+        try:
+            if not srv.renew_lock(my_roll):
+                print(f"[Student {my_roll}] Lock lease expired; the write will be refused")
+                return
+        except Exception as e:
+            print(f"[Student {my_roll}] Lease renewal failed: {e}")
+
 def start_consistency_demo():
     """
     RPC triggered by server when admin runs 'consistency_demo'.
@@ -509,10 +521,12 @@ def start_consistency_demo():
 
         elif choice == "2":
             srv = new_server_proxy()
+            renewing = threading.Event()
             try:
         # Step 1: acquire lock
                 msg = srv.request_write(my_roll)   # lock only
                 print(f"[Student {my_roll}] {msg}")
+                threading.Thread(target=_keep_lock_lease, args=(renewing,), daemon=True).start()
 
         # Step 2: ask user for marks
                 new_marks = input("Enter new ISA marks: ").strip()
@@ -525,6 +539,7 @@ def start_consistency_demo():
                 print(f"Error in write: {e}")
             finally:
         # Step 3: always release
+                renewing.set()
                 try:
                     srv.release_write(my_roll)
                     print(f"[Student {my_roll}] WRITE LOCK RELEASED")
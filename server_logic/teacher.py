@@ -7,10 +7,7 @@ import xmlrpc.client
 from pathlib import Path
 import logging
 
-try:
-    from openpyxl import Workbook, load_workbook
-except ImportError:
-    raise SystemExit("Please install openpyxl: pip install openpyxl")
+from results_store import open_results_store
 
 # ---------------- LOGGING ----------------
 logging.basicConfig(
@@ -37,6 +34,12 @@ excel_path = Path("results.xlsx")
 _write_lock = threading.Lock()
 results_ready = False
 
+def _seed_results_rows():
+    return [[r, info.get("name", f"Student{r}"), info.get("marks", "NA"), "NA"] for r, info in students.items()]
+
+# Shared results store; teacher writes are rare, so each one is flushed straight to disk
+results_store = open_results_store(excel_path, ["Roll", "Name", "Marks/MCQ", "ISA"], seed=_seed_results_rows)
+
 # ---------------- FUNCTIONS ----------------
 
 def input_time():
@@ -92,35 +95,9 @@ def update_mcq_marks(roll, marks_percent, mcq_total):
 
         # Update Excel
         try:
-            if not excel_path.exists():
-                wb = Workbook()
-                ws = wb.active
-                ws.append(["Roll", "Name", "Marks/MCQ", "ISA"])
-                for r, info in students.items():
-                    ws.append([
-                        r,
-                        info.get("name", f"Student{r}"),
-                        info.get("marks", "NA"),
-                        "NA",
-                    ])
-                wb.save(excel_path)
-            else:
-                wb = load_workbook(excel_path)
-                ws = wb.active
-                updated = False
-                for row in ws.iter_rows(min_row=2):
-                    if row and str(row[0].value) == str(roll):
-                        ws.cell(row=row[0].row, column=3, value=final_marks)
-                        updated = True
-                        break
-                if not updated:
-                    ws.append([
-                        roll,
-                        students[roll].get("name", f"Student{roll}"),
-                        final_marks,
-                        "NA",
-                    ])
-                wb.save(excel_path)
+            results_store.update(roll, {3: final_marks},
+                                 [roll, students[roll].get("name", f"Student{roll}"), final_marks, "NA"])
+            results_store.flush()
         except Exception as e:
             logger.error("[Teacher] ERROR updating Excel: %s", e)
 
@@ -136,13 +113,9 @@ def get_results():
 
 def release_results():
     import pandas as pd
-    from openpyxl import load_workbook
     try:
-        wb = load_workbook(excel_path)
-        ws = wb.active
-        data = []
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            data.append(row)  # (Roll, Name, Marks/MCQ, ISA)
+        _, rows = results_store.snapshot()
+        data = [list(row) for row in rows]  # (Roll, Name, Marks/MCQ, ISA)
     except Exception as e:
         logger.error("[Teacher] ERROR reading Excel: %s", e)
         return False
@@ -0,0 +1,37 @@
+# throttle.py
+# Token-bucket I/O budget shared by background maintenance threads (replica repair).
+#
+# consume(n) blocks until n bytes fit in the budget, so any number of worker
+# threads together stay under `rate` bytes per second (after an initial burst).
+import time
+import threading
+from typing import Optional
+
+
+class IoBudget:
+    def __init__(self, rate: Optional[float], burst: Optional[float] = None):
+        """rate in bytes/second (None or <= 0: unlimited); burst defaults to one second's worth."""
+        self.rate = rate if rate and rate > 0 else None
+        self.burst = float(burst or (self.rate or 0))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self.consumed = 0
+
+    def consume(self, n: int):
+        """Wait until n bytes may be read or written. Requests larger than the burst are admitted alone."""
+        with self._lock:
+            self.consumed += n
+        if self.rate is None:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                need = min(n, self.burst)
+                if self._tokens >= need:
+                    self._tokens -= n   # may go negative for oversized requests; later callers wait it off
+                    return
+                wait = (need - self._tokens) / self.rate
+            time.sleep(wait)
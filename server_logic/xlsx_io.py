@@ -0,0 +1,198 @@
+# xlsx_io.py
+# Shared helpers for the results / replica workbooks used by app.py and server.py.
+import io
+import os
+import tempfile
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from openpyxl import Workbook, load_workbook
+except ImportError:
+    raise SystemExit("Please install openpyxl: pip install openpyxl")
+
+logger = logging.getLogger("xlsx_io")
+
+
+def serialize_rows(header: List, rows: Iterable) -> Tuple[bytes, List[str]]:
+    """
+    Serialize header + rows to xlsx bytes with openpyxl's write-only mode.
+    rows may be any iterable (e.g. a generator); each row is streamed to the
+    sheet and never kept as a cell object. Returns (bytes, rolls in row order)
+    so callers can write the same bytes to every replica and seed RowIndex.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(header))
+    rolls = []
+    for r in rows:
+        ws.append(list(r))
+        rolls.append(str(r[0]))
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue(), rolls
+
+
+def read_xlsx_header(path) -> Optional[List]:
+    """Return the first row of the active sheet (read-only mode), or None if the sheet is empty."""
+    wb = load_workbook(path, read_only=True)
+    try:
+        first = next(wb.active.iter_rows(min_row=1, max_row=1, values_only=True), None)
+        return list(first) if first else None
+    finally:
+        wb.close()
+
+
+def iter_xlsx_rows(path, rolls: Optional[Iterable] = None, min_row: int = 2,
+                   max_row: Optional[int] = None) -> Iterator[Tuple]:
+    """
+    Lazily yield data rows (tuples) of the active sheet using openpyxl's
+    read-only mode, so memory stays constant whatever the sheet size.
+    With rolls, only rows whose column A is in rolls are yielded and the
+    file is closed as soon as all of them have been seen.
+    """
+    wanted = set(str(r) for r in rolls) if rolls is not None else None
+    if wanted is not None and not wanted:
+        return
+    wb = load_workbook(path, read_only=True)
+    try:
+        for row in wb.active.iter_rows(min_row=min_row, max_row=max_row, values_only=True):
+            if not row or row[0] is None:
+                continue
+            if wanted is None:
+                yield row
+                continue
+            key = str(row[0])
+            if key in wanted:
+                wanted.discard(key)
+                yield row
+                if not wanted:
+                    return
+    finally:
+        wb.close()
+
+
+def read_xlsx_row(path, roll, row_hint: Optional[int] = None) -> Optional[Tuple]:
+    """
+    Point lookup: return the row for roll, or None. row_hint (e.g. from RowIndex)
+    is tried first; otherwise the sheet is streamed until the roll is found.
+    """
+    roll = str(roll)
+    if row_hint is not None:
+        for row in iter_xlsx_rows(path, min_row=row_hint, max_row=row_hint):
+            if str(row[0]) == roll:
+                return row
+    for row in iter_xlsx_rows(path, rolls=[roll]):
+        return row
+    return None
+
+
+def write_bytes_atomic(path, data: bytes) -> None:
+    """
+    Write data to path via a temp file + os.replace so readers never see a torn
+    file. Each call gets its own temp file, so concurrent writers of one path
+    never clobber each other's half-written data (the last rename wins).
+    """
+    path = Path(path)
+    fh = tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name + ".", suffix=".tmp", delete=False)
+    try:
+        with fh:
+            fh.write(data)
+        os.replace(fh.name, path)
+    except BaseException:
+        try:
+            os.remove(fh.name)
+        except OSError:
+            pass
+        raise
+
+
+class RowIndex:
+    """
+    roll -> worksheet row number for every workbook we read or write, keyed by path.
+
+    An entry is trusted only while the file's (mtime, size) stamp matches what we
+    recorded, so edits by other processes (teacher.py, Excel) force a rebuild.
+    Callers still check the roll in column A of the row they get back and fall
+    back to a rescan if it moved.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Tuple[int, int], Dict[str, int]]] = {}
+
+    @staticmethod
+    def _stamp(path) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _scan(ws) -> Dict[str, int]:
+        mapping = {}
+        for n, (roll,) in enumerate(ws.iter_rows(min_row=2, max_col=1, values_only=True), start=2):
+            if roll is not None:
+                mapping.setdefault(str(roll), n)
+        return mapping
+
+    def mapping(self, path, ws) -> Dict[str, int]:
+        """Return the (possibly rebuilt) roll -> row map for path; ws is the open worksheet."""
+        key = str(Path(path).resolve())
+        stamp = self._stamp(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+        mapping = self._scan(ws)
+        with self._lock:
+            self._entries[key] = (stamp, mapping)
+        logger.info(f"[RowIndex] Rebuilt index for {Path(path).name} ({len(mapping)} rolls)")
+        return mapping
+
+    def peek(self, path, roll) -> Optional[int]:
+        """Cached row number for roll if the entry for path is still fresh, without opening the file."""
+        key = str(Path(path).resolve())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self._stamp(path):
+                return None
+            return entry[1].get(str(roll))
+
+    def locate(self, path, ws, roll) -> Optional[int]:
+        """Row number of roll in ws (the open workbook at path), or None if absent."""
+        roll = str(roll)
+        n = self.mapping(path, ws).get(roll)
+        if n is not None and str(ws.cell(row=n, column=1).value) == roll:
+            return n
+        # stale entry (rows moved without the file stamp changing): rescan once
+        self.forget(path)
+        return self.mapping(path, ws).get(roll)
+
+    def note_append(self, path, roll, row_number: int):
+        """Record that roll was appended at row_number in the in-memory workbook for path."""
+        key = str(Path(path).resolve())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1][str(roll)] = row_number
+
+    def record(self, path, mapping: Dict[str, int]):
+        """Install the full map for a file we just wrote ourselves."""
+        key = str(Path(path).resolve())
+        with self._lock:
+            self._entries[key] = (self._stamp(path), dict(mapping))
+
+    def touch(self, path):
+        """Re-stamp path after we saved it ourselves without moving any rows."""
+        key = str(Path(path).resolve())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (self._stamp(path), entry[1])
+
+    def forget(self, path):
+        with self._lock:
+            self._entries.pop(str(Path(path).resolve()), None)
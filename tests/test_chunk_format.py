@@ -0,0 +1,66 @@
+import pytest
+
+from server_logic.chunk_format import (ChunkFormatError, chunk_slots, iter_chunk_rows, parse_chunk,
+                                       read_chunk_header, read_chunk_row, serialize_chunk, update_chunk_row)
+
+SCHEMA = [("Roll", "s16"), ("Name", "s64"), ("Marks", "i"), ("MCQ", "i"), ("ISA", "i"), ("Version", "q")]
+ROWS = [
+    ("1", "Swaroop", 70, 7, None, 0),
+    ("2", "Tanisha", "NA", 0, "NA", 1792212068354478),
+    ("10", "Ünïcödé", 0, None, 21, 3),
+]
+
+
+@pytest.fixture
+def chunk_file(tmp_path):
+    data, rolls = serialize_chunk(SCHEMA, ROWS)
+    assert rolls == ["1", "2", "10"]
+    path = tmp_path / "replica_1_chunk1.chunk"
+    path.write_bytes(data)
+    return path
+
+
+def test_round_trip(chunk_file):
+    assert read_chunk_header(chunk_file) == [name for name, _ in SCHEMA]
+    assert list(iter_chunk_rows(chunk_file)) == ROWS
+    assert list(parse_chunk(chunk_file.read_bytes())) == ROWS
+    assert chunk_slots(chunk_file) == {"1": 0, "2": 1, "10": 2}
+    assert read_chunk_row(chunk_file, "10") == ROWS[2]
+    assert read_chunk_row(chunk_file, "2", slot_hint=0) == ROWS[1]  # stale hint falls back to a scan
+    assert read_chunk_row(chunk_file, "99") is None
+
+
+def test_update_in_place(chunk_file):
+    assert update_chunk_row(chunk_file, "2", {5: 33, 6: 4}) == 1
+    assert read_chunk_row(chunk_file, "2") == ("2", "Tanisha", "NA", 0, 33, 4)
+    assert update_chunk_row(chunk_file, "99", {5: 1}) is None
+
+
+def test_record_crc_mismatch(chunk_file):
+    data = bytearray(chunk_file.read_bytes())
+    data[-10] ^= 0xFF  # inside the last record
+    chunk_file.write_bytes(bytes(data))
+    assert read_chunk_row(chunk_file, "1") == ROWS[0]
+    with pytest.raises(ChunkFormatError, match="checksum"):
+        read_chunk_row(chunk_file, "10")
+    with pytest.raises(ChunkFormatError, match="checksum"):
+        list(iter_chunk_rows(chunk_file))
+
+
+def test_header_damage(chunk_file):
+    data = chunk_file.read_bytes()
+    damaged = bytearray(data)
+    damaged[16] ^= 0x01  # record count
+    with pytest.raises(ChunkFormatError, match="header checksum"):
+        list(parse_chunk(bytes(damaged)))
+    with pytest.raises(ChunkFormatError, match="truncated"):
+        list(parse_chunk(data[:-1]))
+    with pytest.raises(ChunkFormatError, match="not a chunk file"):
+        list(parse_chunk(b"XXXX" + data[4:]))
+
+
+def test_bad_values_and_schema():
+    with pytest.raises(ChunkFormatError):
+        serialize_chunk(SCHEMA, [("1", "x", "seventy", 0, 0, 0)])
+    with pytest.raises(ChunkFormatError):
+        serialize_chunk([("Marks", "i")], [])
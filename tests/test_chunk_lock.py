@@ -0,0 +1,127 @@
+import threading
+import time
+
+from server_logic.chunk_lock import (BUSY_READING, BUSY_WRITER_WAITING, BUSY_WRITING, ChunkLock, acquire_write_all,
+                                     try_acquire_write_all)
+
+LEASE = 0.1
+
+
+def test_write_lease_expires():
+    lock = ChunkLock("chunk1", lease=LEASE)
+    lock.acquire_write("7")
+    assert not lock.try_acquire_write("8")
+    time.sleep(LEASE * 1.5)
+    assert not lock.holds_write("7")
+    assert lock.try_acquire_write("8")
+    lock.release_write("7")  # stale owner: ignored
+    assert lock.holds_write("8")
+
+
+def test_renew_extends_a_live_lease_only():
+    lock = ChunkLock("chunk1", lease=LEASE)
+    lock.acquire_write("7")
+    for _ in range(3):
+        time.sleep(LEASE * 0.6)
+        assert lock.renew("7")
+    assert lock.holds_write("7")
+    time.sleep(LEASE * 1.5)
+    assert not lock.renew("7")
+    assert not lock.writer_active
+
+
+def test_non_expiring_grant_outlives_the_lease():
+    lock = ChunkLock("chunk1", lease=LEASE)
+    assert lock.try_acquire_write("repair", expires=False)
+    time.sleep(LEASE * 1.5)
+    assert lock.reap() == 0
+    assert lock.holds_write("repair")
+
+
+def test_expired_read_lease_wakes_a_waiting_writer():
+    lock = ChunkLock("chunk1", lease=LEASE)
+    lock.acquire_read("3")
+    lock.acquire_read("3")
+    assert lock.readers == 2
+    started = time.monotonic()
+    lock.acquire_write("4")  # blocks until the reader's lease runs out
+    assert time.monotonic() - started >= LEASE * 0.9
+    assert lock.readers == 0 and lock.holds_write("4")
+
+
+def test_waiting_reader_gets_in_once_the_write_lease_runs_out():
+    lock = ChunkLock("chunk1", lease=LEASE)
+    lock.acquire_write("7")
+    got = threading.Event()
+    waiter = threading.Thread(target=lambda: (lock.acquire_read("8"), got.set()))
+    waiter.start()
+    assert not got.wait(LEASE * 0.5)
+    assert got.wait(1.0)
+    waiter.join()
+    assert lock.readers == 1 and not lock.writer_active
+
+
+def test_reap_revokes_expired_leases():
+    lock = ChunkLock("chunk1", lease=LEASE)
+    lock.acquire_read("3")
+    lock.acquire_read("5", expires=False)
+    assert lock.reap() == 0
+    time.sleep(LEASE * 1.5)
+    assert lock.reap() == 1
+    assert list(lock.read_leases) == ["5"]
+
+
+def test_try_acquire_write_all_is_all_or_nothing():
+    locks = [ChunkLock(f"replica_{i}:chunk1") for i in range(1, 4)]
+    locks[1].acquire_read("9")
+    ok, busy, reason = try_acquire_write_all(locks, "7")
+    assert not ok and busy is locks[1] and reason == BUSY_READING
+    assert not any(lock.writer_active for lock in locks)  # the free ones were not left held
+    locks[1].release_read("9")
+    assert try_acquire_write_all(locks + [locks[0]], "7") == (True, None, None)  # duplicates count once
+    assert all(lock.holds_write("7") for lock in locks)
+
+
+def test_acquire_write_all_waits_for_the_busy_lock():
+    locks = [ChunkLock("a"), ChunkLock("b")]
+    locks[0].acquire_write("9")
+    ok, busy, reason = acquire_write_all(locks, "7", timeout=LEASE)
+    assert not ok and busy is locks[0] and reason == BUSY_WRITING and not locks[1].writer_active
+    threading.Timer(LEASE, locks[0].release_write, args=("9",)).start()
+    assert acquire_write_all(locks, "7", timeout=2.0) == (True, None, None)
+    assert all(lock.holds_write("7") for lock in locks)
+
+
+def test_concurrent_multi_key_writers_do_not_deadlock():
+    locks = [ChunkLock(f"k{i}", lease=0) for i in range(4)]
+    done = []
+
+    def worker(owner, order):
+        for _ in range(200):
+            ok, _, _ = acquire_write_all([locks[i] for i in order], owner, timeout=5.0)
+            assert ok
+            for i in order:
+                locks[i].release_write(owner)
+        done.append(owner)
+
+    threads = [threading.Thread(target=worker, args=(str(n), order))
+               for n, order in enumerate([(0, 1, 2), (2, 1, 0), (3, 0), (1, 3)])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10.0)
+    assert sorted(done) == ["0", "1", "2", "3"]
+
+
+def test_a_queued_writer_is_reported_as_such():
+    lock = ChunkLock("chunk1")
+    lock.acquire_read("9")
+    queued = threading.Thread(target=lock.acquire_write, args=("8",))
+    queued.start()
+    while lock.waiting_writers == 0:
+        time.sleep(0.01)
+    # "8" gets the lock before any newcomer, so that is what a refusal reports
+    assert try_acquire_write_all([lock], "7")[2] == BUSY_WRITER_WAITING
+    lock.release_read("9")
+    queued.join()
+    assert try_acquire_write_all([lock], "7")[2] == BUSY_WRITING
@@ -0,0 +1,47 @@
+import itertools
+import random
+
+import pytest
+
+from server_logic.erasure import ErasureError, encode, parse_fragment, reconstruct
+
+
+def _payload(size, seed=0):
+    rng = random.Random(seed)
+    return bytes(rng.randrange(256) for _ in range(size))
+
+
+@pytest.mark.parametrize("k,m", [(2, 1), (3, 2), (4, 2)])
+@pytest.mark.parametrize("size", [0, 1, 7, 1000])
+def test_any_k_fragments_rebuild_the_chunk(k, m, size):
+    data = _payload(size, seed=k * 100 + m)
+    frags = [parse_fragment(blob) for blob in encode(data, k, m, generation=5)]
+    for lost in itertools.combinations(range(k + m), m):
+        kept = [f for f in frags if f["index"] not in lost]
+        assert reconstruct(kept) == (data, 5)
+
+
+def test_losing_more_than_m_fragments_fails():
+    frags = [parse_fragment(blob) for blob in encode(_payload(64), 2, 1, generation=1)]
+    with pytest.raises(ErasureError):
+        reconstruct(frags[:1])
+
+
+def test_damaged_fragment_is_rejected():
+    blobs = encode(_payload(64), 2, 1, generation=1)
+    damaged = bytearray(blobs[1])
+    damaged[-1] ^= 0xFF
+    with pytest.raises(ErasureError):
+        parse_fragment(bytes(damaged))
+    with pytest.raises(ErasureError):
+        parse_fragment(blobs[0][:10])
+    with pytest.raises(ErasureError):
+        parse_fragment(b"XXXX" + blobs[0][4:])
+
+
+def test_newest_complete_generation_wins():
+    old = [parse_fragment(b) for b in encode(b"old chunk", 2, 1, generation=1)]
+    new = [parse_fragment(b) for b in encode(b"new chunk!", 2, 1, generation=2)]
+    assert reconstruct(old + new[:2]) == (b"new chunk!", 2)
+    # only one fragment of the new generation survived: fall back to the old one
+    assert reconstruct(old + new[2:]) == (b"old chunk", 1)
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from server_logic.fanout import PendingWrites, acks_needed, fan_out
+
+
+def _slow(delay, result=True):
+    def task():
+        time.sleep(delay)
+        return result
+    return task
+
+
+def _boom():
+    raise OSError("disk gone")
+
+
+@pytest.mark.parametrize("policy,n,needed", [
+    ("all", 3, 3), ("majority", 3, 2), ("majority", 4, 3), ("first", 3, 1),
+    ("ALL", 3, 3), ("QUORUM", 5, 3), ("one", 3, 1), ("first", 0, 0), ("bogus", 3, 3),
+])
+def test_acks_needed(policy, n, needed):
+    assert acks_needed(policy, n) == needed
+
+
+def test_all_waits_for_every_task():
+    acked, results = fan_out({"a": _slow(0.0), "b": _slow(0.1), "c": lambda: True}, policy="all")
+    assert acked and results == {"a": True, "b": True, "c": True}
+
+
+def test_only_an_explicit_true_acknowledges():
+    acked, results = fan_out({"a": lambda: True, "b": lambda: None, "c": lambda: 1}, policy="all")
+    assert not acked and results == {"a": True, "b": False, "c": False}
+
+
+def test_first_returns_before_the_slow_replicas():
+    release = threading.Event()
+    started = time.monotonic()
+    acked, results = fan_out({"fast": lambda: True, "slow": lambda: release.wait(5.0)}, policy="first")
+    assert acked and results == {"fast": True}
+    assert time.monotonic() - started < 1.0
+    release.set()
+
+
+def test_majority_tolerates_a_minority_of_failures():
+    acked, results = fan_out({"a": lambda: True, "b": _boom, "c": lambda: True}, policy="majority")
+    assert acked and results["a"] and results["c"]
+
+
+def test_quorum_fails_fast_once_unreachable():
+    release = threading.Event()
+    acked, results = fan_out({"a": _boom, "b": lambda: False, "c": lambda: release.wait(5.0)},
+                             policy="majority")
+    assert not acked and results == {"a": False, "b": False}
+    release.set()
+
+
+def test_timeout_and_empty():
+    release = threading.Event()
+    acked, results = fan_out({"a": lambda: release.wait(5.0)}, policy="all", timeout=0.05)
+    assert not acked and results == {}
+    release.set()
+    assert fan_out({}, policy="all") == (True, {})
+
+
+def test_stragglers_are_handed_back_and_settled():
+    release = threading.Event()
+    finished = []
+
+    def slow():
+        release.wait(5.0)
+        finished.append("slow")
+        return True
+
+    stragglers = []
+    acked, results = fan_out({"fast": lambda: True, "slow": slow}, policy="first", stragglers=stragglers)
+    assert acked and results == {"fast": True} and len(stragglers) == 1
+    pending = PendingWrites()
+    pending.add("chunk1", stragglers)
+    assert not pending.settle("chunk1", timeout=0.05)  # still running: kept for the next settle
+    threading.Timer(0.05, release.set).start()
+    assert pending.settle("chunk1", timeout=5.0)
+    assert finished == ["slow"]
+    assert pending.settle("chunk1")  # nothing left
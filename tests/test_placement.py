@@ -0,0 +1,57 @@
+import pytest
+
+from server_logic.placement import ChunkPlacement
+
+ROLLS = [str(r) for r in range(1, 501)]
+
+
+def test_split_only_moves_the_split_chunk():
+    base = ChunkPlacement(chunks=3, replicas=3, replication_factor=2)
+    split = base.with_split("chunk2")
+    assert split.chunks == ["chunk1", "chunk2.1", "chunk2.2", "chunk3"]
+    assert split.parent_of("chunk2.1") == "chunk2"
+    for roll in ROLLS:
+        before, after = base.chunk_for_roll(roll), split.chunk_for_roll(roll)
+        if before == "chunk2":
+            assert after in ("chunk2.1", "chunk2.2")
+        else:
+            assert after == before
+    assert {split.chunk_for_roll(r) for r in ROLLS} >= {"chunk2.1", "chunk2.2"}
+    assert base.chunks == ["chunk1", "chunk2", "chunk3"]  # the original is untouched
+
+
+def test_nested_split_and_merge_round_trip():
+    base = ChunkPlacement(chunks=2)
+    nested = base.with_split("chunk1").with_split("chunk1.2", ways=3)
+    assert nested.chunks == ["chunk1.1", "chunk1.2.1", "chunk1.2.2", "chunk1.2.3", "chunk2"]
+    with pytest.raises(KeyError):
+        nested.with_merge("chunk1")  # its children are not all leaves
+    merged = nested.with_merge("chunk1.2").with_merge("chunk1")
+    assert merged.chunks == base.chunks
+    assert [merged.chunk_for_roll(r) for r in ROLLS] == [base.chunk_for_roll(r) for r in ROLLS]
+
+
+def test_split_and_merge_reject_unknown_chunks():
+    placement = ChunkPlacement(chunks=2)
+    with pytest.raises(KeyError):
+        placement.with_split("chunk9")
+    with pytest.raises(KeyError):
+        placement.with_merge("chunk1")
+
+
+def test_to_dict_round_trip_keeps_splits():
+    split = ChunkPlacement(chunks=2, replicas=4, replication_factor=3).with_split("chunk1")
+    loaded = ChunkPlacement.from_dict(split.to_dict())
+    assert loaded.to_dict() == split.to_dict()
+    assert [loaded.chunk_for_roll(r) for r in ROLLS] == [split.chunk_for_roll(r) for r in ROLLS]
+    assert all(loaded.replicas_for_chunk(c) == split.replicas_for_chunk(c) for c in split.chunks)
+
+
+def test_with_replication_keeps_the_chunk_layout():
+    split = ChunkPlacement(chunks=2, replicas=3, replication_factor=3).with_split("chunk2")
+    fewer = split.with_replication(2)
+    assert fewer.replicas == ["replica_1", "replica_2"]
+    assert fewer.splits == split.splits
+    assert [fewer.chunk_for_roll(r) for r in ROLLS] == [split.chunk_for_roll(r) for r in ROLLS]
+    assert all(len(fewer.replicas_for_chunk(c)) == 2 for c in fewer.chunks)
+    assert fewer.with_merge("chunk2").chunks == ["chunk1", "chunk2"]
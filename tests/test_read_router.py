@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from server_logic import read_router
+from server_logic.read_router import ReadRouter
+
+PATHS = [Path("replica_1_chunk1.xlsx"), Path("replica_2_chunk1.xlsx"), Path("replica_3_chunk1.xlsx")]
+
+
+def test_reads_rotate_across_healthy_replicas():
+    router = ReadRouter()
+    firsts = {router.order(PATHS)[0] for _ in range(len(PATHS))}
+    assert firsts == set(PATHS)
+
+
+def test_a_failed_replica_is_skipped_during_its_backoff(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(read_router.time, "monotonic", lambda: now[0])
+    router = ReadRouter(backoff=30)
+    router.note_write(PATHS[0], ok=False)
+    for _ in range(len(PATHS)):
+        assert PATHS[0] not in router.order(PATHS)
+
+    now[0] += 31  # past the backoff: tried again, but only after the healthy replicas
+    assert router.order(PATHS)[-1] == PATHS[0]
+
+    router.note_write(PATHS[0], ok=True)
+    assert router.healthy(PATHS[0]) and len(router.order(PATHS)) == len(PATHS)
+
+
+def test_replicas_in_backoff_are_the_last_resort():
+    router = ReadRouter(backoff=30)
+    for p in PATHS:
+        router.note_write(p, ok=False)
+    assert len(router.order(PATHS)) == 1
+    router.note_write(PATHS[1], ok=True)
+    assert router.order(PATHS) == [PATHS[1]]
+    assert router.order(PATHS, need=2)[0] == PATHS[1] and len(router.order(PATHS, need=2)) == 2
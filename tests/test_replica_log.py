@@ -0,0 +1,50 @@
+import threading
+
+from server_logic import replica_log
+from server_logic.replica_log import ReplicaPatchLog, change
+from server_logic.xlsx_io import iter_xlsx_rows, serialize_rows, write_bytes_atomic
+
+
+def _replica(path, rows):
+    data, _ = serialize_rows(["Roll", "Name", "Marks"], rows)
+    write_bytes_atomic(path, data)
+    return path
+
+
+def test_compact_folds_the_log_into_the_workbook(tmp_path):
+    path = _replica(tmp_path / "replica_1_chunk1.xlsx", [["1", "Swaroop", "NA"]])
+    log = ReplicaPatchLog(compact_records=2)
+    assert log.append(path, [change("1", 3, 70, 1)]) == 1
+    assert not log.needs_compaction(path)
+    assert log.append(path, [change("2", 2, "Tanisha", 2)]) == 2
+    assert log.needs_compaction(path)
+    assert log.compact(path) == ["1", "2"]
+    assert list(iter_xlsx_rows(path)) == [("1", "Swaroop", 70), ("2", "Tanisha")]
+    assert log.records(path) == [] and not log.needs_compaction(path)
+
+
+def test_a_slow_fsync_on_one_replica_does_not_block_another(tmp_path, monkeypatch):
+    slow = _replica(tmp_path / "replica_1_chunk1.xlsx", [["1", "Swaroop", "NA"]])
+    fast = _replica(tmp_path / "replica_2_chunk1.xlsx", [["1", "Swaroop", "NA"]])
+    log = ReplicaPatchLog()
+    entered, release = threading.Event(), threading.Event()
+    real_fsync = replica_log.os.fsync
+
+    def fsync(fd):
+        if not entered.is_set():
+            entered.set()
+            release.wait(5)
+        real_fsync(fd)
+
+    monkeypatch.setattr(replica_log.os, "fsync", fsync)
+    stalled = threading.Thread(target=log.append, args=(slow, [change("1", 3, 70, 1)]))
+    stalled.start()
+    assert entered.wait(5)
+    done = threading.Event()
+    threading.Thread(target=lambda: (log.append(fast, [change("1", 3, 80, 1)]), done.set())).start()
+    try:
+        assert done.wait(2)
+    finally:
+        release.set()
+        stalled.join()
+    assert [r["value"] for r in log.records(slow)] == [70]
@@ -0,0 +1,30 @@
+from server_logic.results_store import ResultsReadCache, SqliteResultsStore, XlsxResultsStore
+
+HEADER = ["Roll", "Name", "Marks", "MCQ", "ISA"]
+
+
+def _seed():
+    return [["1", "Swaroop", "NA", "NA", "NA"], ["2", "Tanisha", "NA", "NA", "NA"]]
+
+
+def test_a_write_refetches_only_the_roll_that_is_read(tmp_path, monkeypatch):
+    store = SqliteResultsStore(tmp_path / "results.db", HEADER, seed=_seed)
+    cache = ResultsReadCache(store)
+    monkeypatch.setattr(store, "snapshot", lambda: (_ for _ in ()).throw(AssertionError("full rebuild")))
+    assert cache.get("1")[2] == "NA" and cache.get("2")[2] == "NA"
+
+    fetched = []
+    real_get = store.get
+    monkeypatch.setattr(store, "get", lambda roll: fetched.append(roll) or real_get(roll))
+    assert cache.get("1")[2] == "NA" and fetched == []  # served from the cache
+    store.update("1", {3: 70})
+    assert cache.get("1")[2] == 70 and fetched == ["1"]
+    assert cache.get("3") is None
+
+
+def test_in_memory_stores_are_passed_through(tmp_path):
+    store = XlsxResultsStore(tmp_path / "results.xlsx", HEADER, seed=_seed,
+                             flush_interval=3600, dirty_threshold=10 ** 6)
+    cache = ResultsReadCache(store)
+    store.update("2", {5: 21})
+    assert cache.get("2")[4] == 21 and cache._rows == {}
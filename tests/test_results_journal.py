@@ -0,0 +1,85 @@
+import os
+import threading
+
+import pytest
+
+from server_logic.results_store import ResultsJournal, XlsxResultsStore
+from server_logic.xlsx_io import iter_xlsx_rows
+
+HEADER = ["Roll", "Name", "Marks", "MCQ", "ISA"]
+
+
+def _seed():
+    return [["1", "Swaroop", "NA", "NA", "NA"]]
+
+
+def test_records_replay_in_order_and_skip_a_torn_tail(tmp_path):
+    path = tmp_path / "results.journal"
+    journal = ResultsJournal(path)
+    journal.append("1", {3: 70, 4: 7})
+    journal.append("2", {5: 21}, default_row=["2", "Tanisha", "NA", "NA", 21])
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write('{"seq": 3, "roll": "1", "se')  # crash mid-append
+    assert list(ResultsJournal(path).records()) == [
+        ("1", {3: 70, 4: 7}, None),
+        ("2", {5: 21}, ["2", "Tanisha", "NA", "NA", 21]),
+    ]
+
+
+def test_rotated_records_come_first(tmp_path):
+    journal = ResultsJournal(tmp_path / "results.journal")
+    journal.append("1", {3: 10})
+    journal.rotate()
+    journal.append("1", {3: 20})
+    assert journal.rotated_path.exists()
+    assert [values for _, values, _ in ResultsJournal(journal.path).records()] == [{3: 10}, {3: 20}]
+    journal.drop_rotated()
+    assert [values for _, values, _ in ResultsJournal(journal.path).records()] == [{3: 20}]
+
+
+def test_store_replays_unflushed_updates_after_a_crash(tmp_path):
+    xlsx, journal_path = tmp_path / "results.xlsx", tmp_path / "results.journal"
+    store = XlsxResultsStore(xlsx, HEADER, journal_path=journal_path, seed=_seed,
+                             flush_interval=3600, dirty_threshold=10 ** 6)
+    store.flush()
+    store.update("1", {3: 70})
+    store.update("2", {5: 21}, default_row=["2", "Tanisha", "NA", "NA", 21])
+    assert [r[2] for r in iter_xlsx_rows(xlsx)] == ["NA"]  # never flushed: lost without the journal
+
+    restarted = XlsxResultsStore(xlsx, HEADER, journal_path=journal_path, seed=_seed,
+                                 flush_interval=3600, dirty_threshold=10 ** 6)
+    assert restarted.replay() == 2
+    assert list(iter_xlsx_rows(xlsx)) == [("1", "Swaroop", 70, "NA", "NA"), ("2", "Tanisha", "NA", "NA", 21)]
+    assert not journal_path.exists() and not restarted.journal.rotated_path.exists()
+    assert restarted.replay() == 0
+
+
+def test_a_failed_fsync_fails_its_whole_batch(tmp_path, monkeypatch):
+    journal = ResultsJournal(tmp_path / "results.journal")
+    first, second = journal.enqueue("1", {3: 10}), journal.enqueue("2", {3: 20})
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (_ for _ in ()).throw(OSError("disk full")))
+    with pytest.raises(OSError):
+        journal.wait(first)
+    monkeypatch.setattr(os, "fsync", real_fsync)
+    journal.append("3", {3: 30})  # a later batch succeeding must not vouch for the lost one
+    with pytest.raises(OSError):
+        journal.wait(second)
+
+
+def test_replay_follows_apply_order_under_contention(tmp_path):
+    xlsx, journal_path = tmp_path / "results.xlsx", tmp_path / "results.journal"
+    store = XlsxResultsStore(xlsx, HEADER, journal_path=journal_path, seed=_seed,
+                             flush_interval=3600, dirty_threshold=10 ** 6)
+    store.flush()
+    threads = [threading.Thread(target=store.update, args=("1", {3: n})) for n in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    applied = store.get("1")[2]
+
+    restarted = XlsxResultsStore(xlsx, HEADER, journal_path=journal_path, seed=_seed,
+                                 flush_interval=3600, dirty_threshold=10 ** 6)
+    restarted.replay()
+    assert [r[2] for r in iter_xlsx_rows(xlsx)] == [applied]
@@ -0,0 +1,54 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "server_logic"))  # server.py uses flat imports
+import server  # noqa: E402
+
+LEASE = 0.05
+
+
+class _Store:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, roll, values, default_row=None):
+        self.updates.append((roll, values))
+        return True
+
+
+@pytest.fixture
+def chunk_lock(tmp_path, monkeypatch):
+    """One replica lock on roll 3's chunk, with a short lease; the master store records updates."""
+    monkeypatch.chdir(tmp_path)
+    chunk = server._get_chunk_for_roll("3")
+    monkeypatch.setattr(server, "LOCK_MODE", "replica")
+    monkeypatch.setattr(server, "replication_metadata",
+                        {"replicas": {"replica_1": {chunk: {"path": str(tmp_path / f"replica_1_{chunk}.xlsx")}}}})
+    lock = server.ChunkLock(f"replica_1:{chunk}", lease=LEASE)
+    monkeypatch.setattr(server, "chunk_locks", {lock.chunk_id: lock})
+    monkeypatch.setattr(server, "results_store", _Store())
+    return lock
+
+
+def test_write_refused_after_lease_expired_on_a_free_chunk(chunk_lock):
+    chunk_lock.acquire_write("3")
+    time.sleep(LEASE * 2)
+    assert chunk_lock.reap() == 1  # as the lease reaper would; nobody else takes the chunk
+    assert "expired" in server.update_chunk_marks("3", 40)
+    assert server.results_store.updates == []
+
+
+def test_write_refused_after_lease_expired_on_a_read_locked_chunk(chunk_lock):
+    chunk_lock.acquire_write("3")
+    time.sleep(LEASE * 2)
+    chunk_lock.acquire_read("5")
+    assert "expired" in server.update_chunk_marks("3", 40)
+    assert server.results_store.updates == []
+
+
+def test_write_refused_without_ever_taking_the_lock(chunk_lock):
+    assert "expired" in server.update_chunk_marks("3", 40)
+    assert server.results_store.updates == []
@@ -0,0 +1,24 @@
+import threading
+
+from server_logic.xlsx_io import write_bytes_atomic
+
+
+def test_concurrent_atomic_writes_never_tear_or_leak(tmp_path):
+    path = tmp_path / "replica_1_chunk1.xlsx"
+    torn = []
+
+    def writer(n):
+        blob = bytes([n]) * 100000
+        for _ in range(30):
+            write_bytes_atomic(path, blob)
+            data = path.read_bytes()
+            if len(data) != len(blob) or len(set(data)) != 1:
+                torn.append(n)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert torn == []
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]  # no temp files left behind